@@ -21,6 +21,11 @@ from sqlmodel import SQLModel
 from app.models.user import User
 from app.models.account import Account
 from app.models.transaction import Transaction
+from app.models.idempotency import IdempotencyKey
+from app.models.account_bucket import AccountBucket
+from app.models.account_summary import AccountSummary
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.reconciliation import AccountReconciliation, ReconciliationRun
 # --------------------
 
 # this is the Alembic Config object
@@ -0,0 +1,29 @@
+"""add transaction keyset index
+
+Revision ID: a1c4e9d27b3f
+Revises: 5bc76e47bee0
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e9d27b3f'
+down_revision: Union[str, Sequence[str], None] = '5bc76e47bee0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transaction_account_id_data_id', 'transaction', ['account_id', 'data', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_account_id_data_id', table_name='transaction')
@@ -0,0 +1,52 @@
+"""create reconciliation tables
+
+Revision ID: a8c3e5f1b042
+Revises: f6b8d2c4a917
+Create Date: 2026-10-18 19:26:03.118492
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e5f1b042'
+down_revision: Union[str, Sequence[str], None] = 'f6b8d2c4a917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A primeira conciliação depois do upgrade deve ser completa:
+    # python -m app.jobs.reconcile --full
+    op.create_table('reconciliation_run',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('full', sa.Boolean(), nullable=False),
+    sa.Column('last_transaction_id', sa.Integer(), nullable=False),
+    sa.Column('transactions_checked', sa.Integer(), nullable=False),
+    sa.Column('accounts_checked', sa.Integer(), nullable=False),
+    sa.Column('accounts_drifted', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('account_reconciliation',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('last_transaction_id', sa.Integer(), nullable=False),
+    sa.Column('ledger_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('drift', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_reconciliation')
+    op.drop_table('reconciliation_run')
@@ -0,0 +1,40 @@
+"""create account summary table
+
+Revision ID: b58f2e9a0c13
+Revises: e93b5a1c7d42
+Create Date: 2026-10-18 15:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58f2e9a0c13'
+down_revision: Union[str, Sequence[str], None] = 'e93b5a1c7d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Depois do upgrade, preencha com o histórico: python -m app.jobs.backfill_summaries
+    op.create_table('account_summary',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Enum('DAY', 'MONTH', name='summaryperiod'), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('total_in', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('total_out', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'period', 'period_start', 'shard')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_summary')
@@ -0,0 +1,31 @@
+"""add account version
+
+Revision ID: b5d9f3a7e210
+Revises: c2e7a9d4f186
+Create Date: 2026-10-18 22:07:31.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d9f3a7e210'
+down_revision: Union[str, Sequence[str], None] = 'c2e7a9d4f186'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('account', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('account_bucket', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account_bucket', 'version')
+    op.drop_column('account', 'version')
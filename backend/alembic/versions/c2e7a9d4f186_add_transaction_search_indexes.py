@@ -0,0 +1,100 @@
+"""add transaction search indexes
+
+Revision ID: c2e7a9d4f186
+Revises: a8c3e5f1b042
+Create Date: 2026-10-18 20:41:55.604371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7a9d4f186'
+down_revision: Union[str, Sequence[str], None] = 'a8c3e5f1b042'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 1000
+
+# Prefixos das descrições gravadas pelo ledger (_sent_description/_received_description)
+PREFIXES = ('Envio para ', 'Recebido de ')
+
+transaction = sa.table(
+    'transaction',
+    sa.column('id', sa.Integer),
+    sa.column('transaction_type', sa.String),
+    sa.column('description', sa.String),
+    sa.column('counterparty_account_id', sa.Integer),
+)
+account = sa.table(
+    'account',
+    sa.column('id', sa.Integer),
+    sa.column('number', sa.String),
+)
+
+
+def counterparty_number(description: str | None) -> str | None:
+    for prefix in PREFIXES:
+        if description and description.startswith(prefix) and ':' in description:
+            return description[len(prefix):description.index(':')]
+    return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transaction', sa.Column('counterparty_account_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_transaction_counterparty_account_id', 'transaction', 'account', ['counterparty_account_id'], ['id']
+    )
+
+    # Backfill: a conta do outro lado das transferências já gravadas sai da descrição
+    bind = op.get_bind()
+    accounts = dict(bind.execute(sa.select(account.c.number, account.c.id)).all())
+    update = transaction.update()\
+        .where(transaction.c.id == sa.bindparam('t_id'))\
+        .values(counterparty_account_id=sa.bindparam('t_counterparty'))
+
+    rows = bind.execute(
+        sa.select(transaction.c.id, transaction.c.description)
+        .where(transaction.c.transaction_type == 'TRANSFER')
+        .execution_options(yield_per=BATCH)
+    )
+    pending = []
+    for transaction_id, description in rows:
+        counterparty = accounts.get(counterparty_number(description))
+        if counterparty is None:
+            continue
+        pending.append({'t_id': transaction_id, 't_counterparty': counterparty})
+        if len(pending) >= BATCH:
+            bind.execute(update, pending)
+            pending = []
+    if pending:
+        bind.execute(update, pending)
+
+    op.create_index('ix_transaction_account_id_type_data_id', 'transaction', ['account_id', 'transaction_type', 'data', 'id'], unique=False)
+    op.create_index('ix_transaction_account_id_counterparty_data_id', 'transaction', ['account_id', 'counterparty_account_id', 'data', 'id'], unique=False)
+    op.create_index('ix_transaction_account_id_amount', 'transaction', ['account_id', 'amount'], unique=False)
+
+    # Busca por palavra na descrição (CONTAINS). Sincroniza no commit: o lançamento
+    # aparece na busca assim que é gravado.
+    if bind.dialect.name == 'oracle':
+        table = bind.dialect.identifier_preparer.quote('transaction')
+        op.execute(
+            f"CREATE INDEX ix_transaction_description_text ON {table} (description) "
+            "INDEXTYPE IS CTXSYS.CONTEXT PARAMETERS ('SYNC (ON COMMIT)')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'oracle':
+        op.execute("DROP INDEX ix_transaction_description_text")
+    op.drop_index('ix_transaction_account_id_amount', table_name='transaction')
+    op.drop_index('ix_transaction_account_id_counterparty_data_id', table_name='transaction')
+    op.drop_index('ix_transaction_account_id_type_data_id', table_name='transaction')
+    op.drop_constraint('fk_transaction_counterparty_account_id', 'transaction', type_='foreignkey')
+    op.drop_column('transaction', 'counterparty_account_id')
@@ -0,0 +1,97 @@
+"""add transaction balance_after
+
+Revision ID: d41a7c3e9b25
+Revises: b58f2e9a0c13
+Create Date: 2026-10-18 16:40:12.905133
+
+"""
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c3e9b25'
+down_revision: Union[str, Sequence[str], None] = 'b58f2e9a0c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 1000
+
+transaction = sa.table(
+    'transaction',
+    sa.column('id', sa.Integer),
+    sa.column('account_id', sa.Integer),
+    sa.column('amount', sa.Numeric(15, 2)),
+    sa.column('transaction_type', sa.String),
+    sa.column('description', sa.String),
+    sa.column('data', sa.DateTime),
+    sa.column('balance_after', sa.Numeric(15, 2)),
+)
+account = sa.table(
+    'account',
+    sa.column('id', sa.Integer),
+    sa.column('balance', sa.Numeric(15, 2)),
+    sa.column('bucket_count', sa.Integer),
+)
+
+# Saques e envios de transferência (ledger._sent_description) tiram da conta. A
+# descrição é texto livre: só a metade de envio de uma transferência conta como saída.
+signed = sa.case(
+    (transaction.c.transaction_type == 'WITHDRAW', -transaction.c.amount),
+    (
+        sa.and_(transaction.c.transaction_type == 'TRANSFER', transaction.c.description.like('Envio para %')),
+        -transaction.c.amount,
+    ),
+    else_=transaction.c.amount,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transaction', sa.Column('balance_after', sa.Numeric(precision=15, scale=2), nullable=True))
+
+    # Backfill: saldo corrente de cada linha, partindo do saldo de abertura
+    # (saldo atual menos tudo o que foi lançado). Contas com buckets ficam vazias.
+    bind = op.get_bind()
+    opening = {
+        account_id: balance - net
+        for account_id, balance, net in bind.execute(
+            sa.select(account.c.id, account.c.balance, sa.func.sum(signed))
+            .select_from(account.join(transaction, transaction.c.account_id == account.c.id))
+            .where(account.c.bucket_count == 0)
+            .group_by(account.c.id, account.c.balance)
+        )
+    }
+
+    update = transaction.update()\
+        .where(transaction.c.id == sa.bindparam('t_id'))\
+        .values(balance_after=sa.bindparam('t_balance'))
+
+    rows = bind.execute(
+        sa.select(transaction.c.id, transaction.c.account_id, signed)
+        .where(transaction.c.account_id.in_(sa.select(account.c.id).where(account.c.bucket_count == 0)))
+        .order_by(transaction.c.account_id, transaction.c.data, transaction.c.id)
+        .execution_options(yield_per=BATCH)
+    )
+
+    current, balance = None, Decimal(0)
+    pending = []
+    for transaction_id, account_id, amount in rows:
+        if account_id != current:
+            current, balance = account_id, opening[account_id]
+        balance += amount
+        pending.append({'t_id': transaction_id, 't_balance': balance})
+        if len(pending) >= BATCH:
+            bind.execute(update, pending)
+            pending = []
+    if pending:
+        bind.execute(update, pending)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transaction', 'balance_after')
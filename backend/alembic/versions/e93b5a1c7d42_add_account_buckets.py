@@ -0,0 +1,42 @@
+"""add account buckets
+
+Revision ID: e93b5a1c7d42
+Revises: c7d2f0a8e614
+Create Date: 2026-10-18 13:21:07.664019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93b5a1c7d42'
+down_revision: Union[str, Sequence[str], None] = 'c7d2f0a8e614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('account', sa.Column('bucket_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('account_bucket',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Devolve o saldo dos buckets para a linha principal antes de apagar a tabela
+    op.execute(
+        "UPDATE account SET balance = balance + COALESCE("
+        "(SELECT SUM(b.balance) FROM account_bucket b WHERE b.account_id = account.id), 0)"
+    )
+    op.drop_table('account_bucket')
+    op.drop_column('account', 'bucket_count')
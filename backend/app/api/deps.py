@@ -1,29 +1,73 @@
+import hashlib
+import hmac
+import time
+from datetime import datetime
+from decimal import Decimal
 from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 import jwt
+from pytz import timezone
+from sqlalchemy import event
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.db import get_session
+from app.core.cache import TTLCache
+from app.core.db import get_replica_session, get_session, request_user_id, wrote_recently
 from app.core.config import settings
+from app.core.security import STREAM_SCOPE
 from app.models.user import User
+from app.models.account import Account
+from app.models.transaction import TransactionType
 from app.schemas.token import TokenPayload
+from app.services.transaction_search import SearchFilters
 
 # Isso diz ao Swagger que a rota de login fica em "/api/v1/login"
 # O Swagger vai criar aquele botão de cadeado 🔒 baseado nisso.
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login"
 )
+# Para o stream SSE: o EventSource do navegador não manda header, o token pode vir na
+# query (só tokens de stream, nunca o de login)
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/login", auto_error=False
+)
 
-async def get_current_user(
-    token: Annotated[str, Depends(reusable_oauth2)],
-    session: AsyncSession = Depends(get_session)
-) -> User:
+# sha256(token) -> id do usuário. Cada entrada vive no máximo até o 'exp' do token.
+token_cache = TTLCache(max_size=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# id do usuário -> User (objeto desanexado da sessão)
+user_cache = TTLCache(max_size=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
     """
-    Decodifica o token, valida a assinatura e busca o usuário no banco.
+    Tira o usuário do cache. Chamado automaticamente quando um User é alterado
+    pelo ORM (ex.: is_active mudou), mas pode ser usado à mão também.
+    """
+    user_cache.delete(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
+def _decode_token(token: str, scope: str | None = None) -> int:
     """
+    Id do usuário do token. `scope` é o claim exigido: None para tokens de login, e um
+    token de stream não passa como token de login (nem o contrário).
+    """
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    cache_key = (scope, token_hash)
+
+    if settings.AUTH_CACHE_ENABLED:
+        user_id = token_cache.get(cache_key)
+        if user_id is not None:
+            request_user_id.set(user_id)
+            return user_id
+
     try:
         # 1. Decodifica o JWT
         payload = jwt.decode(
@@ -35,17 +79,226 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Não foi possível validar as credenciais",
         )
-    
-    # 2. Busca o usuário no banco pelo ID que estava no token (sub)
+    if payload.get("scope") != scope:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Não foi possível validar as credenciais",
+        )
+
     # Lembre-se: token_data.sub é string, mas nosso ID é int, o Oracle lida bem, mas converter é bom
-    query = select(User).where(User.id == int(token_data.sub))
-    result = await session.exec(query)
-    user = result.first()
+    user_id = int(token_data.sub)
+
+    if settings.AUTH_CACHE_ENABLED:
+        # Nunca guarda o token além da validade dele
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set(cache_key, user_id, ttl=ttl)
+
+    # Um commit feito nesta requisição marca o usuário para ler do primário
+    request_user_id.set(user_id)
+    return user_id
+
+
+async def get_read_session(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_session),
+    replica: AsyncSession | None = Depends(get_replica_session),
+) -> AsyncSession:
+    """
+    Sessão para rotas que só leem: a réplica, se configurada, menos para quem gravou
+    nos últimos READ_YOUR_WRITES_SECONDS (ele precisa ver a própria escrita, e a
+    réplica pode estar atrasada). As sessões só pegam conexão no primeiro uso,
+    então a que não for escolhida não custa nada.
+    """
+    if replica is None or wrote_recently(_decode_token(token)):
+        return session
+    return replica
+
+
+async def _load_user(session: AsyncSession, token: str) -> User:
+    user_id = _decode_token(token)
+
+    user = user_cache.get(user_id) if settings.AUTH_CACHE_ENABLED else None
+
+    if user is None:
+        # 2. Busca o usuário no banco pelo ID que estava no token (sub)
+        query = select(User).where(User.id == user_id)
+        result = await session.exec(query)
+        user = result.first()
     
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        if not user:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+        if settings.AUTH_CACHE_ENABLED:
+            # Desanexa da sessão: um rollback na rota não pode expirar o objeto do cache
+            session.expunge(user)
+            user_cache.set(user_id, user)
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Usuário inativo")
         
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_session)
+) -> User:
+    """
+    Decodifica o token, valida a assinatura e busca o usuário no banco.
+    Com AUTH_CACHE_ENABLED, token e usuário já vistos saem do cache sem ir ao banco.
+    """
+    return await _load_user(session, token)
+
+
+async def get_current_user_read(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_read_session)
+) -> User:
+    """
+    Igual a get_current_user, mas busca o usuário pela sessão de leitura (réplica).
+    """
+    return await _load_user(session, token)
+
+
+async def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Só deixa passar usuários administradores (is_superuser).
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
+    return current_user
+
+
+async def get_metrics_access(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_session)
+) -> None:
+    """
+    Acesso ao /metrics: o METRICS_TOKEN (scrape do Prometheus) ou um administrador.
+    """
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    user = await _load_user(session, token)
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
+
+
+async def _load_account(session: AsyncSession, token: str, scope: str | None = None) -> Account:
+    user_id = _decode_token(token, scope)
+
+    query = select(User, Account)\
+        .outerjoin(Account, Account.user_id == User.id)\
+        .where(User.id == user_id)
+    result = await session.exec(query)
+    row = result.first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    user, account = row
+
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Usuário inativo")
+
+    if not account:
+        raise HTTPException(status_code=404, detail="Conta não encontrada para este usuário.")
+
+    return account
+
+
+async def get_current_account(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_session)
+) -> Account:
+    """
+    Valida o token e carrega usuário + conta numa única consulta (JOIN), em vez de
+    get_current_user seguido de um SELECT na conta. Use nas rotas que só precisam da conta
+    (o dono está em account.user_id).
+    """
+    return await _load_account(session, token)
+
+
+async def get_current_account_read(
+    token: Annotated[str, Depends(reusable_oauth2)],
+    session: AsyncSession = Depends(get_read_session)
+) -> Account:
+    """
+    Igual a get_current_account, mas pela sessão de leitura (réplica). Só para rotas
+    que não gravam: a conta pode estar alguns instantes atrás do primário.
+    """
+    return await _load_account(session, token)
+
+
+def get_stream_token(
+    token: Annotated[str | None, Depends(optional_oauth2)],
+    access_token: str | None = Query(
+        default=None, description="Token de stream (POST /transactions/stream/token), para clientes EventSource"
+    ),
+) -> tuple[str, str | None]:
+    """
+    (token, scope exigido): o de login no header, ou um token de stream na query.
+    """
+    if token:
+        return token, None
+    if access_token:
+        return access_token, STREAM_SCOPE
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_stream_account(
+    credentials: tuple[str, str | None] = Depends(get_stream_token),
+    session: AsyncSession = Depends(get_session)
+) -> Account:
+    """
+    Igual a get_current_account, com o token de login no header ou um token de
+    stream em ?access_token=.
+    """
+    return await _load_account(session, *credentials)
+
+
+def token_expires_at(token: str) -> float | None:
+    """
+    Vencimento do token (epoch), para encerrar conexões longas quando ele vence. Para
+    um token de stream, vale o do login que o gerou. Só chame com um token já validado.
+    """
+    payload = jwt.decode(token, options={"verify_signature": False})
+    return payload.get("session_exp", payload.get("exp"))
+
+
+def get_search_filters(
+    transaction_type: TransactionType | None = None,
+    min_amount: Decimal | None = Query(default=None, ge=0),
+    max_amount: Decimal | None = Query(default=None, ge=0),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    counterparty: str | None = Query(default=None, max_length=20, description="Número da conta do outro lado da transferência"),
+    q: str | None = Query(default=None, min_length=2, max_length=100, description="Texto na descrição"),
+) -> SearchFilters:
+    """
+    Filtros do extrato vindos da query string. Datas com fuso são convertidas para o
+    horário de Recife, em que Transaction.data é gravado.
+    """
+    recife = timezone("America/Recife")
+    start, end = [
+        value.astimezone(recife).replace(tzinfo=None) if value and value.tzinfo else value
+        for value in (start, end)
+    ]
+
+    if min_amount is not None and max_amount is not None and min_amount > max_amount:
+        raise HTTPException(status_code=400, detail="min_amount deve ser menor ou igual a max_amount.")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="O início deve ser anterior ao fim.")
+
+    return SearchFilters(
+        transaction_type=transaction_type,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start=start,
+        end=end,
+        counterparty=counterparty,
+        text=q,
+    )
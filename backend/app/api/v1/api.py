@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, auth, transactions
+from app.api.v1.endpoints import users, auth, transactions, admin
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.core.db import get_session, pool_stats, read_engine
+from app.core.responses import FastJSONResponse
+from app.models.account import Account
+from app.models.reconciliation import ReconciliationRun
+from app.schemas.account import (
+    AccountBucketsPublic,
+    AccountBucketsUpdate,
+    AccountDriftPublic,
+    ReconciliationPublic,
+)
+from app.schemas.transaction import TransactionPage
+from app.services import account_buckets, reconciliation, transaction_search
+from app.services.transaction_search import SearchFilters
+
+router = APIRouter(dependencies=[Depends(deps.get_current_superuser)])
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    """
+    Estatísticas do pool de conexões deste worker (em uso, overflow, espera no checkout,
+    tempo abrindo conexões novas).
+    Com réplica de leitura configurada, o pool dela vem em "replica".
+    """
+    stats = pool_stats()
+    if read_engine:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+@router.put("/accounts/{number}/buckets", response_model=AccountBucketsPublic)
+async def update_account_buckets(
+    number: str,
+    buckets_in: AccountBucketsUpdate,
+    session: AsyncSession = Depends(get_session)):
+    """
+    Liga/desliga o modo de conta quente: o saldo passa a ser dividido em N buckets
+    para que muitos créditos simultâneos não disputem a mesma linha.
+    """
+    if not 0 <= buckets_in.bucket_count <= settings.ACCOUNT_BUCKET_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bucket_count deve estar entre 0 e {settings.ACCOUNT_BUCKET_MAX}.",
+        )
+
+    query = select(Account).where(Account.number == number).with_for_update()
+    result = await session.exec(query)
+    account = result.first()
+
+    if not account:
+        raise HTTPException(status_code=404, detail="Conta não encontrada.")
+
+    await account_buckets.set_bucket_count(session, account, buckets_in.bucket_count)
+    await session.commit()
+    await session.refresh(account)
+
+    return AccountBucketsPublic(
+        id=account.id,
+        number=account.number,
+        balance=await account_buckets.total_balance(session, account),
+        bucket_count=account.bucket_count,
+    )
+
+@router.get("/accounts/{number}/transactions", response_model=TransactionPage)
+async def search_account_transactions(
+    number: str,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    filters: SearchFilters = Depends(deps.get_search_filters),
+    session: AsyncSession = Depends(deps.get_read_session)):
+    """
+    Busca no extrato de qualquer conta, para o atendimento: os mesmos filtros e a
+    mesma paginação de GET /transactions/.
+    """
+    result = await session.exec(select(Account.id).where(Account.number == number))
+    account_id = result.first()
+    if account_id is None:
+        raise HTTPException(status_code=404, detail="Conta não encontrada.")
+
+    try:
+        body = await transaction_search.page(
+            session, account_id, filters, cursor, limit, settings.SEARCH_COUNT_CAP
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    return FastJSONResponse(body)
+
+@router.get("/reconciliation", response_model=ReconciliationPublic)
+async def get_reconciliation(
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session)):
+    """
+    Resultado da conciliação de saldos: a última execução concluída e as contas cujo
+    saldo não bate com a soma dos lançamentos, maiores divergências primeiro.
+    """
+    result = await session.exec(
+        select(ReconciliationRun)
+        .where(ReconciliationRun.finished_at.is_not(None))
+        .order_by(ReconciliationRun.id.desc())
+        .limit(1)
+    )
+    last_run = result.first()
+    drifted = await reconciliation.drifted_accounts(session, limit)
+
+    return ReconciliationPublic(
+        last_run_id=last_run.id if last_run else None,
+        last_run_full=last_run.full if last_run else None,
+        last_run_finished_at=last_run.finished_at if last_run else None,
+        last_transaction_id=last_run.last_transaction_id if last_run else 0,
+        accounts_drifted=last_run.accounts_drifted if last_run else 0,
+        accounts=[
+            AccountDriftPublic(
+                number=number,
+                balance=state.balance,
+                ledger_balance=state.ledger_balance,
+                drift=state.drift,
+                last_transaction_id=state.last_transaction_id,
+                checked_at=state.checked_at,
+            )
+            for number, state in drifted
+        ],
+    )
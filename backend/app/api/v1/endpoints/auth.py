@@ -5,7 +5,9 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.db import get_session
-from app.core.security import create_access_token, verify_password
+from app.core.security import (
+    create_access_token, get_password_hash_async, password_needs_rehash, verify_password_async,
+)
 from app.models.user import User
 from app.schemas.token import Token
 
@@ -22,7 +24,8 @@ async def login_for_access_token(
     user = result.first()
 
     # 2. Verifica se usuário existe e se a senha bate
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # O Argon2 roda no pool de threads, o event loop segue atendendo as outras rotas
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -32,6 +35,12 @@ async def login_for_access_token(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Usuário inativo")
 
+    # Parâmetros do Argon2 mudaram no Settings: aproveita a senha em mãos e refaz o hash
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+        session.add(user)
+        await session.commit()
+
     # 3. Gera o token com o tempo definido no config
     # Usamos o ID do usuário como 'sub' (subject) do token
     return Token(
@@ -1,68 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, timedelta
+from typing import Annotated
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pytz import timezone
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api import deps
+from app.core import conditional
+from app.core.config import settings
 from app.core.db import get_session
-from app.models.user import User
+from app.core.responses import FastJSONResponse
+from app.core.security import create_stream_token
 from app.models.account import Account
-from app.models.transaction import Transaction, TransactionType
-from app.schemas.transaction import TransactionCreate, TransactionPublic, TransferCreate
+from app.models.account_summary import SummaryPeriod
+from app.models.transaction import Transaction
+from app.schemas.token import Token
+from app.schemas.transaction import (
+    ExportFormat, TransactionCreate, TransactionPublic, TransactionPage, TransferCreate,
+    TransferBatchCreate, TransferBatchItem, TransferBatchPublic, PeriodSummary, TransactionSummary, BalanceAtPublic,
+)
+from app.services import (
+    account_buckets, balance_history, idempotency, ledger, live_updates, statement, summaries, transaction_search,
+    write_pipeline,
+)
+from app.services.transaction_search import SearchFilters
 
 router = APIRouter()
 
 @router.post("/transaction", response_model=TransactionPublic)
 async def make_transaction(
     trans_in: TransactionCreate,
-    current_user: User = Depends(deps.get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+    account: Account = Depends(deps.get_current_account),
     session: AsyncSession = Depends(get_session)):
-    query = select(Account).where(Account.user_id == current_user.id)
-    result = await session.exec(query)
-    account = result.first()
 
-    if not account:
-        raise HTTPException(status_code=404, detail="Conta não encontrada para este usuário.")
-    
-    if trans_in.amount <= 0:
-        raise HTTPException(status_code=400, detail="Valor não pode ser menor ou igual a zero.")
-    
-    if trans_in.transaction_type == TransactionType.DEPOSIT:
-        account.balance += trans_in.amount
-    elif trans_in.transaction_type == TransactionType.WITHDRAW:
-        if account.balance < trans_in.amount:
-            raise HTTPException(status_code=400, detail="O valor é maior que o disponível na conta")
-        
-        account.balance -= trans_in.amount
-
-    transaction = Transaction(
-        amount = trans_in.amount,
-        account_id = account.id,
-        transaction_type = trans_in.transaction_type,
-        description = trans_in.description
-    )
+    # Retentativa do cliente: devolve a resposta guardada sem mexer na conta
+    request_hash = None
+    if idempotency_key:
+        request_hash = idempotency.fingerprint("/transaction", trans_in)
+        replayed = await idempotency.lookup(session, account.user_id, idempotency_key, request_hash)
+        if replayed:
+            return replayed
 
-    session.add(transaction) # Salva o extrato
-    session.add(account)     # Atualiza o saldo
-    
-    # 6. Efetiva tudo de uma vez
-    await session.commit()
+    # Group commit: a operação entra na fila e é gravada junto com as de outras requisições.
+    # Com Idempotency-Key seguimos pelo caminho normal, a chave precisa ir no mesmo commit.
+    if settings.LEDGER_GROUP_COMMIT_ENABLED and not idempotency_key:
+        # O lote grava com a sessão do pipeline: a conexão desta requisição volta para
+        # o pool agora, e não fica presa esperando a janela do group commit
+        await session.close()
+        try:
+            transaction = await write_pipeline.get_pipeline().submit(write_pipeline.LedgerOperation(
+                account_id=account.id,
+                transaction_type=trans_in.transaction_type,
+                amount=trans_in.amount,
+                description=trans_in.description,
+                buckets=account.bucket_count,
+                user_id=account.user_id,
+            ))
+        except ledger.LedgerError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        body = TransactionPublic.model_validate(transaction).model_dump(mode="json")
+        await live_updates.publish_transactions(body)
+        return body
+
+    # O saldo é atualizado direto no banco (UPDATE ... RETURNING), sem ler-alterar-gravar em Python
+    try:
+        transaction = await ledger.post_transaction(
+            session,
+            account_id=account.id,
+            transaction_type=trans_in.transaction_type,
+            amount=trans_in.amount,
+            description=trans_in.description,
+            buckets=account.bucket_count,
+        )
+    except ledger.LedgerError as e:
+        await session.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    await session.flush()
     await session.refresh(transaction)
+    body = TransactionPublic.model_validate(transaction).model_dump(mode="json")
+    
+    # Efetiva tudo de uma vez (lançamento + chave de idempotência)
+    replayed = await idempotency.commit(
+        session, account.user_id, idempotency_key, request_hash, "/transaction", body
+    )
+    if replayed:
+        return replayed
 
-    return transaction
+    # Já commitado: avisa quem está com o stream da conta aberto
+    await live_updates.publish_transactions(body)
+    return body
 
 @router.post("/transfer", response_model=TransactionPublic)
 async def create_transfer(
     transfer_in: TransferCreate,
-    current_user: User = Depends(deps.get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+    account: Account = Depends(deps.get_current_account),
     session: AsyncSession = Depends(get_session)):
 
-    query_source = select(Account).where(Account.user_id == current_user.id)
-    result_source = await session.exec(query_source)
-    source_account = result_source.first()
+    request_hash = None
+    if idempotency_key:
+        request_hash = idempotency.fingerprint("/transfer", transfer_in)
+        replayed = await idempotency.lookup(session, account.user_id, idempotency_key, request_hash)
+        if replayed:
+            return replayed
 
-    if not source_account:
-        raise HTTPException(status_code=404, detail="Sua conta não foi encontrada.")
-    
     query_target = select(Account).where(Account.number == transfer_in.target_account_number)
     result_target = await session.exec(query_target)
     target_account = result_target.first()
@@ -70,67 +114,243 @@ async def create_transfer(
     if not target_account:
         raise HTTPException(status_code=404, detail="Conta de destino não encontrada.")
 
-    if source_account.id == target_account.id:
-        raise HTTPException(status_code=400, detail="Você não pode transferir para si mesmo.")
+    try:
+        transaction_out, transaction_in = await ledger.post_transfer(
+            session,
+            source=account,
+            target=target_account,
+            amount=transfer_in.amount,
+            description=transfer_in.description,
+        )
+    except ledger.LedgerError as e:
+        await session.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-    if transfer_in.amount <= 0:
-        raise HTTPException(status_code=400, detail="O valor deve ser positivo.")
+    await session.flush()
+    await session.refresh(transaction_out)
+    body = TransactionPublic.model_validate(transaction_out).model_dump(mode="json")
+    body_in = TransactionPublic.model_validate(transaction_in).model_dump(mode="json")
 
-    if source_account.balance < transfer_in.amount:
-        raise HTTPException(status_code=400, detail="Saldo insuficiente para transferência.")
-    
-    #Retira o dinheiro da conta do remetente
-    source_account.balance -= transfer_in.amount
-
-    transaction_out = Transaction(
-        account_id=source_account.id,
-        transaction_type=TransactionType.TRANSFER,
-        amount=transfer_in.amount,
-        description=f"Envio para {target_account.number}: {transfer_in.description or ''}",
+    replayed = await idempotency.commit(
+        session, account.user_id, idempotency_key, request_hash, "/transfer", body
     )
+    if replayed:
+        return replayed
 
-    #Adiciona o valor ao Destinatário
-    target_account.balance += transfer_in.amount
+    # As duas pontas recebem o lançamento e o saldo novo
+    await live_updates.publish_transactions(body, body_in)
 
-    transaction_in = Transaction(
-        account_id=target_account.id,
-        transaction_type=TransactionType.TRANSFER,
-        amount=transfer_in.amount,
-        description=f"Recebido de {source_account.number}: {transfer_in.description or ''}"
-    )
+    # Retorna o comprovante de quem enviou
+    return body
 
-    session.add(source_account)
-    session.add(target_account)
-    session.add(transaction_out)
-    session.add(transaction_in)
+@router.post("/transfer/batch", response_model=TransferBatchPublic)
+async def create_transfer_batch(
+    batch_in: TransferBatchCreate,
+    account: Account = Depends(deps.get_current_account),
+    session: AsyncSession = Depends(get_session)):
 
-    await session.commit()
-    await session.refresh(transaction_out)
+    if not batch_in.transfers:
+        raise HTTPException(status_code=400, detail="O lote está vazio.")
 
-    # Retorna o comprovante de quem enviou
-    return transaction_out
+    if len(batch_in.transfers) > settings.TRANSFER_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O lote aceita no máximo {settings.TRANSFER_BATCH_MAX_ITEMS} transferências.",
+        )
+
+    transfers = [
+        ledger.BatchTransfer(
+            target_account_number=t.target_account_number,
+            amount=t.amount,
+            description=t.description,
+        )
+        for t in batch_in.transfers
+    ]
+
+    # Um único commit para o lote inteiro
+    results = await ledger.post_transfer_batch(session, account, transfers, atomic=batch_in.atomic)
+    succeeded = sum(1 for r in results if r.status == "ok")
+
+    if succeeded:
+        await session.commit()
+        # Já commitado: as duas pontas de cada item recebem o lançamento
+        await live_updates.publish_committed(session, sorted(
+            transaction_id
+            for r in results if r.status == "ok"
+            for transaction_id in (r.transaction_id, r.received_transaction_id)
+        ))
+    else:
+        await session.rollback()
 
-@router.get("/", response_model=list[TransactionPublic])
+    return TransferBatchPublic(
+        committed=succeeded > 0,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        items=[
+            TransferBatchItem(index=r.index, status=r.status, transaction_id=r.transaction_id, detail=r.detail)
+            for r in results
+        ],
+    )
+
+@router.get("/", response_model=TransactionPage)
 async def get_transactions(
-    skip=0,
-    limit=100,
-    current_user: User = Depends(deps.get_current_user), 
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    filters: SearchFilters = Depends(deps.get_search_filters),
+    if_none_match: str | None = Header(default=None),
+    account: Account = Depends(deps.get_current_account_read),
+    session: AsyncSession = Depends(deps.get_read_session)):
+    """
+    Extrato da conta, mais recentes primeiro. Aceita filtros por tipo, faixa de valor,
+    período, conta do outro lado da transferência e texto na descrição. Responde 304
+    a If-None-Match se a conta não mudou, sem ler o extrato.
+    """
+    tag = conditional.etag(account.id, await account_buckets.total_version(session, account), cursor, limit, filters)
+    if conditional.matches(if_none_match, tag):
+        return conditional.not_modified(tag)
+
+    try:
+        body = await transaction_search.page(
+            session, account.id, filters, cursor, limit, settings.SEARCH_COUNT_CAP
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+    # Caminho rápido: dicts direto para o orjson, sem revalidar pelo response_model
+    # (que continua declarado para a documentação)
+    return FastJSONResponse(body, headers={"ETag": tag, **conditional.HEADERS})
+
+@router.get("/stream")
+async def stream_transactions(
+    last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+    credentials: tuple[str, str | None] = Depends(deps.get_stream_token),
+    account: Account = Depends(deps.get_stream_account),
+    session: AsyncSession = Depends(get_session)):
+    """
+    Server-Sent Events com a conta em tempo real, no lugar de consultar /transactions/
+    e /users/account de tempos em tempos:
+
+    - `balance` ao conectar, com o saldo atual;
+    - `transaction` a cada lançamento commitado (id do evento = id do lançamento, o
+      saldo novo vem em balance_after);
+    - ao reconectar com Last-Event-ID, os lançamentos perdidos no intervalo, ou
+      `reset` se forem muitos (recarregue o extrato).
+
+    O token de login vai no header; o EventSource não manda header, então navegadores
+    usam ?access_token= com um token de POST /transactions/stream/token. A conexão é
+    encerrada quando o login vence ou se o cliente não acompanhar os eventos.
+    """
+    channel = live_updates.channel(account.id)
+    if live_updates.broker.subscribers(channel) >= settings.LIVE_MAX_STREAMS_PER_ACCOUNT:
+        raise HTTPException(status_code=429, detail="Muitas conexões em tempo real abertas para esta conta.")
+
+    # Assina antes de ler o saldo: nada commitado a partir daqui se perde
+    subscription = live_updates.broker.subscribe(channel)
+    try:
+        balance = await live_updates.balance(session, account)
+        initial = [live_updates.frame("balance", {"balance": balance})]
+        if last_event_id is not None:
+            missed = await live_updates.catch_up(session, account.id, last_event_id, settings.LIVE_CATCH_UP_LIMIT)
+            initial.extend(missed if missed is not None else [live_updates.frame("reset", {})])
+    except BaseException:
+        subscription.close()
+        raise
+
+    # A conexão volta para o pool agora; o stream pode ficar aberto por muito tempo
+    await session.close()
+
+    return StreamingResponse(
+        live_updates.stream(subscription, initial, last_event_id or 0, deps.token_expires_at(credentials[0])),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/stream/token", response_model=Token)
+async def issue_stream_token(
+    token: Annotated[str, Depends(deps.reusable_oauth2)],
+    account: Account = Depends(deps.get_current_account)):
+    """
+    Token curto (STREAM_TOKEN_EXPIRE_SECONDS) que só abre /transactions/stream, para ir
+    em ?access_token= no lugar do token de login: URLs ficam nos logs de acesso do
+    uvicorn e de proxies.
+    """
+    return Token(
+        access_token=create_stream_token(account.user_id, deps.token_expires_at(token)),
+        token_type="bearer",
+    )
+
+@router.get("/summary", response_model=TransactionSummary)
+async def get_summary(
+    period: SummaryPeriod = SummaryPeriod.DAY,
+    start: date | None = None,
+    end: date | None = None,
+    account: Account = Depends(deps.get_current_account),
+    session: AsyncSession = Depends(get_session)):
+
+    # Padrão: últimos 30 dias ou últimos 12 meses
+    end = end or datetime.now(timezone("America/Recife")).date()
+    if not start:
+        start = end - timedelta(days=29) if period == SummaryPeriod.DAY else summaries.add_months(end, -11)
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="O início deve ser anterior ao fim.")
+
+    if summaries.period_count(period, start, end) > settings.SUMMARY_MAX_PERIODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O intervalo aceita no máximo {settings.SUMMARY_MAX_PERIODS} períodos.",
+        )
+
+    # Lê só as linhas agregadas (uma por período), nunca a tabela transaction
+    totals = await summaries.get_summary(session, account, period, start, end)
+    return TransactionSummary(period=period, items=[PeriodSummary(**vars(t)) for t in totals])
+
+@router.get("/balance", response_model=BalanceAtPublic)
+async def get_balance_at(
+    at: datetime | None = None,
+    account: Account = Depends(deps.get_current_account),
+    session: AsyncSession = Depends(get_session)):
+
+    # Transaction.data é gravado no horário de Recife, sem fuso
+    recife = timezone("America/Recife")
+    at = at or datetime.now(recife)
+    if at.tzinfo:
+        at = at.astimezone(recife).replace(tzinfo=None)
+
+    balance = await balance_history.balance_at(session, account, at)
+    return BalanceAtPublic(at=at, balance=balance)
+
+@router.get("/export")
+async def export_transactions(
+    export_format: ExportFormat = Query(default=ExportFormat.CSV, alias="format"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    account: Account = Depends(deps.get_current_account),
     session: AsyncSession = Depends(get_session)):
-    
-    query_account = select(Account).where(Account.user_id == current_user.id)
-    response_account = await session.exec(query_account)
-    account = response_account.first()
 
-    if not account:
-        raise HTTPException(status_code=404, detail="Conta não encontrada.")
-    
     query = select(Transaction)\
         .where(Transaction.account_id == account.id)\
-        .order_by(Transaction.data.desc())\
-        .offset(skip)\
-        .limit(limit)
-    
-    result = await session.exec(query)
-    transactions = result.all()
+        .order_by(Transaction.data, Transaction.id)\
+        .execution_options(yield_per=statement.CHUNK_ROWS)
+
+    if start:
+        query = query.where(Transaction.data >= start)
+    if end:
+        query = query.where(Transaction.data < end)
+
+    # stream() usa cursor do lado do servidor: as linhas vão sendo buscadas em
+    # lotes de yield_per enquanto a resposta é escrita, a memória fica constante.
+    result = await session.stream(query)
+    rows = result.scalars()
+
+    if export_format == ExportFormat.NDJSON:
+        body, media_type = statement.iter_ndjson(rows), "application/x-ndjson"
+    else:
+        body, media_type = statement.iter_csv(rows), "text/csv"
 
-    return transactions
\ No newline at end of file
+    filename = f"extrato-{account.number}.{export_format.value}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
\ No newline at end of file
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlmodel import  select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.core.db import get_session
+from app.core import conditional
+from app.core.db import get_session, remember_writer
 from app.models.user import User
 from app.models.account import Account
 from app.schemas.user import UserCreate, UserPublic
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from app.api import deps
 from app.schemas.account import AccountPublic
+from app.services import account_buckets
 
 router = APIRouter()
 
@@ -21,14 +23,17 @@ async def create_user(user_in: UserCreate, session: AsyncSession = Depends(get_s
         if existing_user:
             raise HTTPException(status_code=400, detail="Este email já está cadastrado.")
     
+        hashed_password = await get_password_hash_async(user_in.password)
         user_db = User.model_validate(
             user_in, 
-            update={"hashed_password": get_password_hash(user_in.password)}
+            update={"hashed_password": hashed_password}
         )
 
         session.add(user_db) 
         await session.commit()
         await session.refresh(user_db)
+        # O cadastro foi sem token; o login e o /me logo em seguida leem do primário
+        remember_writer(user_db.id)
 
         return user_db
     except Exception as e:
@@ -41,13 +46,21 @@ async def create_user(user_in: UserCreate, session: AsyncSession = Depends(get_s
         raise HTTPException(status_code=500, detail="Erro interno ao criar usuário.")
 
 @router.get("/me", response_model=UserPublic)
-async def read_account(current_user: User = Depends(deps.get_current_user)):
+async def read_account(current_user: User = Depends(deps.get_current_user_read)):
     return current_user
 
 @router.get("/account", response_model=AccountPublic)
-async def get_account(current_user: User = Depends(deps.get_current_user), session: AsyncSession = Depends(get_session)):
-    query = select(Account).where(current_user.id == Account.user_id)
-    result = await session.exec(query)
-    return result.first()
+async def get_account(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    account: Account = Depends(deps.get_current_account_read),
+    session: AsyncSession = Depends(deps.get_read_session)):
+    # A versão veio junto com a conta na autenticação: sem mudança, 304 sem mais nada
+    tag = conditional.etag(account.id, await account_buckets.total_version(session, account))
+    if conditional.matches(if_none_match, tag):
+        return conditional.not_modified(tag)
 
-    
\ No newline at end of file
+    # Contas quentes guardam parte do saldo em buckets; soma tudo
+    balance = await account_buckets.total_balance(session, account)
+    response.headers.update({"ETag": tag, **conditional.HEADERS})
+    return AccountPublic(id=account.id, number=account.number, balance=balance)
@@ -0,0 +1,36 @@
+import hashlib
+from typing import Any
+
+from fastapi import Response
+
+# Resposta por usuário: cache compartilhado não guarda, o navegador guarda mas sempre
+# revalida com If-None-Match (e recebe 304 se nada mudou)
+HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def etag(account_id: int, version: int, *parts: Any) -> str:
+    """
+    ETag forte de uma leitura da conta: muda quando a versão da conta muda (toda
+    escrita do ledger sobe a versão) ou quando mudam os parâmetros que alteram o
+    corpo (`parts`). O id da conta entra para que o ETag de um usuário nunca valha
+    para outro no mesmo navegador.
+    """
+    tag = f"{account_id}-{version}"
+    if parts:
+        tag += "-" + hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+    return f'"{tag}"'
+
+
+def matches(if_none_match: str | None, tag: str) -> bool:
+    """
+    If-None-Match usa comparação fraca (RFC 9110): W/"x" também bate com "x".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def not_modified(tag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": tag, **HEADERS})
@@ -1,49 +1,242 @@
+import asyncio
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.cache import TTLCache
 from app.core.config import settings
 from typing import AsyncGenerator
 import os
+import time
 
-# --- BLOCO DE DEBUG (Adicione isso antes do engine) ---
-print("--- INÍCIO DEBUG WALLET ---")
-wallet_dir = settings.ORACLE_WALLET_DIR
-print(f"📂 Diretório configurado: {wallet_dir}")
-
-if os.path.exists(wallet_dir):
-    print("✅ A pasta existe!")
-    arquivos = os.listdir(wallet_dir)
-    print(f"📄 Arquivos encontrados: {arquivos}")
-    
-    if "cwallet.sso" in arquivos:
-        print("🎉 cwallet.sso (o certificado) está aqui!")
-    else:
-        print("😱 ERRO CRÍTICO: cwallet.sso NÃO está na pasta!")
-else:
-    print(f"❌ A pasta NÃO existe. Caminho atual: {os.getcwd()}")
-print("--- FIM DEBUG WALLET ---")
-# -----------------------------------------------------
 
-# echo=True faz o log de todo SQL gerado no terminal (ótimo para estudar SQL para o TCU)
-# Quando formos para produção, mudaremos para False.
+class _TimedQueue(AsyncAdaptedQueue):
+    """
+    Fila das conexões livres do TimedQueuePool. Só o get bloqueante espera de verdade
+    (pool cheio, aguardando outra requisição devolver uma conexão); o não bloqueante
+    volta na hora, com conexão ou vazio.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.get_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def get(self, block=True, timeout=None):
+        started = time.perf_counter()
+        try:
+            item = super().get(block, timeout)
+        finally:
+            if block:
+                waited = time.perf_counter() - started
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+        self.get_count += 1
+        return item
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool padrão do SQLAlchemy que também mede, em separado, quanto cada checkout
+    esperou por uma conexão devolvida ao pool (serve para dimensionar DB_POOL_SIZE
+    de acordo com os workers) e quanto tempo levou abrir conexões novas com o banco
+    (handshake mTLS, inclusive as refeitas por pool_recycle ou depois de uma queda).
+    """
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kwargs):
+        self.created_count = 0
+        self.connect_count = 0
+        self.connect_total = 0.0
+        self.connect_max = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _create_connection(self):
+        # Checkout que não passou pela fila: havia vaga e o pool abriu uma conexão
+        record = super()._create_connection()
+        self.created_count += 1
+        return record
+
+    def _should_wrap_creator(self, creator):
+        # Todo connect do pool chama o creator embrulhado aqui
+        invoke = super()._should_wrap_creator(creator)
+
+        def timed_invoke(connection_record):
+            started = time.perf_counter()
+            try:
+                return invoke(connection_record)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.connect_count += 1
+                self.connect_total += elapsed
+                self.connect_max = max(self.connect_max, elapsed)
+
+        return timed_invoke
+
+    @property
+    def checkout_count(self) -> int:
+        return self._pool.get_count + self.created_count
+
+    @property
+    def wait_total(self) -> float:
+        return self._pool.wait_total
+
+    @property
+    def wait_max(self) -> float:
+        return self._pool.wait_max
+
+
+ORACLE_CONNECT_ARGS = {
+    "config_dir": settings.ORACLE_WALLET_DIR, # Aponta para a pasta da wallet
+    "wallet_location": settings.ORACLE_WALLET_DIR, # Reforça o local
+    "wallet_password": settings.ORACLE_WALLET_PASSWORD,
+    "ssl_server_dn_match": True, # Importante para mTLS
+    "stmtcachesize": settings.DB_STATEMENT_CACHE_SIZE,
+}
+
 engine = create_async_engine(
     settings.DATABASE_URL, 
-    echo=True, 
+    echo=settings.DB_ECHO, 
+    future=True,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=ORACLE_CONNECT_ARGS)
+
+# Réplica só de leitura, opcional, com pool próprio: listagens e consultas de saldo
+# não disputam conexão com as rotas que movimentam dinheiro
+read_engine = create_async_engine(
+    settings.DB_READ_URL,
+    echo=settings.DB_ECHO,
     future=True,
-    connect_args={
-        "config_dir": settings.ORACLE_WALLET_DIR, # Aponta para a pasta da wallet
-        "wallet_location": settings.ORACLE_WALLET_DIR, # Reforça o local
-        "wallet_password": settings.ORACLE_WALLET_PASSWORD,
-        "ssl_server_dn_match": True # Importante para mTLS
-    })
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_READ_POOL_SIZE,
+    max_overflow=settings.DB_READ_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=ORACLE_CONNECT_ARGS if settings.DB_READ_URL.startswith("oracle") else {},
+) if settings.DB_READ_URL else None
+
+# Uma única fábrica de sessões para a aplicação inteira
+async_session = sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
+)
+async_read_session = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+) if read_engine else None
+
+# Usuário da requisição em andamento (deps preenche ao validar o token)
+request_user_id: ContextVar[int | None] = ContextVar("request_user_id", default=None)
+# Quem gravou há pouco lê do primário: a réplica pode ainda não ter a escrita
+recent_writers = TTLCache(max_size=settings.AUTH_CACHE_SIZE, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def remember_writer(user_id: int) -> None:
+    recent_writers.set(user_id, True)
+
+
+def wrote_recently(user_id: int) -> bool:
+    return recent_writers.get(user_id) is not None
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_request_writer(session: Session) -> None:
+    user_id = request_user_id.get()
+    if user_id is not None:
+        remember_writer(user_id)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Função geradora (Dependency Injection) para usar nas rotas do FastAPI.
     Abre uma sessão, entrega para o uso e fecha automaticamente depois.
     """
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_replica_session() -> AsyncGenerator[AsyncSession | None, None]:
+    """
+    Sessão na réplica de leitura, ou None se DB_READ_URL não estiver configurada.
+    As rotas usam deps.get_read_session, que decide entre réplica e primário.
+    """
+    if async_read_session is None:
+        yield None
+        return
+
+    async with async_read_session() as session:
+        yield session
+
+def pool_stats(pool_engine=engine) -> dict:
+    """
+    Retrato do pool neste instante: conexões em uso, livres, overflow, espera no checkout
+    e tempo abrindo conexões.
+    """
+    pool = pool_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # O SQLAlchemy conta o overflow negativo enquanto o pool não enche
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, TimedQueuePool):
+        checkouts = pool.checkout_count
+        stats.update({
+            "checkouts": checkouts,
+            # Espera por uma conexão devolvida ao pool (abrir conexão nova não conta)
+            "wait_seconds_total": round(pool.wait_total, 6),
+            "wait_seconds_max": round(pool.wait_max, 6),
+            "wait_seconds_avg": round(pool.wait_total / checkouts, 6) if checkouts else 0.0,
+            "connects": pool.connect_count,
+            "connect_seconds_total": round(pool.connect_total, 6),
+            "connect_seconds_max": round(pool.connect_max, 6),
+            "connect_seconds_avg": round(pool.connect_total / pool.connect_count, 6) if pool.connect_count else 0.0,
+        })
+    return stats
+
+async def warm_up_pool(pool_engine, connections: int) -> int:
+    """
+    Abre `connections` conexões em paralelo e devolve todas ao pool, para a primeira
+    requisição não pagar o handshake mTLS com o banco. Conexões que falharem são só
+    contadas (o erro aparece de novo no primeiro uso). Devolve quantas abriram.
+    """
+    connections = min(connections, pool_engine.pool.size())
+    if connections <= 0:
+        return 0
+
+    results = await asyncio.gather(
+        *(pool_engine.connect().start() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.close()
+
+    errors = [error for error in results if isinstance(error, BaseException)]
+    if errors:
+        print(f"❌ {len(errors)} de {connections} conexões do aquecimento falharam: {errors[0]}")
+    return len(opened)
+
+def check_wallet() -> None:
+    """
+    Confere se a wallet do Oracle está no lugar. Antes rodava no import do módulo;
+    agora é chamada uma vez no startup (lifespan).
+    """
+    wallet_dir = settings.ORACLE_WALLET_DIR
+    print(f"📂 Diretório da wallet: {wallet_dir}")
+
+    if not os.path.exists(wallet_dir):
+        print(f"❌ A pasta NÃO existe. Caminho atual: {os.getcwd()}")
+    elif not os.path.exists(os.path.join(wallet_dir, "cwallet.sso")):
+        print("😱 ERRO CRÍTICO: cwallet.sso NÃO está na pasta!")
+    else:
+        print("🎉 cwallet.sso (o certificado) está aqui!")
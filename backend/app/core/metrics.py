@@ -0,0 +1,207 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label_values -> [contagem por bucket..., soma, total]
+        self.values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        data = self.values.setdefault(label_values, [0.0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[i] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, data in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, data):
+                labels = _labels(self.labels + ("le",), label_values + (_format(bound),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {data[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {data[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {data[-1]}")
+        return lines
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Latência das requisições por rota.", ("method", "route"), LATENCY_BUCKETS
+)
+request_count = Counter(
+    "http_requests_total", "Requisições por rota e status.", ("method", "route", "status")
+)
+request_queries = Histogram(
+    "http_request_db_queries", "Queries ao banco por requisição.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_queries = Counter("db_queries_total", "Queries executadas no banco.", ("route",))
+db_time = Counter("db_query_duration_seconds_total", "Tempo gasto em queries no banco.", ("route",))
+slow_queries = Counter("db_slow_queries_total", "Queries acima de SLOW_QUERY_MS.", ("route",))
+reconciliation_transactions = Counter(
+    "reconciliation_transactions_total", "Lançamentos conferidos pela conciliação de saldos.", ()
+)
+pubsub_published = Counter("pubsub_published_total", "Mensagens publicadas no pub/sub.", ())
+pubsub_dropped = Counter(
+    "pubsub_dropped_subscribers_total", "Assinantes derrubados por não acompanharem as mensagens.", ()
+)
+
+REGISTRY = (request_latency, request_count, request_queries, db_queries, db_time, slow_queries,
+            reconciliation_transactions, pubsub_published, pubsub_dropped)
+
+
+@dataclass
+class RequestStats:
+    route: str
+    queries: int = 0
+    db_seconds: float = 0.0
+    slow_queries: int = 0
+
+
+# Estatísticas da requisição em andamento (cada task do asyncio tem a sua)
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Levantada quando QUERY_BUDGET_PER_REQUEST está ligado e uma rota passa do limite.
+    """
+
+
+def redact_parameters(parameters) -> object:
+    """
+    Troca os valores dos parâmetros pelo tipo deles: o log mostra a forma da query
+    sem vazar dados de clientes (emails, valores, hashes...).
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact_parameters(parameters[0]), f"... {len(parameters)} linhas"]
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Pendura os eventos de cursor no engine para contar queries e tempo de banco
+    por requisição, e registrar as queries lentas.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+        # Quantos inícios este execute empilhou ainda sem fim (para o handle_error)
+        if context is not None:
+            context._metrics_pending = getattr(context, "_metrics_pending", 0) + 1
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if context is not None:
+            context._metrics_pending -= 1
+        slow = elapsed * 1000 >= settings.SLOW_QUERY_MS
+
+        # Dentro de uma requisição só acumulamos; o middleware publica com a rota certa no fim
+        stats = current_request.get()
+        if stats:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            stats.slow_queries += slow
+            route = stats.route
+        else:
+            route = "<background>"
+            db_queries.inc(route)
+            db_time.inc(route, amount=elapsed)
+            slow_queries.inc(route, amount=slow)
+
+        if slow:
+            logger.warning(
+                "Query lenta (%.1fms) em %s: %s | parâmetros: %s",
+                elapsed * 1000, route, statement, redact_parameters(parameters),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # Query que falhou não passa pelo after_cursor_execute: tira o início dela da
+        # pilha. Nunca levanta nada aqui, senão o erro do banco se perde.
+        execution = context.execution_context
+        pending = getattr(execution, "_metrics_pending", 0)
+        if pending and context.connection is not None:
+            started = context.connection.info.get("query_started", [])
+            del started[max(len(started) - pending, 0):]
+            execution._metrics_pending = 0
+
+
+def record_request(method: str, status_code: int, elapsed: float, stats: RequestStats) -> None:
+    request_latency.observe(elapsed, method, stats.route)
+    request_count.inc(method, stats.route, str(status_code))
+    request_queries.observe(stats.queries, method, stats.route)
+    db_queries.inc(stats.route, amount=stats.queries)
+    db_time.inc(stats.route, amount=stats.db_seconds)
+    slow_queries.inc(stats.route, amount=stats.slow_queries)
+
+
+def render(extra_gauges: dict[str, float] | None = None) -> str:
+    """
+    Tudo no formato texto do Prometheus. `extra_gauges` entra como gauges soltos
+    (ex.: estatísticas do pool).
+    """
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, value in (extra_gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
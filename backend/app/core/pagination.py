@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(data: datetime, id: int) -> str:
+    """
+    Gera o cursor opaco (base64) a partir da chave (data, id) da última linha da página.
+    """
+    raw = json.dumps({"d": data.isoformat(), "i": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Desfaz o encode_cursor. Levanta ValueError se o cursor for inválido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Cursor inválido") from e
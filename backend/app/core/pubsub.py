@@ -0,0 +1,178 @@
+import asyncio
+from typing import Callable
+
+from app.core import metrics
+
+# (canal, mensagem) -> entrega aos assinantes deste processo
+Deliver = Callable[[str, bytes], None]
+
+
+class Subscription:
+    """
+    Assinatura de um canal com fila limitada a `max_queued` mensagens. Quem publica
+    nunca espera pelo consumidor: se ele não acompanhar e a fila encher, a assinatura
+    é encerrada como `dropped` (o cliente reconecta e recupera o que perdeu).
+    """
+
+    def __init__(self, broker: "Broker", channel: str, max_queued: int):
+        self.broker = broker
+        self.channel = channel
+        self.closed = False
+        self.dropped = False
+        self._queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=max_queued)
+
+    def offer(self, message: bytes) -> bool:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def get(self) -> bytes | None:
+        """
+        Próxima mensagem, ou None depois que a assinatura foi encerrada.
+        """
+        if self.closed:
+            return None
+        return await self._queue.get()
+
+    def close(self, dropped: bool = False) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.dropped = dropped
+        self.broker._remove(self)
+
+        # O que sobrou na fila já não vai ser lido; o None acorda quem está em get()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class LocalBackend:
+    """
+    Só este processo: publicar entrega direto aos assinantes locais. Com vários
+    workers, cada um só vê o que ele mesmo publicou.
+    """
+
+    def bind(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        self._deliver(channel, message)
+
+
+class RedisBackend:
+    """
+    Fan-out entre workers pelo PUBLISH/PSUBSCRIBE do Redis: cada processo publica no
+    Redis e um listener entrega aos assinantes locais tudo o que chega (inclusive o
+    que ele mesmo publicou). Precisa do pacote `redis`, que não é dependência da API.
+    """
+
+    def __init__(self, url: str, prefix: str = "vertex:"):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+        self._listener: asyncio.Task | None = None
+
+    def bind(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("LIVE_UPDATES_REDIS_URL configurado, mas o pacote `redis` não está instalado")
+
+        self._client = redis.from_url(self.url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._client:
+            await self._client.aclose()
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._client.publish(self.prefix + channel, message)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.prefix + "*")
+                    async for item in pubsub.listen():
+                        if item["type"] == "pmessage":
+                            self._deliver(item["channel"].decode()[len(self.prefix):], item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Perdeu o Redis: tenta de novo (o que foi publicado nesse meio tempo se
+                # perde, o cliente recupera pelo Last-Event-ID ao reconectar)
+                print(f"❌ Erro no listener do Redis (pub/sub): {e}")
+                await asyncio.sleep(1)
+
+
+class Broker:
+    """
+    Pub/sub em memória por canal. Quem publica fala com o backend (local ou Redis);
+    o backend entrega em cada processo aos assinantes daquele canal.
+    """
+
+    def __init__(self, backend: LocalBackend | RedisBackend, max_queued: int):
+        self.backend = backend
+        self.max_queued = max_queued
+        self._channels: dict[str, set[Subscription]] = {}
+        backend.bind(self._deliver)
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        for subscriptions in list(self._channels.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+        await self.backend.stop()
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.max_queued)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def subscribers(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        metrics.pubsub_published.inc()
+        await self.backend.publish(channel, message)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pubsub_channels": len(self._channels),
+            "pubsub_subscribers": sum(len(subscriptions) for subscriptions in self._channels.values()),
+        }
+
+    def _deliver(self, channel: str, message: bytes) -> None:
+        for subscription in list(self._channels.get(channel, ())):
+            if not subscription.offer(message):
+                # Consumidor lento: derruba em vez de acumular mensagens para ele
+                subscription.close(dropped=True)
+                metrics.pubsub_dropped.inc()
+
+    def _remove(self, subscription: Subscription) -> None:
+        subscriptions = self._channels.get(subscription.channel)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._channels[subscription.channel]
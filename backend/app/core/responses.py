@@ -0,0 +1,27 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # Dinheiro sai como string, exatamente como o banco devolveu ("10.50"), igual ao Pydantic
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada com orjson (datetime, Enum e dataclass nativos, Decimal
+    como string). Para rotas de leitura que já montam dicts simples: devolver esta
+    resposta direto pula a validação do response_model e o encoder padrão.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
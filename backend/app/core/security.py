@@ -1,15 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2.exceptions import InvalidHashError, VerificationError
 from datetime import datetime, timedelta
+from fastapi import HTTPException, status
 from pytz import timezone
 from app.core.config import settings
-from typing import Any
+from typing import Any, Callable, TypeVar
 import jwt
 
 
 ALGORITHM = "HS256"
+# Claim 'scope' dos tokens que só abrem o stream SSE (tokens de login não têm scope)
+STREAM_SCOPE = "stream"
 
-ph = PasswordHasher()
+T = TypeVar("T")
+
+ph = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# O argon2-cffi solta o GIL enquanto calcula, então threads dão paralelismo de verdade
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2"
+)
+_hash_pending = 0
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -19,7 +36,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         ph.verify(hashed_password, plain_password)
         return True
-    except VerifyMismatchError:
+    except (VerificationError, InvalidHashError):
         return False
 
 def get_password_hash(password: str) -> str:
@@ -28,6 +45,38 @@ def get_password_hash(password: str) -> str:
     """
     return ph.hash(password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True se o hash foi gerado com parâmetros diferentes dos atuais do Settings.
+    """
+    return ph.check_needs_rehash(hashed_password)
+
+async def _run_in_hash_pool(func: Callable[..., T], *args: Any) -> T:
+    """
+    Roda `func` no pool do Argon2 sem travar o event loop. Se a fila já estiver
+    cheia, responde 503 em vez de acumular trabalho (rajada de logins).
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
 def create_access_token(subject: str | Any, expires_delta:timedelta | None = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone("America/Recife")) + expires_delta
@@ -36,4 +85,16 @@ def create_access_token(subject: str | Any, expires_delta:timedelta | None = Non
 
     to_encode = ({"exp": expire, "sub": str(subject)})
     encode_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encode_jwt
\ No newline at end of file
+    return encode_jwt
+
+def create_stream_token(subject: str | Any, session_expires_at: float | None = None) -> str:
+    """
+    Token curto que só serve para abrir /transactions/stream. Vale
+    STREAM_TOKEN_EXPIRE_SECONDS para conectar; a conexão aberta dura até
+    `session_expires_at` (epoch), o vencimento do token de login que o gerou.
+    """
+    expire = datetime.now(timezone("America/Recife")) + timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS)
+    to_encode = {"exp": expire, "sub": str(subject), "scope": STREAM_SCOPE}
+    if session_expires_at is not None:
+        to_encode["session_exp"] = int(session_expires_at)
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
@@ -0,0 +1,57 @@
+import time
+
+# Importado antes de tudo em app/main.py: o relógio começa junto com o carregamento da
+# aplicação (FastAPI, SQLAlchemy, oracledb...), que é boa parte do cold start
+BOOT_STARTED = time.perf_counter()
+
+
+class StartupTimer:
+    """
+    Tempos do boot, em segundos desde BOOT_STARTED: cada etapa do lifespan, o momento
+    em que a API ficou pronta e o momento em que a primeira resposta saiu.
+    """
+
+    def __init__(self, started: float):
+        self.started = started
+        self.phases: dict[str, float] = {}
+        self.first_response: float | None = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark(self, phase: str) -> float:
+        self.phases[phase] = self.elapsed()
+        return self.phases[phase]
+
+    def gauges(self) -> dict[str, float]:
+        gauges = {f"startup_{phase}_seconds": round(value, 6) for phase, value in self.phases.items()}
+        if self.first_response is not None:
+            gauges["startup_first_response_seconds"] = round(self.first_response, 6)
+        return gauges
+
+
+timer = StartupTimer(BOOT_STARTED)
+
+
+class FirstResponseMiddleware:
+    """
+    Middleware ASGI puro que anota quando a primeira resposta HTTP terminou de sair.
+    Depois disso só repassa a chamada, sem custo por requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if timer.first_response is not None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_time(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body") \
+                    and timer.first_response is None:
+                timer.first_response = timer.elapsed()
+                print(f"⏱️ Primeira resposta em {timer.first_response:.2f}s desde o boot")
+
+        await self.app(scope, receive, send_and_time)
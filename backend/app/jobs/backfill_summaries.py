@@ -0,0 +1,34 @@
+"""
+Preenche account_summary (totais por dia e por mês) a partir da tabela transaction.
+Rode uma vez depois da migração que cria a tabela, e de novo sempre que os totais
+precisarem ser refeitos (carga direta no banco, correção manual de lançamentos):
+
+    python -m app.jobs.backfill_summaries --chunk 500
+
+Cada bloco de contas é recalculado na própria transação, com as contas travadas,
+então o job pode rodar com a API no ar.
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.db import async_session, check_wallet, engine
+from app.services import summaries
+
+
+async def main(chunk_size: int) -> None:
+    check_wallet()
+    started = time.perf_counter()
+    accounts, transactions = await summaries.backfill(async_session, chunk_size)
+    await engine.dispose()
+    print(
+        f"✅ Totais refeitos: {accounts} conta(s), {transactions} lançamento(s) "
+        f"em {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk", type=int, default=500, help="contas por transação")
+    args = parser.parse_args()
+    asyncio.run(main(args.chunk))
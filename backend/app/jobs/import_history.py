@@ -0,0 +1,72 @@
+"""
+Carga do histórico de contas migradas de sistemas legados para a tabela
+transaction. O arquivo é um CSV com cabeçalho (ou NDJSON, .ndjson/.jsonl) com os
+campos account_number, transaction_type (deposit/withdraw/transfer), amount
+(positivo), data (ISO 8601; sem fuso = horário de Recife) e description:
+
+    python -m app.jobs.import_history historico.csv --name legado-2026-10 --chunk 5000
+
+O arquivo é lido em streaming e gravado em blocos com executemany, um commit por
+bloco. O checkpoint (tabela import_checkpoint, chave --name) anda no mesmo commit:
+se a carga cair, rodar o mesmo comando continua da linha seguinte ao último bloco
+gravado. No fim, o saldo, o balance_after e os totais por dia/mês das contas
+tocadas são recalculados a partir de todos os lançamentos delas, então o
+histórico precisa trazer o saldo de abertura (um depósito inicial, por exemplo).
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core.db import async_session, check_wallet, engine
+from app.jobs.import_users import write_errors
+from app.services import history_import, user_import
+
+
+async def main(path: str, name: str, chunk_size: int, errors_path: str | None) -> None:
+    check_wallet()
+    started = time.perf_counter()
+
+    def progress(report: history_import.HistoryReport) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"  linha {report.read}: {report.loaded} lançamento(s), {len(report.errors)} erro(s), "
+              f"{report.loaded / elapsed:.0f} linhas/s", flush=True)
+
+    report = await history_import.load(
+        async_session, name, user_import.read_rows(path), chunk_size, on_chunk=progress
+    )
+    loaded_in = time.perf_counter() - started
+    if report.skipped:
+        print(f"Retomado do checkpoint '{name}': {report.skipped} linha(s) já gravada(s) puladas")
+    print(
+        f"{report.loaded} lançamento(s) gravado(s) em {loaded_in:.1f}s "
+        f"({report.loaded / max(loaded_in, 1e-9):.0f} linhas/s), {len(report.errors)} erro(s)"
+    )
+
+    recompute_started = time.perf_counter()
+    negative = await history_import.finalize(async_session, report.account_ids)
+    await engine.dispose()
+    print(f"✅ Saldos de {len(report.account_ids)} conta(s) recalculados em "
+          f"{time.perf_counter() - recompute_started:.1f}s")
+
+    if negative:
+        print(f"⚠️  {len(negative)} conta(s) com saldo negativo depois da carga: {', '.join(negative[:20])}")
+    if report.errors:
+        if errors_path:
+            write_errors(errors_path, report.errors)
+            print(f"Erros por linha em {errors_path}")
+        else:
+            for error in report.errors[:20]:
+                print(f"  linha {error.line}: {error.reason}")
+            if len(report.errors) > 20:
+                print(f"  ... e mais {len(report.errors) - 20}; use --errors para a lista completa")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="arquivo .csv ou .ndjson/.jsonl")
+    parser.add_argument("--name", default=None, help="nome do checkpoint (padrão: nome do arquivo)")
+    parser.add_argument("--chunk", type=int, default=5000, help="linhas por executemany/commit")
+    parser.add_argument("--errors", default=None, help="CSV de saída com os erros por linha")
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.name or os.path.basename(args.path), args.chunk, args.errors))
@@ -0,0 +1,71 @@
+"""
+Cadastro em massa de usuários (migração de clientes de outro banco). Lê um CSV com
+cabeçalho ou um NDJSON (.ndjson/.jsonl, um objeto por linha) com os campos email,
+full_name, password e, opcionalmente, account_number:
+
+    python -m app.jobs.import_users clientes.csv --workers 16 --batch 1000 --errors erros.csv
+
+O arquivo é lido em streaming. Os emails de cada lote são conferidos no banco com
+consultas IN, as senhas viram Argon2 num pool de processos (por padrão um por
+núcleo) e os usuários entram com insert em lote, um commit por lote. A conta de cada
+um é criada pela trigger do banco, como no cadastro pela API; account_number só troca
+o número dela. Linhas com problema não param a carga: saem em --errors (linha,
+email, motivo).
+"""
+import argparse
+import asyncio
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.db import async_session, check_wallet, engine
+from app.services import user_import
+
+
+def write_errors(path: str, errors: list[user_import.RowError]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["line", "email", "reason"])
+        for error in errors:
+            writer.writerow([error.line, error.email or "", error.reason])
+
+
+async def main(path: str, workers: int, batch_size: int, errors_path: str | None) -> None:
+    check_wallet()
+    started = time.perf_counter()
+
+    def progress(report: user_import.ImportReport) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"  {report.created} criado(s), {len(report.errors)} erro(s), "
+              f"{report.created / elapsed:.0f} usuários/s", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        report = await user_import.import_users(
+            async_session, user_import.read_rows(path), pool, workers, batch_size, on_batch=progress
+        )
+    await engine.dispose()
+
+    print(
+        f"✅ {report.read} linha(s) lida(s): {report.created} usuário(s) criado(s), "
+        f"{len(report.errors)} erro(s) em {time.perf_counter() - started:.1f}s"
+    )
+    if report.errors:
+        if errors_path:
+            write_errors(errors_path, report.errors)
+            print(f"Erros por linha em {errors_path}")
+        else:
+            for error in report.errors[:20]:
+                print(f"  linha {error.line} ({error.email or '-'}): {error.reason}")
+            if len(report.errors) > 20:
+                print(f"  ... e mais {len(report.errors) - 20}; use --errors para a lista completa")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="arquivo .csv ou .ndjson/.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos calculando o Argon2")
+    parser.add_argument("--batch", type=int, default=1000, help="usuários por insert/commit")
+    parser.add_argument("--errors", default=None, help="CSV de saída com os erros por linha")
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.workers, args.batch, args.errors))
@@ -1,31 +1,66 @@
-from fastapi import FastAPI
+# Primeiro import de propósito: marca o início do boot para medir o cold start
+from app.core.startup import FirstResponseMiddleware, timer
+import asyncio
+import time
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
-from sqlmodel import text
-from app.core.db import engine
+from app.core import metrics
+from app.core.db import async_session, check_wallet, engine, pool_stats, read_engine, warm_up_pool
 from app.core.config import settings         
+from app.api.deps import get_metrics_access
 from app.api.v1.api import api_router
-from sqlmodel import select
+from app.services import account_buckets, idempotency, live_updates, reconciliation, write_pipeline
 
 # Lifespan events: Código que roda quando a API liga e desliga
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    timer.mark("imports")
+    check_wallet()
     print("Tentando conectar ao Oracle Database 26ai...")
-    try:
-        from sqlalchemy.orm import sessionmaker
-        from sqlmodel.ext.asyncio.session import AsyncSession
-        
-        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-        
-        async with async_session() as session:
-            # Teste Async:
-            statement = text("SELECT 'Conexão Async Sucesso!' FROM dual")
-            result = await session.exec(statement)
-            val = result.first()
-            print(f"✅ Status do Banco: {val}")
-    except Exception as e:
-        print(f"❌ Erro ao conectar no banco: {e}")
+
+    # Abre as conexões do pool em paralelo antes de aceitar requisições: o handshake
+    # mTLS sai do caminho da primeira requisição e também serve de teste de conexão
+    warmups = [warm_up_pool(engine, settings.DB_POOL_WARMUP)]
+    if read_engine:
+        warmups.append(warm_up_pool(read_engine, settings.DB_POOL_WARMUP))
+    opened = await asyncio.gather(*warmups)
+    warmup_done = timer.mark("pool_warmup")
+    print(f"✅ Status do Banco: {' + '.join(map(str, opened))} conexão(ões) abertas até {warmup_done:.2f}s")
+
+    # Pub/sub dos eventos em tempo real (conecta no Redis, se configurado)
+    await live_updates.broker.start()
+    # Limpa periodicamente as chaves de idempotência vencidas do cache em memória e da tabela
+    idempotency.cache.start_reaper(settings.IDEMPOTENCY_CACHE_REAP_SECONDS)
+    idempotency_purge = asyncio.create_task(
+        idempotency.purge_loop(async_session, settings.IDEMPOTENCY_PURGE_SECONDS)
+    )
+    # Devolve periodicamente o saldo dos buckets das contas quentes para a linha principal
+    consolidation = asyncio.create_task(
+        account_buckets.consolidation_loop(async_session, settings.ACCOUNT_BUCKET_CONSOLIDATE_SECONDS)
+    )
+    # Confere periodicamente se os saldos batem com a soma dos lançamentos
+    reconciler = None
+    if settings.RECONCILE_INTERVAL_SECONDS:
+        reconciler = asyncio.create_task(reconciliation.reconciliation_loop(
+            async_session,
+            settings.RECONCILE_INTERVAL_SECONDS,
+            settings.RECONCILE_CHUNK_ACCOUNTS,
+            settings.RECONCILE_CONCURRENCY,
+            settings.RECONCILE_LOOKBACK_IDS,
+        ))
+    print(f"🚀 API pronta em {timer.mark('ready'):.2f}s desde o boot")
     yield
+    consolidation.cancel()
+    if reconciler:
+        reconciler.cancel()
+    idempotency_purge.cancel()
+    await idempotency.cache.stop_reaper()
+    # Grava o que ainda estiver na fila do group commit antes de desligar
+    await write_pipeline.shutdown()
+    # Encerra os streams SSE abertos
+    await live_updates.broker.stop()
     print("Desligando API...")
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -46,8 +81,58 @@ app.add_middleware(
     allow_headers=["*"], # Permite enviar Tokens e Cookies
 )
 
+# Anota quando a primeira resposta sai (tempo de cold start visto pelo cliente)
+app.add_middleware(FirstResponseMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    if read_engine:
+        metrics.instrument_engine(read_engine)
+
+    @app.middleware("http")
+    async def collect_metrics(request: Request, call_next):
+        """
+        Mede latência, status e queries ao banco de cada requisição (por rota, não por URL).
+        """
+        # Até o roteador resolver a rota, o log de query lenta mostra a URL
+        stats = metrics.RequestStats(route=request.url.path)
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.current_request.reset(token)
+
+            # Rótulo pelo template da rota ("/api/v1/users/{id}"), nunca pela URL crua
+            route = request.scope.get("route")
+            stats.route = getattr(route, "path", "<unmatched>")
+            metrics.record_request(request.method, status_code, elapsed, stats)
+
+        # Modo de teste contra N+1: estoura se a rota passar do orçamento de queries
+        budget = settings.QUERY_BUDGET_PER_REQUEST
+        if budget is not None and stats.queries > budget:
+            raise metrics.QueryBudgetExceeded(
+                f"{request.method} {stats.route} fez {stats.queries} queries (limite {budget})"
+            )
+
+        response.headers["Server-Timing"] = f"db;dur={stats.db_seconds * 1000:.1f}, app;dur={elapsed * 1000:.1f}"
+        return response
+
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_metrics_access)])
+    def read_metrics():
+        gauges = {f"db_pool_{name}": value for name, value in pool_stats().items()}
+        if read_engine:
+            gauges.update({f"db_read_pool_{name}": value for name, value in pool_stats(read_engine).items()})
+        gauges.update(timer.gauges())
+        gauges.update(reconciliation.last_run)
+        gauges.update(live_updates.broker.stats())
+        return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Sistema Bancário Operacional", "db_version": "Oracle 26ai"}
\ No newline at end of file
@@ -14,6 +14,14 @@ class Account(SQLModel, table=True):
     number: str | None = Field(unique=True, index=True, max_length=20)
     balance: Decimal = Field(default=0, max_digits=15, decimal_places=2)
     user_id: int = Field(foreign_key="user.id")
+    # 0 = saldo numa linha só. N > 0 = créditos espalhados em N linhas de account_bucket
+    bucket_count: int = Field(default=0)
+    # Sobe a cada escrita do ledger na linha (saldo e lançamentos). Com buckets, a
+    # versão da conta é esta mais a soma das versões dos buckets (ETag de leitura)
+    version: int = Field(default=0)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
-    transactions: list[Transaction] = Relationship(back_populates="account" ,sa_relationship_kwargs={"cascade": "all, delete"})
+    transactions: list[Transaction] = Relationship(
+        back_populates="account",
+        sa_relationship_kwargs={"cascade": "all, delete", "foreign_keys": "[Transaction.account_id]"},
+    )
     user: "User" = Relationship(back_populates="account")
\ No newline at end of file
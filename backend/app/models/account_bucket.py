@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from decimal import Decimal
+
+class AccountBucket(SQLModel, table=True):
+    """
+    Pedaço do saldo de uma conta "quente" (Account.bucket_count > 0). O saldo real
+    da conta é Account.balance + a soma dos buckets dela.
+    """
+    __tablename__ = "account_bucket"
+
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    bucket: int = Field(primary_key=True)
+    balance: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    version: int = Field(default=0)
@@ -0,0 +1,25 @@
+from enum import Enum
+from sqlmodel import SQLModel, Field
+from datetime import date
+from decimal import Decimal
+
+class SummaryPeriod(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+
+class AccountSummary(SQLModel, table=True):
+    """
+    Totais de uma conta num dia ou num mês, atualizados na mesma transação de cada
+    lançamento (app/services/summaries.py). Contas com buckets espalham os totais em
+    até bucket_count linhas (`shard`) pelo mesmo motivo dos buckets de saldo.
+    """
+    __tablename__ = "account_summary"
+
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    period: SummaryPeriod = Field(primary_key=True)
+    # Dia do lançamento ou primeiro dia do mês, no fuso de Transaction.data
+    period_start: date = Field(primary_key=True)
+    shard: int = Field(default=0, primary_key=True)
+    total_in: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    total_out: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    transaction_count: int = Field(default=0)
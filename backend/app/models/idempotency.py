@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Text, UniqueConstraint
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from pytz import timezone
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_id_key"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    key: str = Field(max_length=255)
+    user_id: int = Field(foreign_key="user.id")
+    endpoint: str = Field(max_length=255)
+    # sha256 do corpo da requisição, para recusar a mesma chave com outro conteúdo
+    request_hash: str = Field(max_length=64)
+    status_code: int
+    response_body: str = Field(sa_column=Column(Text, nullable=False))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
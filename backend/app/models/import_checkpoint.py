@@ -0,0 +1,17 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from pytz import timezone
+
+class ImportCheckpoint(SQLModel, table=True):
+    """
+    Até onde uma carga de histórico (app/jobs/import_history.py) já foi gravada.
+    Atualizado na mesma transação de cada bloco de lançamentos, então retomar
+    a partir de `last_line` nunca duplica nem perde linhas.
+    """
+    __tablename__ = "import_checkpoint"
+
+    name: str = Field(primary_key=True, max_length=255)
+    # Última linha do arquivo cujo bloco já foi commitado
+    last_line: int = Field(default=0)
+    row_count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
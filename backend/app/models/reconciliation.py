@@ -0,0 +1,39 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from decimal import Decimal
+from pytz import timezone
+
+class ReconciliationRun(SQLModel, table=True):
+    """
+    Uma execução da conciliação de saldos. `last_transaction_id` é o checkpoint:
+    a próxima execução incremental só olha as contas com lançamentos depois dele.
+    """
+    __tablename__ = "reconciliation_run"
+
+    id: int | None = Field(default=None, primary_key=True)
+    # True = recalcula tudo desde o primeiro lançamento; False = só o que é novo
+    full: bool = Field(default=False)
+    last_transaction_id: int = Field(default=0)
+    transactions_checked: int = Field(default=0)
+    accounts_checked: int = Field(default=0)
+    accounts_drifted: int = Field(default=0)
+    started_at: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
+    # Vazio enquanto roda (ou se a execução caiu no meio)
+    finished_at: datetime | None = Field(default=None)
+
+
+class AccountReconciliation(SQLModel, table=True):
+    """
+    Resultado da conciliação por conta: a soma com sinal dos lançamentos até
+    `last_transaction_id` e o saldo (linha principal + buckets) visto no mesmo
+    instante. drift != 0 indica divergência.
+    """
+    __tablename__ = "account_reconciliation"
+
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    last_transaction_id: int = Field(default=0)
+    ledger_balance: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    balance: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    # balance - ledger_balance
+    drift: Decimal = Field(default=0, max_digits=15, decimal_places=2)
+    checked_at: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
@@ -1,4 +1,5 @@
 from enum import Enum
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 from decimal import Decimal
@@ -14,10 +15,30 @@ class TransactionType(str, Enum):
     TRANSFER = "transfer"
 
 class Transaction(SQLModel, table = True):
+    # Índice composto que casa com a paginação por cursor (account_id, data, id), e
+    # os da busca do extrato: com o filtro na segunda coluna o banco continua descendo
+    # em ordem de (data, id). A busca por texto no Oracle usa um índice Oracle Text
+    # criado só na migração (ix_transaction_description_text).
+    __table_args__ = (
+        Index("ix_transaction_account_id_data_id", "account_id", "data", "id"),
+        Index("ix_transaction_account_id_type_data_id", "account_id", "transaction_type", "data", "id"),
+        Index("ix_transaction_account_id_counterparty_data_id", "account_id", "counterparty_account_id", "data", "id"),
+        Index("ix_transaction_account_id_amount", "account_id", "amount"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     amount: Decimal = Field(default=None, max_digits=15, decimal_places=2)
     account_id: int = Field(foreign_key="account.id")
     transaction_type:  TransactionType
     description: str | None = Field(default=None, max_length=255)
+    # Saldo da conta logo depois deste lançamento. Vazio em contas com buckets, onde
+    # créditos concorrentes não têm uma ordem única (e em linhas gravadas fora do ledger).
+    balance_after: Decimal | None = Field(default=None, max_digits=15, decimal_places=2)
+    # Conta do outro lado de uma transferência (vazio em depósitos, saques e cargas
+    # de histórico sem essa informação)
+    counterparty_account_id: int | None = Field(default=None, foreign_key="account.id")
     data: datetime = Field(default_factory=lambda: datetime.now(timezone("America/Recife")))
-    account: "Account" = Relationship(back_populates="transactions")
\ No newline at end of file
+    account: "Account" = Relationship(
+        back_populates="transactions",
+        sa_relationship_kwargs={"foreign_keys": "[Transaction.account_id]"},
+    )
@@ -1,7 +1,32 @@
+from datetime import datetime
 from decimal import Decimal
 from sqlmodel import SQLModel
 
 class AccountPublic(SQLModel):
     id: int
     number: str
-    balance: Decimal
\ No newline at end of file
+    balance: Decimal
+
+class AccountBucketsUpdate(SQLModel):
+    # 0 desliga; N > 0 espalha os créditos da conta em N linhas
+    bucket_count: int
+
+class AccountBucketsPublic(AccountPublic):
+    bucket_count: int
+
+class AccountDriftPublic(SQLModel):
+    number: str
+    balance: Decimal
+    ledger_balance: Decimal
+    drift: Decimal
+    last_transaction_id: int
+    checked_at: datetime
+
+class ReconciliationPublic(SQLModel):
+    # Última execução concluída (None se a conciliação nunca rodou)
+    last_run_id: int | None
+    last_run_full: bool | None
+    last_run_finished_at: datetime | None
+    last_transaction_id: int
+    accounts_drifted: int
+    accounts: list[AccountDriftPublic]
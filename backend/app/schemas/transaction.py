@@ -1,6 +1,8 @@
 from sqlmodel import SQLModel
-from datetime import datetime 
+from datetime import date, datetime
 from decimal import Decimal
+from enum import Enum
+from app.models.account_summary import SummaryPeriod
 from app.models.transaction import TransactionType
 
 
@@ -13,8 +15,61 @@ class TransactionPublic(TransactionCreate):
     id: int
     account_id: int
     data: datetime
+    balance_after: Decimal | None = None
 
 class TransferCreate(SQLModel):
     target_account_number: str
     amount: Decimal
-    description: str | None = None
\ No newline at end of file
+    description: str | None = None
+
+class TransactionPage(SQLModel):
+    items: list[TransactionPublic]
+    next_cursor: str | None = None
+    # Só na primeira página: total aproximado de lançamentos que batem com os filtros
+    # (total_exact=False quando é estimativa ou quando passou do limite de contagem)
+    total: int | None = None
+    total_exact: bool | None = None
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class TransferBatchCreate(SQLModel):
+    transfers: list[TransferCreate]
+    # True = tudo ou nada; False = grava os itens válidos e reporta os inválidos
+    atomic: bool = False
+
+
+class TransferBatchItem(SQLModel):
+    index: int
+    status: str
+    transaction_id: int | None = None
+    detail: str | None = None
+
+
+class TransferBatchPublic(SQLModel):
+    committed: bool
+    succeeded: int
+    failed: int
+    items: list[TransferBatchItem]
+
+
+class PeriodSummary(SQLModel):
+    period_start: date
+    total_in: Decimal
+    total_out: Decimal
+    transaction_count: int
+    # Saldo no fim do período (dia ou mês)
+    closing_balance: Decimal
+
+
+class TransactionSummary(SQLModel):
+    period: SummaryPeriod
+    items: list[PeriodSummary]
+
+
+class BalanceAtPublic(SQLModel):
+    at: datetime
+    balance: Decimal
@@ -0,0 +1,174 @@
+import asyncio
+import random
+from decimal import Decimal
+from typing import Callable
+
+from sqlalchemy import bindparam
+from sqlmodel import delete, func, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.account import Account
+from app.models.account_bucket import AccountBucket
+
+
+async def credit_bucket(session: AsyncSession, account_id: int, amount: Decimal, bucket_count: int) -> Decimal | None:
+    """
+    Credita num bucket sorteado: créditos concorrentes na mesma conta caem em
+    linhas diferentes e não disputam o mesmo lock. None se o bucket não existir.
+    """
+    statement = update(AccountBucket)\
+        .where(AccountBucket.account_id == account_id, AccountBucket.bucket == random.randrange(bucket_count))\
+        .values(balance=AccountBucket.balance + amount, version=AccountBucket.version + 1)\
+        .returning(AccountBucket.balance)\
+        .execution_options(synchronize_session=False)
+
+    result = await session.exec(statement)
+    return result.scalar_one_or_none()
+
+
+async def debit_bucket(session: AsyncSession, account_id: int, amount: Decimal, bucket_count: int) -> Decimal | None:
+    """
+    Tenta debitar de um bucket sorteado (só se ele sozinho cobrir o valor).
+    None se não deu; quem chama tenta a linha principal e depois consolida.
+    """
+    statement = update(AccountBucket)\
+        .where(
+            AccountBucket.account_id == account_id,
+            AccountBucket.bucket == random.randrange(bucket_count),
+            AccountBucket.balance >= amount,
+        )\
+        .values(balance=AccountBucket.balance - amount, version=AccountBucket.version + 1)\
+        .returning(AccountBucket.balance)\
+        .execution_options(synchronize_session=False)
+
+    result = await session.exec(statement)
+    return result.scalar_one_or_none()
+
+
+async def consolidate(session: AsyncSession, account_id: int, lock_all: bool = False) -> Decimal:
+    """
+    Move o saldo de todos os buckets da conta para Account.balance e devolve quanto
+    foi movido. Trava os buckets em ordem (SELECT ... FOR UPDATE) e subtrai exatamente
+    o valor lido, então créditos que chegarem depois não se perdem. Com `lock_all`
+    trava também os buckets zerados, que ficam bloqueados para créditos até o commit
+    (necessário antes de apagá-los). Não faz commit.
+    """
+    query = select(AccountBucket.bucket, AccountBucket.balance).where(AccountBucket.account_id == account_id)
+    if not lock_all:
+        query = query.where(AccountBucket.balance != 0)
+    locked = await session.exec(query.order_by(AccountBucket.bucket).with_for_update())
+    rows = [(bucket, balance) for bucket, balance in locked.all() if balance != 0]
+    if not rows:
+        return Decimal(0)
+
+    table = AccountBucket.__table__
+    await session.exec(
+        update(table)
+        .where(table.c.account_id == account_id, table.c.bucket == bindparam("b_bucket"))
+        .values(balance=table.c.balance - bindparam("b_moved")),
+        params=[{"b_bucket": bucket, "b_moved": balance} for bucket, balance in rows],
+    )
+
+    moved = sum((balance for _, balance in rows), Decimal(0))
+    await session.exec(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=Account.balance + moved)
+        .execution_options(synchronize_session=False)
+    )
+    return moved
+
+
+async def bucket_sum(session: AsyncSession, account_id: int) -> Decimal:
+    result = await session.exec(
+        select(func.coalesce(func.sum(AccountBucket.balance), 0))
+        .where(AccountBucket.account_id == account_id)
+    )
+    return Decimal(result.one())
+
+
+async def total_balance(session: AsyncSession, account: Account) -> Decimal:
+    """
+    Saldo real da conta. Para contas sem buckets é só Account.balance (sem query extra).
+    """
+    if not account.bucket_count:
+        return account.balance
+    return account.balance + await bucket_sum(session, account.id)
+
+
+async def bucket_version_sum(session: AsyncSession, account_id: int) -> int:
+    result = await session.exec(
+        select(func.coalesce(func.sum(AccountBucket.version), 0))
+        .where(AccountBucket.account_id == account_id)
+    )
+    return int(result.one())
+
+
+async def total_version(session: AsyncSession, account: Account) -> int:
+    """
+    Versão da conta inteira: Account.version mais as versões dos buckets (cada crédito
+    num bucket sobe só a versão dele). Para contas sem buckets é só Account.version.
+    """
+    if not account.bucket_count:
+        return account.version
+    return account.version + await bucket_version_sum(session, account.id)
+
+
+async def set_bucket_count(session: AsyncSession, account: Account, bucket_count: int) -> None:
+    """
+    Liga (N > 0), redimensiona ou desliga (0) os buckets da conta. Antes de mexer,
+    trava todos os buckets e consolida tudo na linha principal: nenhum crédito entra
+    entre a consolidação e o DELETE, então nenhum saldo fica em bucket removido.
+    Não faz commit.
+    """
+    await consolidate(session, account.id, lock_all=True)
+
+    # As versões dos buckets removidos (já travados) passam para a linha principal: a versão
+    # total nunca volta para um valor que já teve (um ETag antigo não pode voltar a valer)
+    folded = await bucket_version_sum(session, account.id)
+    await session.exec(
+        update(Account)
+        .where(Account.id == account.id)
+        .values(version=Account.version + folded + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await session.exec(delete(AccountBucket).where(AccountBucket.account_id == account.id))
+
+    if bucket_count:
+        await session.exec(
+            insert(AccountBucket),
+            params=[{"account_id": account.id, "bucket": b, "balance": Decimal(0)} for b in range(bucket_count)],
+        )
+
+    account.bucket_count = bucket_count
+    session.add(account)
+
+
+async def consolidate_all(session_factory: Callable[[], AsyncSession]) -> int:
+    """
+    Consolida cada conta com buckets na própria transação curta. Devolve quantas contas tinham saldo movido.
+    """
+    async with session_factory() as session:
+        result = await session.exec(select(Account.id).where(Account.bucket_count > 0))
+        account_ids = result.all()
+
+    consolidated = 0
+    for account_id in account_ids:
+        async with session_factory() as session:
+            if await consolidate(session, account_id):
+                consolidated += 1
+            await session.commit()
+    return consolidated
+
+
+async def consolidation_loop(session_factory: Callable[[], AsyncSession], interval: float) -> None:
+    """
+    Task de background: de tempos em tempos devolve o saldo dos buckets para a linha
+    principal, para que os débitos quase sempre achem saldo sem precisar consolidar.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await consolidate_all(session_factory)
+        except Exception as e:
+            print(f"❌ Erro ao consolidar buckets: {e}")
@@ -0,0 +1,72 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlmodel import and_, case, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.account import Account
+from app.models.transaction import Transaction, TransactionType
+from app.services import account_buckets, summaries
+
+
+def signed_amount(transaction_type: TransactionType, amount: Decimal, description: str | None) -> Decimal:
+    """
+    Valor com sinal do ponto de vista da conta: negativo para saques e envios.
+    """
+    return -amount if summaries.is_outgoing(transaction_type, description) else amount
+
+
+def signed_column():
+    """
+    A mesma regra de `signed_amount` como expressão SQL, para somar no banco.
+    """
+    return case(
+        (Transaction.transaction_type == TransactionType.WITHDRAW, -Transaction.amount),
+        (
+            and_(
+                Transaction.transaction_type == TransactionType.TRANSFER,
+                Transaction.description.startswith(summaries.SENT_PREFIX),
+            ),
+            -Transaction.amount,
+        ),
+        else_=Transaction.amount,
+    )
+
+
+async def balance_at(session: AsyncSession, account: Account, at: datetime) -> Decimal:
+    """
+    Saldo da conta no instante `at`: o balance_after do último lançamento até `at`,
+    achado com uma descida no índice (account_id, data, id). Antes do primeiro
+    lançamento, vale o saldo anterior ao lançamento seguinte.
+
+    Linhas sem balance_after (contas com buckets, cargas feitas fora do ledger) caem
+    no cálculo a partir do saldo atual menos o que entrou/saiu depois de `at`.
+    """
+    result = await session.exec(
+        select(Transaction.id, Transaction.balance_after)
+        .where(Transaction.account_id == account.id, Transaction.data <= at)
+        .order_by(Transaction.data.desc(), Transaction.id.desc())
+        .limit(1)
+    )
+    before = result.first()
+    if before is not None and before.balance_after is not None:
+        return before.balance_after
+
+    if before is None:
+        result = await session.exec(
+            select(Transaction.balance_after, Transaction.transaction_type, Transaction.amount, Transaction.description)
+            .where(Transaction.account_id == account.id, Transaction.data > at)
+            .order_by(Transaction.data, Transaction.id)
+            .limit(1)
+        )
+        after = result.first()
+        if after is None:
+            return await account_buckets.total_balance(session, account)
+        if after.balance_after is not None:
+            return after.balance_after - signed_amount(after.transaction_type, after.amount, after.description)
+
+    result = await session.exec(
+        select(func.coalesce(func.sum(signed_column()), 0))
+        .where(Transaction.account_id == account.id, Transaction.data > at)
+    )
+    return await account_buckets.total_balance(session, account) - Decimal(result.one())
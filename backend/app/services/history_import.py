@@ -0,0 +1,308 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Iterable
+
+from pytz import timezone
+from sqlalchemy import bindparam
+from sqlmodel import insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.account import Account
+from app.models.account_bucket import AccountBucket
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.transaction import Transaction, TransactionType
+from app.services import summaries
+from app.services.balance_history import signed_amount
+from app.services.summaries import IN_CHUNK_SIZE
+from app.services.user_import import RowError
+
+# Colunas do arquivo. Transferências de saída são as que têm a descrição começando
+# por "Envio para ", como as gravadas pelo ledger.
+REQUIRED_FIELDS = ("account_number", "transaction_type", "amount", "data")
+DESCRIPTION_MAX_LENGTH = 255
+# Transaction.amount é NUMBER(15, 2)
+AMOUNT_LIMIT = Decimal(10) ** 13
+CENTS = Decimal("0.01")
+
+
+@dataclass
+class HistoryRow:
+    line: int
+    account_number: str
+    transaction_type: TransactionType
+    amount: Decimal
+    data: datetime
+    description: str | None
+
+
+@dataclass
+class HistoryReport:
+    read: int = 0
+    # Linhas que já estavam gravadas numa execução anterior (antes do checkpoint)
+    skipped: int = 0
+    loaded: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    account_ids: set[int] = field(default_factory=set)
+
+
+def parse(line: int, raw: dict | None) -> HistoryRow | RowError:
+    if raw is None:
+        return RowError(line, None, "linha ilegível")
+
+    values = {name: str(raw.get(name) or "").strip() for name in (*REQUIRED_FIELDS, "description")}
+    missing = [name for name in REQUIRED_FIELDS if not values[name]]
+    if missing:
+        return RowError(line, None, f"campo(s) obrigatório(s) vazio(s): {', '.join(missing)}")
+
+    try:
+        transaction_type = TransactionType(values["transaction_type"].lower())
+    except ValueError:
+        return RowError(line, None, f"transaction_type inválido: {values['transaction_type']}")
+
+    try:
+        amount = Decimal(values["amount"])
+    except InvalidOperation:
+        return RowError(line, None, f"amount inválido: {values['amount']}")
+    if not amount.is_finite() or amount <= 0 or amount != amount.quantize(CENTS) or amount >= AMOUNT_LIMIT:
+        return RowError(line, None, f"amount inválido: {values['amount']}")
+
+    try:
+        data = datetime.fromisoformat(values["data"])
+    except ValueError:
+        return RowError(line, None, f"data inválida: {values['data']}")
+    # Transaction.data é gravado no horário de Recife, sem fuso
+    if data.tzinfo:
+        data = data.astimezone(timezone("America/Recife")).replace(tzinfo=None)
+
+    if len(values["description"]) > DESCRIPTION_MAX_LENGTH:
+        return RowError(line, None, f"description com mais de {DESCRIPTION_MAX_LENGTH} caracteres")
+
+    return HistoryRow(
+        line=line,
+        account_number=values["account_number"],
+        transaction_type=transaction_type,
+        amount=amount.quantize(CENTS),
+        data=data,
+        description=values["description"] or None,
+    )
+
+
+async def _resolve(session: AsyncSession, numbers: set[str], accounts: dict[str, int]) -> None:
+    """
+    Acrescenta em `accounts` ({número: id}) os números ainda não vistos, com
+    consultas IN de até 1000 números.
+    """
+    missing = sorted(numbers - accounts.keys())
+    for i in range(0, len(missing), IN_CHUNK_SIZE):
+        result = await session.exec(
+            select(Account.number, Account.id).where(Account.number.in_(missing[i:i + IN_CHUNK_SIZE]))
+        )
+        accounts.update(result.all())
+
+
+async def _checkpoint(session: AsyncSession, name: str) -> ImportCheckpoint:
+    checkpoint = await session.get(ImportCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(name=name)
+        session.add(checkpoint)
+        await session.commit()
+    return checkpoint
+
+
+async def _write_chunk(
+    session: AsyncSession,
+    name: str,
+    raws: list[tuple[int, dict | None]],
+    accounts: dict[str, int],
+    report: HistoryReport,
+) -> None:
+    """
+    Valida o bloco, grava os lançamentos com um executemany (array DML no oracledb)
+    e avança o checkpoint na mesma transação.
+    """
+    rows = []
+    for line, raw in raws:
+        row = parse(line, raw)
+        if isinstance(row, RowError):
+            report.errors.append(row)
+        else:
+            rows.append(row)
+
+    await _resolve(session, {row.account_number for row in rows}, accounts)
+
+    params = []
+    for row in rows:
+        account_id = accounts.get(row.account_number)
+        if account_id is None:
+            report.errors.append(RowError(row.line, None, f"conta {row.account_number} não encontrada"))
+            continue
+        report.account_ids.add(account_id)
+        params.append({
+            "account_id": account_id,
+            "transaction_type": row.transaction_type,
+            "amount": row.amount,
+            "description": row.description,
+            "data": row.data,
+        })
+
+    if params:
+        await session.exec(insert(Transaction), params=params)
+        # O extrato dessas contas mudou: invalida os ETags
+        table = Account.__table__
+        await session.exec(
+            update(table).where(table.c.id == bindparam("a_id")).values(version=table.c.version + 1),
+            params=[{"a_id": account_id} for account_id in sorted({p["account_id"] for p in params})],
+        )
+
+    last_line = raws[-1][0]
+    await session.exec(
+        update(ImportCheckpoint)
+        .where(ImportCheckpoint.name == name)
+        .values(
+            last_line=last_line,
+            row_count=ImportCheckpoint.row_count + len(params),
+            updated_at=datetime.now(timezone("America/Recife")),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    report.loaded += len(params)
+
+
+async def load(
+    session_factory: Callable[[], AsyncSession],
+    name: str,
+    lines: Iterable[tuple[int, dict | None]],
+    chunk_size: int = 5000,
+    on_chunk: Callable[[HistoryReport], None] | None = None,
+) -> HistoryReport:
+    """
+    Grava os lançamentos de `lines` em blocos de `chunk_size`, um commit por bloco,
+    sem nunca ter mais de um bloco na memória. `name` identifica a carga: rodando
+    de novo com o mesmo nome, as linhas até o checkpoint são puladas (só os números
+    de conta delas são lidos, para o recálculo de saldos em `finalize`).
+    Não recalcula saldos.
+    """
+    report = HistoryReport()
+    accounts: dict[str, int] = {}
+    done_numbers: set[str] = set()
+    chunk: list[tuple[int, dict | None]] = []
+
+    async with session_factory() as session:
+        start_line = (await _checkpoint(session, name)).last_line
+
+        for line, raw in lines:
+            report.read += 1
+            if line <= start_line:
+                report.skipped += 1
+                if raw and raw.get("account_number"):
+                    done_numbers.add(str(raw["account_number"]).strip())
+                continue
+
+            chunk.append((line, raw))
+            if len(chunk) == chunk_size:
+                await _write_chunk(session, name, chunk, accounts, report)
+                chunk = []
+                if on_chunk:
+                    on_chunk(report)
+
+        if chunk:
+            await _write_chunk(session, name, chunk, accounts, report)
+            if on_chunk:
+                on_chunk(report)
+
+        await _resolve(session, done_numbers, accounts)
+        report.account_ids.update(accounts[number] for number in done_numbers if number in accounts)
+
+    report.errors.sort(key=lambda error: error.line)
+    return report
+
+
+async def recompute(session: AsyncSession, account_ids: list[int]) -> list[str]:
+    """
+    Refaz, numa passada pelos lançamentos de cada conta (ordem data, id), o
+    balance_after das linhas e o Account.balance, que passa a ser a soma dos
+    lançamentos menos o que estiver nos buckets. Também refaz os totais por
+    dia/mês. Trava as contas e os buckets enquanto isso e devolve os números das que ficaram
+    com saldo negativo. Não faz commit.
+    """
+    result = await session.exec(
+        select(Account.id, Account.number, Account.bucket_count)
+        .where(Account.id.in_(account_ids))
+        .order_by(Account.id)
+        .with_for_update()
+    )
+    locked = {account_id: (number, bucket_count) for account_id, number, bucket_count in result.all()}
+
+    # Buckets travados também (créditos neles não passam pela linha da conta): um
+    # crédito commitado entre esta leitura e a dos lançamentos inflaria o saldo
+    result = await session.exec(
+        select(AccountBucket.account_id, AccountBucket.balance)
+        .where(AccountBucket.account_id.in_(account_ids))
+        .order_by(AccountBucket.account_id, AccountBucket.bucket)
+        .with_for_update()
+    )
+    in_buckets: dict[int, Decimal] = {}
+    for account_id, balance in result.all():
+        in_buckets[account_id] = in_buckets.get(account_id, Decimal(0)) + balance
+
+    totals = {account_id: Decimal(0) for account_id in locked}
+    changed = []
+    rows = await session.stream(
+        select(Transaction.id, Transaction.account_id, Transaction.transaction_type,
+               Transaction.amount, Transaction.description, Transaction.balance_after)
+        .where(Transaction.account_id.in_(account_ids))
+        .order_by(Transaction.account_id, Transaction.data, Transaction.id)
+        .execution_options(yield_per=IN_CHUNK_SIZE)
+    )
+    async for transaction_id, account_id, transaction_type, amount, description, balance_after in rows:
+        totals[account_id] += signed_amount(transaction_type, amount, description)
+        # Contas com buckets ficam sem balance_after, como no ledger
+        if not locked[account_id][1] and balance_after != totals[account_id]:
+            changed.append({"t_id": transaction_id, "t_balance": totals[account_id]})
+        if len(changed) >= IN_CHUNK_SIZE:
+            await _update_balance_after(session, changed)
+            changed = []
+    if changed:
+        await _update_balance_after(session, changed)
+
+    table = Account.__table__
+    await session.exec(
+        update(table)
+        .where(table.c.id == bindparam("a_id"))
+        .values(balance=bindparam("a_balance"), version=table.c.version + 1),
+        params=[
+            {"a_id": account_id, "a_balance": total - in_buckets.get(account_id, Decimal(0))}
+            for account_id, total in totals.items()
+        ],
+    )
+
+    await summaries.rebuild(session, account_ids)
+    return [locked[account_id][0] for account_id, total in totals.items() if total < 0]
+
+
+async def _update_balance_after(session: AsyncSession, changed: list[dict]) -> None:
+    table = Transaction.__table__
+    await session.exec(
+        update(table).where(table.c.id == bindparam("t_id")).values(balance_after=bindparam("t_balance")),
+        params=changed,
+    )
+
+
+async def finalize(
+    session_factory: Callable[[], AsyncSession],
+    account_ids: Iterable[int],
+    chunk_size: int = 500,
+) -> list[str]:
+    """
+    Roda `recompute` para as contas da carga, `chunk_size` contas por transação.
+    Devolve os números das contas que terminaram com saldo negativo.
+    """
+    account_ids = sorted(account_ids)
+    negative = []
+    for i in range(0, len(account_ids), chunk_size):
+        async with session_factory() as session:
+            negative += await recompute(session, account_ids[i:i + chunk_size])
+            await session.commit()
+    return negative
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from pytz import timezone
+from sqlmodel import SQLModel, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+# (user_id, chave) -> (hash da requisição, status, corpo da resposta)
+cache = TTLCache(max_size=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def fingerprint(endpoint: str, payload: SQLModel) -> str:
+    raw = json.dumps(
+        {"endpoint": endpoint, "body": payload.model_dump(mode="json")},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _expiry_cutoff() -> datetime:
+    """
+    Chaves criadas antes disto venceram. created_at é gravado no horário de Recife, sem fuso.
+    """
+    now = datetime.now(timezone("America/Recife")).replace(tzinfo=None)
+    return now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def replay(status_code: int, body: Any) -> JSONResponse:
+    return JSONResponse(content=body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+async def lookup(session: AsyncSession, user_id: int, key: str, request_hash: str) -> JSONResponse | None:
+    """
+    Procura a chave primeiro no cache e depois na tabela. Se já foi usada,
+    devolve a resposta original pronta para reenviar, sem tocar em Account.
+    Uma chave com mais de IDEMPOTENCY_TTL_SECONDS vale como nova: a linha vencida
+    é apagada na transação da requisição, para a chave poder ser gravada de novo.
+    """
+    entry = cache.get((user_id, key))
+
+    if entry is None:
+        query = select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        result = await session.exec(query)
+        row = result.first()
+        if not row:
+            return None
+
+        cutoff = _expiry_cutoff()
+        created_at = row.created_at.replace(tzinfo=None)
+        if created_at <= cutoff:
+            await session.exec(delete(IdempotencyKey).where(IdempotencyKey.id == row.id))
+            return None
+
+        entry = (row.request_hash, row.status_code, json.loads(row.response_body))
+        # No cache, só pelo tempo que falta para a linha vencer
+        cache.set((user_id, key), entry, ttl=(created_at - cutoff).total_seconds())
+
+    stored_hash, status_code, body = entry
+    if stored_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Esta Idempotency-Key já foi usada com outra requisição.",
+        )
+
+    return replay(status_code, body)
+
+
+async def commit(
+    session: AsyncSession,
+    user_id: int,
+    key: str | None,
+    request_hash: str | None,
+    endpoint: str,
+    body: Any,
+    status_code: int = 200,
+) -> JSONResponse | None:
+    """
+    Grava a chave junto com o lançamento (mesmo commit) e coloca no cache.
+    Se outra requisição com a mesma chave ganhou a corrida, desfaz tudo e
+    devolve a resposta dela (ou 422, se o corpo era outro).
+    """
+    if key is None:
+        await session.commit()
+        return None
+
+    session.add(IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        endpoint=endpoint,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=json.dumps(body),
+    ))
+
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        replayed = await lookup(session, user_id, key, request_hash)
+        if replayed is None:
+            # Não foi a chave: outra restrição falhou, o erro é esse
+            raise
+        return replayed
+
+    cache.set((user_id, key), (request_hash, status_code, body))
+    return None
+
+
+async def purge_expired(session_factory: Callable[[], AsyncSession]) -> int:
+    """
+    Apaga da tabela as chaves com mais de IDEMPOTENCY_TTL_SECONDS e devolve quantas saíram.
+    """
+    async with session_factory() as session:
+        result = await session.exec(delete(IdempotencyKey).where(IdempotencyKey.created_at <= _expiry_cutoff()))
+        await session.commit()
+    return result.rowcount
+
+
+async def purge_loop(session_factory: Callable[[], AsyncSession], interval: float) -> None:
+    """
+    Task de background: de tempos em tempos apaga as chaves vencidas da tabela (o
+    cache em memória tem o próprio reaper).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await purge_expired(session_factory)
+        except Exception as e:
+            print(f"❌ Erro ao apagar chaves de idempotência vencidas: {e}")
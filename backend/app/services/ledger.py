@@ -0,0 +1,369 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from pytz import timezone
+from sqlalchemy import bindparam
+from sqlmodel import insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.account import Account
+from app.models.transaction import Transaction, TransactionType
+from app.services import account_buckets, summaries
+
+
+class LedgerError(Exception):
+    """
+    Erro de regra de negócio do livro-razão. Carrega o status HTTP sugerido
+    para que as rotas possam converter direto em HTTPException.
+    """
+    status_code = 400
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class AccountNotFoundError(LedgerError):
+    status_code = 404
+
+
+class InsufficientFundsError(LedgerError):
+    pass
+
+
+def _sent_description(target_number: str, description: str | None) -> str:
+    return f"Envio para {target_number}: {description or ''}"
+
+
+def _received_description(source_number: str, description: str | None) -> str:
+    return f"Recebido de {source_number}: {description or ''}"
+
+
+async def credit(session: AsyncSession, account_id: int, amount: Decimal, buckets: int = 0) -> Decimal:
+    """
+    Soma `amount` ao saldo num único UPDATE ... RETURNING e devolve o novo saldo da
+    linha alterada. Em contas com buckets o crédito vai para um bucket sorteado.
+    """
+    if buckets:
+        new_balance = await account_buckets.credit_bucket(session, account_id, amount, buckets)
+        if new_balance is not None:
+            return new_balance
+
+    statement = update(Account)\
+        .where(Account.id == account_id)\
+        .values(balance=Account.balance + amount, version=Account.version + 1)\
+        .returning(Account.balance)\
+        .execution_options(synchronize_session=False)
+
+    result = await session.exec(statement)
+    new_balance = result.scalar_one_or_none()
+
+    if new_balance is None:
+        raise AccountNotFoundError("Conta não encontrada.")
+    return new_balance
+
+
+async def _debit_main(session: AsyncSession, account_id: int, amount: Decimal) -> Decimal | None:
+    statement = update(Account)\
+        .where(Account.id == account_id, Account.balance >= amount)\
+        .values(balance=Account.balance - amount, version=Account.version + 1)\
+        .returning(Account.balance)\
+        .execution_options(synchronize_session=False)
+
+    result = await session.exec(statement)
+    return result.scalar_one_or_none()
+
+
+async def debit(session: AsyncSession, account_id: int, amount: Decimal, buckets: int = 0) -> Decimal:
+    """
+    Subtrai `amount` do saldo só se houver saldo suficiente. A checagem e a escrita
+    acontecem no mesmo UPDATE, então duas requisições concorrentes nunca perdem atualização.
+
+    Em contas com buckets tenta um bucket sorteado, depois a linha principal e, por
+    último, consolida os buckets na linha principal e tenta de novo.
+    """
+    if buckets:
+        new_balance = await account_buckets.debit_bucket(session, account_id, amount, buckets)
+        if new_balance is not None:
+            return new_balance
+
+    new_balance = await _debit_main(session, account_id, amount)
+
+    if new_balance is None and buckets and await account_buckets.consolidate(session, account_id):
+        new_balance = await _debit_main(session, account_id, amount)
+
+    if new_balance is None:
+        raise InsufficientFundsError("Saldo insuficiente.")
+    return new_balance
+
+
+async def post_transaction(
+    session: AsyncSession,
+    account_id: int,
+    transaction_type: TransactionType,
+    amount: Decimal,
+    description: str | None = None,
+    buckets: int = 0,
+) -> Transaction:
+    """
+    Depósito ou saque: atualiza o saldo e registra a linha do extrato na mesma transação.
+    Não faz commit, quem chama decide.
+    """
+    if amount <= 0:
+        raise LedgerError("Valor não pode ser menor ou igual a zero.")
+
+    if transaction_type == TransactionType.DEPOSIT:
+        new_balance = await credit(session, account_id, amount, buckets)
+    elif transaction_type == TransactionType.WITHDRAW:
+        try:
+            new_balance = await debit(session, account_id, amount, buckets)
+        except InsufficientFundsError:
+            raise InsufficientFundsError("O valor é maior que o disponível na conta")
+    else:
+        raise LedgerError("Use a rota de transferência para transferências.")
+
+    transaction = Transaction(
+        amount=amount,
+        account_id=account_id,
+        transaction_type=transaction_type,
+        description=description,
+        # Em conta com buckets o UPDATE devolve o saldo de um pedaço, não o da conta
+        balance_after=None if buckets else new_balance,
+    )
+    session.add(transaction)
+
+    # Totais do dia/mês na mesma transação do lançamento
+    if transaction_type == TransactionType.DEPOSIT:
+        await summaries.record(session, account_id, transaction.data.date(), amount_in=amount, buckets=buckets)
+    else:
+        await summaries.record(session, account_id, transaction.data.date(), amount_out=amount, buckets=buckets)
+    return transaction
+
+
+async def post_transfer(
+    session: AsyncSession,
+    source: Account,
+    target: Account,
+    amount: Decimal,
+    description: str | None = None,
+) -> tuple[Transaction, Transaction]:
+    """
+    Move `amount` de `source` para `target`. Os UPDATEs sempre seguem a ordem crescente
+    de id, então duas transferências cruzadas (A->B e B->A) travam as linhas na mesma
+    ordem e não entram em deadlock. Não faz commit.
+    """
+    if source.id == target.id:
+        raise LedgerError("Você não pode transferir para si mesmo.")
+
+    if amount <= 0:
+        raise LedgerError("O valor deve ser positivo.")
+
+    try:
+        if source.id < target.id:
+            source_balance = await debit(session, source.id, amount, source.bucket_count)
+            target_balance = await credit(session, target.id, amount, target.bucket_count)
+        else:
+            target_balance = await credit(session, target.id, amount, target.bucket_count)
+            source_balance = await debit(session, source.id, amount, source.bucket_count)
+    except InsufficientFundsError:
+        raise InsufficientFundsError("Saldo insuficiente para transferência.")
+
+    transaction_out = Transaction(
+        account_id=source.id,
+        transaction_type=TransactionType.TRANSFER,
+        amount=amount,
+        description=_sent_description(target.number, description),
+        balance_after=None if source.bucket_count else source_balance,
+        counterparty_account_id=target.id,
+    )
+    transaction_in = Transaction(
+        account_id=target.id,
+        transaction_type=TransactionType.TRANSFER,
+        amount=amount,
+        description=_received_description(source.number, description),
+        balance_after=None if target.bucket_count else target_balance,
+        counterparty_account_id=source.id,
+    )
+    session.add(transaction_out)
+    session.add(transaction_in)
+
+    await summaries.record(
+        session, source.id, transaction_out.data.date(), amount_out=amount, buckets=source.bucket_count
+    )
+    await summaries.record(
+        session, target.id, transaction_in.data.date(), amount_in=amount, buckets=target.bucket_count
+    )
+    return transaction_out, transaction_in
+
+
+# O Oracle aceita no máximo 1000 expressões numa lista IN
+IN_CHUNK_SIZE = 1000
+
+
+@dataclass
+class BatchTransfer:
+    target_account_number: str
+    amount: Decimal
+    description: str | None = None
+
+
+@dataclass
+class BatchTransferResult:
+    index: int
+    status: str  # "ok", "error" ou "aborted"
+    transaction_id: int | None = None
+    detail: str | None = None
+    # Linha de recebimento na conta de destino (não vai na resposta; serve ao tempo real)
+    received_transaction_id: int | None = None
+
+
+async def post_transfer_batch(
+    session: AsyncSession,
+    source: Account,
+    transfers: list[BatchTransfer],
+    atomic: bool = False,
+) -> list[BatchTransferResult]:
+    """
+    Executa N transferências saindo de `source` numa única transação:
+
+    1. resolve todas as contas de destino com consultas IN (em blocos de 1000);
+    2. valida cada item em memória contra o saldo travado da origem;
+    3. trava as contas envolvidas em ordem crescente de id (SELECT ... FOR UPDATE);
+    4. aplica os saldos e grava os lançamentos com executemany.
+
+    Com `atomic=True` qualquer item inválido cancela o lote inteiro (nada é gravado
+    e os itens válidos voltam como "aborted"). Sem ele, só os itens válidos são gravados.
+    Não faz commit.
+    """
+    numbers = list({t.target_account_number for t in transfers})
+    targets: dict[str, int] = {}
+    bucketed: dict[int, int] = {}
+    for i in range(0, len(numbers), IN_CHUNK_SIZE):
+        chunk = numbers[i:i + IN_CHUNK_SIZE]
+        rows = await session.exec(
+            select(Account.number, Account.id, Account.bucket_count).where(Account.number.in_(chunk))
+        )
+        for number, account_id, bucket_count in rows.all():
+            targets[number] = account_id
+            if bucket_count:
+                bucketed[account_id] = bucket_count
+
+    # Trava origem e destinos sempre na mesma ordem para dois lotes concorrentes
+    # não se travarem mutuamente
+    account_ids = sorted({source.id, *targets.values()})
+    locked = await session.exec(
+        select(Account.id, Account.balance)
+        .where(Account.id.in_(account_ids))
+        .order_by(Account.id)
+        .with_for_update()
+    )
+    balances = dict(locked.all())
+    available = balances[source.id]
+    if source.bucket_count:
+        available += await account_buckets.bucket_sum(session, source.id)
+
+    results: list[BatchTransferResult] = []
+    accepted: list[tuple[int, BatchTransfer, int]] = []
+    for index, transfer in enumerate(transfers):
+        target_id = targets.get(transfer.target_account_number)
+        if target_id is None:
+            detail = "Conta de destino não encontrada."
+        elif target_id == source.id:
+            detail = "Você não pode transferir para si mesmo."
+        elif transfer.amount <= 0:
+            detail = "O valor deve ser positivo."
+        elif available < transfer.amount:
+            detail = "Saldo insuficiente para transferência."
+        else:
+            available -= transfer.amount
+            accepted.append((index, transfer, target_id))
+            results.append(BatchTransferResult(index=index, status="ok"))
+            continue
+        results.append(BatchTransferResult(index=index, status="error", detail=detail))
+
+    if atomic and len(accepted) != len(transfers):
+        for result in results:
+            if result.status == "ok":
+                result.status = "aborted"
+        return results
+
+    if not accepted:
+        return results
+
+    total = sum((transfer.amount for _, transfer, _ in accepted), Decimal(0))
+    await debit(session, source.id, total, source.bucket_count)
+
+    credits: dict[int, Decimal] = {}
+    for _, transfer, target_id in accepted:
+        credits[target_id] = credits.get(target_id, Decimal(0)) + transfer.amount
+
+    # Contas quentes (com buckets) recebem no bucket sorteado; as demais num executemany só
+    plain = [(target_id, amount) for target_id, amount in sorted(credits.items()) if target_id not in bucketed]
+    for target_id, amount in sorted(credits.items()):
+        if target_id in bucketed:
+            await credit(session, target_id, amount, bucketed[target_id])
+
+    if plain:
+        table = Account.__table__
+        await session.exec(
+            update(table)
+            .where(table.c.id == bindparam("target_id"))
+            .values(balance=table.c.balance + bindparam("credit"), version=table.c.version + 1),
+            params=[{"target_id": target_id, "credit": amount} for target_id, amount in plain],
+        )
+
+    # Saldo depois de cada linha, a partir dos saldos travados acima, na ordem dos itens
+    now = datetime.now(timezone("America/Recife"))
+    rows = []
+    for _, transfer, target_id in accepted:
+        balances[source.id] -= transfer.amount
+        balances[target_id] += transfer.amount
+        rows.append({
+            "account_id": source.id,
+            "transaction_type": TransactionType.TRANSFER,
+            "amount": transfer.amount,
+            "description": _sent_description(transfer.target_account_number, transfer.description),
+            "data": now,
+            "balance_after": None if source.bucket_count else balances[source.id],
+            "counterparty_account_id": target_id,
+        })
+        rows.append({
+            "account_id": target_id,
+            "transaction_type": TransactionType.TRANSFER,
+            "amount": transfer.amount,
+            "description": _received_description(source.number, transfer.description),
+            "data": now,
+            "balance_after": None if target_id in bucketed else balances[target_id],
+            "counterparty_account_id": source.id,
+        })
+
+    inserted = await session.exec(
+        insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+        params=rows,
+    )
+    ids = inserted.scalars().all()
+
+    # Totais do dia: um executemany para as contas já travadas acima; contas com
+    # buckets recebem crédito sem travar a linha da conta, então passam por `record`
+    day = now.date()
+    received = Counter(target_id for _, _, target_id in accepted)
+    totals = {target_id: (amount, Decimal(0), received[target_id]) for target_id, amount in credits.items()}
+    totals[source.id] = (Decimal(0), total, len(accepted))
+
+    plain_totals = {}
+    for account_id, (total_in, total_out, count) in totals.items():
+        buckets = source.bucket_count if account_id == source.id else bucketed.get(account_id, 0)
+        if buckets:
+            await summaries.record(session, account_id, day, total_in, total_out, count, buckets)
+        else:
+            plain_totals[account_id] = (total_in, total_out, count)
+    if plain_totals:
+        await summaries.record_many(session, day, plain_totals)
+
+    # Cada item aceito gerou duas linhas (envio, recebimento); o comprovante é a de envio
+    for (index, _, _), sent_id, received_id in zip(accepted, ids[::2], ids[1::2]):
+        results[index].transaction_id = sent_id
+        results[index].received_transaction_id = received_id
+
+    return results
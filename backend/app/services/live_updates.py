@@ -0,0 +1,144 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import Any, AsyncIterator
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.pubsub import Broker, LocalBackend, RedisBackend, Subscription
+from app.core.responses import dumps
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.services import account_buckets
+from app.services.statement import PUBLIC_COLUMNS
+from app.services.summaries import IN_CHUNK_SIZE
+
+# Um canal por conta; com LIVE_UPDATES_REDIS_URL os workers trocam eventos pelo Redis
+broker = Broker(
+    RedisBackend(settings.LIVE_UPDATES_REDIS_URL) if settings.LIVE_UPDATES_REDIS_URL else LocalBackend(),
+    max_queued=settings.LIVE_QUEUE_SIZE,
+)
+
+# Comentário SSE: o cliente ignora, mas mantém a conexão viva em proxies e balanceadores
+HEARTBEAT = b": ping\n\n"
+
+
+def channel(account_id: int) -> str:
+    return f"account:{account_id}"
+
+
+def frame(event: str, data: Any, event_id: int | None = None) -> bytes:
+    """
+    Um evento Server-Sent Events já em bytes: serializado uma vez na publicação,
+    repassado como está a todos os assinantes.
+    """
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + dumps(data) + b"\n\n"
+
+
+def _frame_id(message: bytes) -> int | None:
+    if message.startswith(b"id: "):
+        return int(message[4:message.index(b"\n")])
+    return None
+
+
+async def publish_transactions(*bodies: dict) -> None:
+    """
+    Avisa as contas dos lançamentos (corpos de TransactionPublic) depois do commit.
+    O saldo novo vai em balance_after (None em conta com buckets). Uma falha aqui
+    não derruba a requisição: o lançamento já está gravado.
+    """
+    for body in bodies:
+        try:
+            await broker.publish(channel(body["account_id"]), frame("transaction", body, body["id"]))
+        except Exception as e:
+            print(f"❌ Erro ao publicar lançamento em tempo real: {e}")
+
+
+async def publish_committed(session: AsyncSession, transaction_ids: list[int]) -> None:
+    """
+    Como `publish_transactions`, para lançamentos gravados em lote (executemany) que
+    não têm objeto na sessão: relê as linhas já commitadas, em blocos de até 1000 ids.
+    """
+    for i in range(0, len(transaction_ids), IN_CHUNK_SIZE):
+        try:
+            result = await session.exec(
+                select(*PUBLIC_COLUMNS)
+                .where(Transaction.id.in_(transaction_ids[i:i + IN_CHUNK_SIZE]))
+                .order_by(Transaction.id)
+            )
+            rows = result.all()
+        except Exception as e:
+            print(f"❌ Erro ao publicar lançamentos em tempo real: {e}")
+            return
+        await publish_transactions(*(row._asdict() for row in rows))
+
+
+async def balance(session: AsyncSession, account: Account) -> Decimal:
+    """
+    Saldo lido agora (não o da conta carregada na autenticação, que pode ser de
+    antes da assinatura).
+    """
+    result = await session.exec(select(Account.balance).where(Account.id == account.id))
+    current = result.one()
+    if account.bucket_count:
+        current += await account_buckets.bucket_sum(session, account.id)
+    return current
+
+
+async def catch_up(session: AsyncSession, account_id: int, last_id: int, limit: int) -> list[bytes] | None:
+    """
+    Eventos dos lançamentos da conta depois de `last_id`, em ordem. None se passar
+    de `limit` (o cliente deve recarregar o extrato).
+    """
+    result = await session.exec(
+        select(*PUBLIC_COLUMNS)
+        .where(Transaction.account_id == account_id, Transaction.id > last_id)
+        .order_by(Transaction.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    if len(rows) > limit:
+        return None
+    return [frame("transaction", row._asdict(), row.id) for row in rows]
+
+
+async def stream(
+    subscription: Subscription,
+    initial: list[bytes],
+    last_id: int,
+    expires_at: float | None,
+    heartbeat: float = settings.LIVE_HEARTBEAT_SECONDS,
+) -> AsyncIterator[bytes]:
+    """
+    Corpo da resposta SSE: primeiro `initial` (saldo e lançamentos perdidos), depois
+    os eventos da conta conforme chegam, pulando os já enviados (id <= `last_id`).
+    Termina quando o token vence (`expires_at`, epoch), quando a assinatura é
+    derrubada por lentidão ou quando o cliente desconecta.
+    """
+    try:
+        for message in initial:
+            last_id = max(last_id, _frame_id(message) or 0)
+            yield message
+
+        while True:
+            timeout = heartbeat if expires_at is None else min(heartbeat, expires_at - time.time())
+            if timeout <= 0:
+                # Token vencido: o cliente reconecta com um token novo
+                break
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if message is None:
+                break
+
+            event_id = _frame_id(message)
+            if event_id is not None and event_id <= last_id:
+                continue
+            yield message
+    finally:
+        subscription.close()
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable
+
+from pytz import timezone
+from sqlalchemy import bindparam
+from sqlmodel import func, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.models.account import Account
+from app.models.account_bucket import AccountBucket
+from app.models.reconciliation import AccountReconciliation, ReconciliationRun
+from app.models.transaction import Transaction
+from app.services.balance_history import signed_column
+from app.services.summaries import IN_CHUNK_SIZE
+
+
+@dataclass
+class ChunkResult:
+    transactions: int = 0
+    accounts: int = 0
+
+
+# Resumo da última execução neste processo, exposto em /metrics
+last_run: dict[str, float] = {}
+
+
+async def check_accounts(session: AsyncSession, account_ids: list[int], full: bool = False) -> ChunkResult:
+    """
+    Confere as contas: trava cada uma (linha principal e buckets, em ordem de id)
+    para que nenhum lançamento esteja no meio do caminho, soma com sinal os
+    lançamentos depois do checkpoint da conta (todos, se `full`) e compara com o
+    saldo. Grava o resultado em account_reconciliation. Não faz commit.
+    """
+    result = await session.exec(
+        select(Account.id, Account.balance)
+        .where(Account.id.in_(account_ids))
+        .order_by(Account.id)
+        .with_for_update()
+    )
+    balances = dict(result.all())
+    result = await session.exec(
+        select(AccountBucket.account_id, AccountBucket.balance)
+        .where(AccountBucket.account_id.in_(account_ids))
+        .order_by(AccountBucket.account_id, AccountBucket.bucket)
+        .with_for_update()
+    )
+    for account_id, balance in result.all():
+        balances[account_id] += balance
+
+    result = await session.exec(
+        select(AccountReconciliation.account_id, AccountReconciliation.last_transaction_id,
+               AccountReconciliation.ledger_balance, AccountReconciliation.drift)
+        .where(AccountReconciliation.account_id.in_(account_ids))
+    )
+    states = {account_id: (last_id, ledger, drift) for account_id, last_id, ledger, drift in result.all()}
+
+    query = select(
+        Transaction.account_id, func.sum(signed_column()), func.count(), func.max(Transaction.id)
+    ).where(Transaction.account_id.in_(account_ids))
+    if not full:
+        # Só o que entrou depois do checkpoint de cada conta
+        query = query.outerjoin(
+            AccountReconciliation, AccountReconciliation.account_id == Transaction.account_id
+        ).where(Transaction.id > func.coalesce(AccountReconciliation.last_transaction_id, 0))
+    result = await session.exec(query.group_by(Transaction.account_id))
+    deltas = {account_id: (Decimal(net), count, last_id) for account_id, net, count, last_id in result.all()}
+
+    now = datetime.now(timezone("America/Recife"))
+    chunk = ChunkResult(accounts=len(balances))
+    inserts, updates = [], []
+    for account_id, balance in balances.items():
+        net, count, last_id = deltas.get(account_id, (Decimal(0), 0, None))
+        chunk.transactions += count
+        state = states.get(account_id)
+        if state and not full:
+            ledger = state[1] + net
+            last_id = last_id or state[0]
+        else:
+            ledger = net
+        drift = balance - ledger
+
+        if state is None:
+            inserts.append({
+                "account_id": account_id, "last_transaction_id": last_id or 0, "ledger_balance": ledger,
+                "balance": balance, "drift": drift, "checked_at": now,
+            })
+        elif count or full or drift != state[2]:
+            updates.append({
+                "r_account_id": account_id, "r_last_id": last_id or 0, "r_ledger": ledger,
+                "r_balance": balance, "r_drift": drift, "r_checked_at": now,
+            })
+
+    if inserts:
+        await session.exec(insert(AccountReconciliation), params=inserts)
+    if updates:
+        table = AccountReconciliation.__table__
+        await session.exec(
+            update(table)
+            .where(table.c.account_id == bindparam("r_account_id"))
+            .values(
+                last_transaction_id=bindparam("r_last_id"),
+                ledger_balance=bindparam("r_ledger"),
+                balance=bindparam("r_balance"),
+                drift=bindparam("r_drift"),
+                checked_at=bindparam("r_checked_at"),
+            ),
+            params=updates,
+        )
+    return chunk
+
+
+async def _accounts_to_check(session: AsyncSession, since_id: int, lookback: int) -> list[int]:
+    """
+    Contas com lançamentos depois de `since_id` (andando `lookback` ids para trás:
+    um id menor pode ter sido commitado depois do checkpoint) e as que estavam
+    divergentes na última conferência. Um id reservado mais de `lookback` ids antes
+    do checkpoint e commitado depois dele só é visto pela execução completa.
+    """
+    result = await session.exec(
+        select(Transaction.account_id).distinct().where(Transaction.id > max(since_id - lookback, 0))
+    )
+    account_ids = set(result.all())
+    result = await session.exec(select(AccountReconciliation.account_id).where(AccountReconciliation.drift != 0))
+    account_ids.update(result.all())
+    return sorted(account_ids)
+
+
+async def _all_accounts(session: AsyncSession) -> list[int]:
+    result = await session.exec(select(Account.id).order_by(Account.id))
+    return result.all()
+
+
+async def run(
+    session_factory: Callable[[], AsyncSession],
+    full: bool = False,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    lookback: int = IN_CHUNK_SIZE,
+) -> ReconciliationRun:
+    """
+    Uma execução: incremental (só contas com lançamentos depois do checkpoint da
+    última execução concluída) ou completa. As contas vão em blocos de
+    `chunk_size`, cada bloco na própria transação, com no máximo `concurrency`
+    blocos ao mesmo tempo. Devolve a linha de reconciliation_run já fechada.
+    """
+    started = time.perf_counter()
+    async with session_factory() as session:
+        result = await session.exec(
+            select(func.max(ReconciliationRun.last_transaction_id))
+            .where(ReconciliationRun.finished_at.is_not(None))
+        )
+        since_id = result.one() or 0
+        # Checkpoint desta execução: tudo até aqui será visto (as contas são travadas
+        # e lidas depois deste ponto)
+        result = await session.exec(select(func.coalesce(func.max(Transaction.id), 0)))
+        watermark = result.one()
+
+        run_row = ReconciliationRun(full=full, last_transaction_id=watermark)
+        session.add(run_row)
+        await session.commit()
+
+        if full or not since_id:
+            full = True
+            account_ids = await _all_accounts(session)
+        else:
+            account_ids = await _accounts_to_check(session, since_id, lookback)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check_chunk(chunk_ids: list[int]) -> ChunkResult:
+        async with semaphore:
+            async with session_factory() as session:
+                chunk = await check_accounts(session, chunk_ids, full)
+                await session.commit()
+        metrics.reconciliation_transactions.inc(amount=chunk.transactions)
+        return chunk
+
+    chunks = await asyncio.gather(*(
+        check_chunk(account_ids[i:i + chunk_size]) for i in range(0, len(account_ids), chunk_size)
+    ))
+
+    run_row.full = full
+    run_row.transactions_checked = sum(chunk.transactions for chunk in chunks)
+    run_row.accounts_checked = sum(chunk.accounts for chunk in chunks)
+    async with session_factory() as session:
+        # Divergências abertas, inclusive de contas que não precisaram ser relidas
+        result = await session.exec(
+            select(func.count(), func.coalesce(func.sum(func.abs(AccountReconciliation.drift)), 0))
+            .where(AccountReconciliation.drift != 0)
+        )
+        drifted, drift_total = result.one()
+        run_row.accounts_drifted = drifted
+        run_row.finished_at = datetime.now(timezone("America/Recife"))
+        session.add(run_row)
+        await session.commit()
+
+    last_run.update({
+        "reconciliation_last_run_seconds": time.perf_counter() - started,
+        "reconciliation_last_run_timestamp": time.time(),
+        "reconciliation_last_run_accounts": run_row.accounts_checked,
+        "reconciliation_last_run_transactions": run_row.transactions_checked,
+        "reconciliation_accounts_drifted": drifted,
+        "reconciliation_drift_amount": float(drift_total),
+    })
+    return run_row
+
+
+async def drifted_accounts(session: AsyncSession, limit: int = 100) -> list[tuple[str, AccountReconciliation]]:
+    result = await session.exec(
+        select(Account.number, AccountReconciliation)
+        .join(Account, Account.id == AccountReconciliation.account_id)
+        .where(AccountReconciliation.drift != 0)
+        .order_by(func.abs(AccountReconciliation.drift).desc(), AccountReconciliation.account_id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def reconciliation_loop(
+    session_factory: Callable[[], AsyncSession],
+    interval: float,
+    chunk_size: int,
+    concurrency: int,
+    lookback: int = IN_CHUNK_SIZE,
+) -> None:
+    """
+    Task de background: conciliação incremental a cada `interval` segundos.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            run_row = await run(session_factory, chunk_size=chunk_size, concurrency=concurrency, lookback=lookback)
+            if run_row.accounts_drifted:
+                print(f"⚠️  Conciliação: {run_row.accounts_drifted} conta(s) com saldo divergente")
+        except Exception as e:
+            print(f"❌ Erro na conciliação de saldos: {e}")
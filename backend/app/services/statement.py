@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionPublic
+
+CSV_HEADER = ["id", "data", "transaction_type", "amount", "description", "balance_after"]
+
+# Quantas linhas juntamos antes de mandar um pedaço para o cliente
+CHUNK_ROWS = 500
+
+# Colunas de TransactionPublic: listagens só de leitura selecionam só isso e recebem
+# tuplas, sem montar objetos do ORM (identity map, estado, eventos)
+PUBLIC_COLUMNS = [getattr(Transaction, name) for name in TransactionPublic.model_fields]
+
+
+def _row(transaction: Transaction) -> list:
+    return [
+        transaction.id,
+        transaction.data.isoformat(),
+        transaction.transaction_type.value,
+        str(transaction.amount),
+        transaction.description or "",
+        None if transaction.balance_after is None else str(transaction.balance_after),
+    ]
+
+
+async def iter_csv(transactions: AsyncIterable[Transaction]) -> AsyncIterator[str]:
+    """
+    Converte o fluxo de transações em CSV. O cabeçalho sai antes da primeira
+    linha do banco, então o cliente recebe o primeiro byte na hora.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    pending = 0
+
+    async for transaction in transactions:
+        writer.writerow(_row(transaction))
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue()
+
+
+async def iter_ndjson(transactions: AsyncIterable[Transaction]) -> AsyncIterator[str]:
+    """
+    Converte o fluxo de transações em NDJSON (um objeto JSON por linha).
+    O valor vai como string para não perder as casas decimais. A primeira linha
+    é enviada sozinha para o cliente não esperar o primeiro lote inteiro.
+    """
+    lines = []
+    first = True
+    async for transaction in transactions:
+        lines.append(json.dumps(dict(zip(CSV_HEADER, _row(transaction))), ensure_ascii=False))
+        if first or len(lines) >= CHUNK_ROWS:
+            first = False
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
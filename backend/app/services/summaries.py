@@ -0,0 +1,332 @@
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import and_, delete, func, insert, or_, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.account import Account
+from app.models.account_summary import AccountSummary, SummaryPeriod
+from app.models.transaction import Transaction, TransactionType
+from app.services import account_buckets
+
+# O Oracle aceita no máximo 1000 expressões numa lista IN
+IN_CHUNK_SIZE = 1000
+
+# Prefixo da linha de envio de uma transferência (ledger._sent_description)
+SENT_PREFIX = "Envio para "
+
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class PeriodTotals:
+    period_start: date
+    total_in: Decimal
+    total_out: Decimal
+    transaction_count: int
+    closing_balance: Decimal
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_period(period: SummaryPeriod, start: date) -> date:
+    if period == SummaryPeriod.DAY:
+        return start + timedelta(days=1)
+    return add_months(start, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """
+    Primeiro dia do mês `months` meses depois (ou antes) do mês de `day`.
+    """
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_count(period: SummaryPeriod, first: date, last: date) -> int:
+    if period == SummaryPeriod.DAY:
+        return (last - first).days + 1
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+
+def period_starts(period: SummaryPeriod, first: date, last: date) -> list[date]:
+    if period == SummaryPeriod.MONTH:
+        first, last = month_start(first), month_start(last)
+    starts = []
+    while first <= last:
+        starts.append(first)
+        first = next_period(period, first)
+    return starts
+
+
+def is_outgoing(transaction_type: TransactionType, description: str | None) -> bool:
+    """
+    Saques e a metade de envio das transferências tiram dinheiro da conta.
+    """
+    if transaction_type == TransactionType.WITHDRAW:
+        return True
+    return transaction_type == TransactionType.TRANSFER and (description or "").startswith(SENT_PREFIX)
+
+
+def _key(account_id: int, shard: int, period: SummaryPeriod, start: date):
+    return and_(
+        AccountSummary.account_id == account_id,
+        AccountSummary.shard == shard,
+        AccountSummary.period == period,
+        AccountSummary.period_start == start,
+    )
+
+
+def _increment(amount_in: Decimal, amount_out: Decimal, count: int) -> dict:
+    return {
+        "total_in": AccountSummary.total_in + amount_in,
+        "total_out": AccountSummary.total_out + amount_out,
+        "transaction_count": AccountSummary.transaction_count + count,
+    }
+
+
+async def record(
+    session: AsyncSession,
+    account_id: int,
+    day: date,
+    amount_in: Decimal = Decimal(0),
+    amount_out: Decimal = Decimal(0),
+    count: int = 1,
+    buckets: int = 0,
+) -> None:
+    """
+    Soma um lançamento nos totais do dia e do mês. Um único UPDATE acerta as duas
+    linhas; só no primeiro lançamento do período há INSERT. Contas com buckets usam
+    uma linha sorteada entre bucket_count para não disputarem o mesmo lock.
+    Não faz commit.
+    """
+    shard = random.randrange(buckets) if buckets else 0
+    keys = {SummaryPeriod.DAY: day, SummaryPeriod.MONTH: month_start(day)}
+
+    result = await session.exec(
+        update(AccountSummary)
+        .where(or_(*(_key(account_id, shard, period, start) for period, start in keys.items())))
+        .values(**_increment(amount_in, amount_out, count))
+        .returning(AccountSummary.period)
+        .execution_options(synchronize_session=False)
+    )
+    found = set(result.scalars().all())
+
+    for period, start in keys.items():
+        if period in found:
+            continue
+        try:
+            async with session.begin_nested():
+                await session.exec(insert(AccountSummary).values(
+                    account_id=account_id,
+                    period=period,
+                    period_start=start,
+                    shard=shard,
+                    total_in=amount_in,
+                    total_out=amount_out,
+                    transaction_count=count,
+                ))
+        except IntegrityError:
+            # Outra transação criou a linha do período primeiro: soma nela
+            await session.exec(
+                update(AccountSummary)
+                .where(_key(account_id, shard, period, start))
+                .values(**_increment(amount_in, amount_out, count))
+                .execution_options(synchronize_session=False)
+            )
+
+
+async def record_many(session: AsyncSession, day: date, totals: dict[int, tuple[Decimal, Decimal, int]]) -> None:
+    """
+    Versão em lote de `record` para contas sem buckets já travadas por quem chama
+    (transferência em lote): descobre as linhas existentes com consultas IN e grava
+    com um executemany de INSERT e outro de UPDATE. `totals` é
+    {account_id: (entrada, saída, quantidade)}. Não faz commit.
+    """
+    keys = {SummaryPeriod.DAY: day, SummaryPeriod.MONTH: month_start(day)}
+    account_ids = sorted(totals)
+
+    existing: set[tuple[int, SummaryPeriod]] = set()
+    for i in range(0, len(account_ids), IN_CHUNK_SIZE):
+        chunk = account_ids[i:i + IN_CHUNK_SIZE]
+        rows = await session.exec(
+            select(AccountSummary.account_id, AccountSummary.period)
+            .where(
+                AccountSummary.account_id.in_(chunk),
+                AccountSummary.shard == 0,
+                or_(*(and_(AccountSummary.period == period, AccountSummary.period_start == start)
+                      for period, start in keys.items())),
+            )
+        )
+        existing.update(rows.all())
+
+    inserts, updates = [], []
+    for account_id in account_ids:
+        amount_in, amount_out, count = totals[account_id]
+        for period, start in keys.items():
+            if (account_id, period) in existing:
+                updates.append({
+                    "s_account_id": account_id, "s_period": period, "s_start": start,
+                    "s_in": amount_in, "s_out": amount_out, "s_count": count,
+                })
+            else:
+                inserts.append({
+                    "account_id": account_id, "period": period, "period_start": start, "shard": 0,
+                    "total_in": amount_in, "total_out": amount_out, "transaction_count": count,
+                })
+
+    if inserts:
+        await session.exec(insert(AccountSummary), params=inserts)
+
+    if updates:
+        table = AccountSummary.__table__
+        await session.exec(
+            update(table)
+            .where(
+                table.c.account_id == bindparam("s_account_id"),
+                table.c.shard == 0,
+                table.c.period == bindparam("s_period"),
+                table.c.period_start == bindparam("s_start"),
+            )
+            .values(
+                total_in=table.c.total_in + bindparam("s_in"),
+                total_out=table.c.total_out + bindparam("s_out"),
+                transaction_count=table.c.transaction_count + bindparam("s_count"),
+            ),
+            params=updates,
+        )
+
+
+async def rebuild(session: AsyncSession, account_ids: list[int]) -> int:
+    """
+    Recalcula do zero os totais das contas a partir da tabela transaction. Trava as
+    contas (SELECT ... FOR UPDATE, em ordem de id) enquanto apaga e regrava os totais
+    e devolve quantos lançamentos foram lidos. Não faz commit.
+    """
+    await session.exec(
+        select(Account.id).where(Account.id.in_(account_ids)).order_by(Account.id).with_for_update()
+    )
+    await session.exec(delete(AccountSummary).where(AccountSummary.account_id.in_(account_ids)))
+
+    totals: dict[tuple[int, SummaryPeriod, date], list] = {}
+    read = 0
+    result = await session.stream(
+        select(Transaction.account_id, Transaction.transaction_type, Transaction.amount,
+               Transaction.description, Transaction.data)
+        .where(Transaction.account_id.in_(account_ids))
+        .execution_options(yield_per=IN_CHUNK_SIZE)
+    )
+    async for account_id, transaction_type, amount, description, data in result:
+        read += 1
+        outgoing = is_outgoing(transaction_type, description)
+        day = data.date()
+        for key in ((account_id, SummaryPeriod.DAY, day), (account_id, SummaryPeriod.MONTH, month_start(day))):
+            row = totals.setdefault(key, [Decimal(0), Decimal(0), 0])
+            row[1 if outgoing else 0] += amount
+            row[2] += 1
+
+    if totals:
+        await session.exec(insert(AccountSummary), params=[
+            {
+                "account_id": account_id, "period": period, "period_start": start, "shard": 0,
+                "total_in": total_in, "total_out": total_out, "transaction_count": count,
+            }
+            for (account_id, period, start), (total_in, total_out, count) in totals.items()
+        ])
+    return read
+
+
+async def backfill(session_factory: Callable[[], AsyncSession], chunk_size: int = 500) -> tuple[int, int]:
+    """
+    Refaz os totais de todas as contas, `chunk_size` contas por transação.
+    Devolve (contas, lançamentos) processados.
+    """
+    accounts = transactions = 0
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.exec(
+                select(Account.id).where(Account.id > last_id).order_by(Account.id).limit(chunk_size)
+            )
+            account_ids = result.all()
+            if not account_ids:
+                return accounts, transactions
+
+            transactions += await rebuild(session, account_ids)
+            await session.commit()
+
+        accounts += len(account_ids)
+        last_id = account_ids[-1]
+
+
+async def _net_after(session: AsyncSession, account_id: int, period: SummaryPeriod, last: date) -> Decimal:
+    """
+    Entradas menos saídas de tudo o que veio depois do período `last`: meses inteiros
+    pelas linhas mensais e, para dias, o resto do mês pelas linhas diárias.
+    """
+    conditions = [and_(AccountSummary.period == SummaryPeriod.MONTH, AccountSummary.period_start > month_start(last))]
+    if period == SummaryPeriod.DAY:
+        conditions.append(and_(
+            AccountSummary.period == SummaryPeriod.DAY,
+            AccountSummary.period_start > last,
+            AccountSummary.period_start < add_months(last, 1),
+        ))
+
+    result = await session.exec(
+        select(func.coalesce(func.sum(AccountSummary.total_in - AccountSummary.total_out), 0))
+        .where(AccountSummary.account_id == account_id, or_(*conditions))
+    )
+    return Decimal(result.one())
+
+
+async def get_summary(
+    session: AsyncSession,
+    account: Account,
+    period: SummaryPeriod,
+    first: date,
+    last: date,
+) -> list[PeriodTotals]:
+    """
+    Totais por período entre `first` e `last` (inclusive), incluindo os períodos sem
+    movimento. O saldo de fechamento sai do saldo atual menos o líquido dos períodos
+    seguintes, então o custo depende do número de períodos e não de lançamentos.
+    """
+    starts = period_starts(period, first, last)
+    if not starts:
+        return []
+
+    result = await session.exec(
+        select(
+            AccountSummary.period_start,
+            func.sum(AccountSummary.total_in),
+            func.sum(AccountSummary.total_out),
+            func.sum(AccountSummary.transaction_count),
+        )
+        .where(
+            AccountSummary.account_id == account.id,
+            AccountSummary.period == period,
+            AccountSummary.period_start >= starts[0],
+            AccountSummary.period_start <= starts[-1],
+        )
+        .group_by(AccountSummary.period_start)
+    )
+    rows = {start: (Decimal(total_in), Decimal(total_out), int(count)) for start, total_in, total_out, count in result.all()}
+
+    balance = await account_buckets.total_balance(session, account)
+    closing = balance - await _net_after(session, account.id, period, starts[-1])
+
+    totals = []
+    for start in reversed(starts):
+        total_in, total_out, count = rows.get(start, (ZERO, ZERO, 0))
+        totals.append(PeriodTotals(start, total_in, total_out, count, closing))
+        closing -= total_in - total_out
+
+    totals.reverse()
+    return totals
@@ -0,0 +1,163 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from sqlmodel import and_, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.account import Account
+from app.models.account_summary import AccountSummary, SummaryPeriod
+from app.models.transaction import Transaction, TransactionType
+from app.services.statement import PUBLIC_COLUMNS
+from app.services.summaries import month_start
+
+
+@dataclass
+class SearchFilters:
+    transaction_type: TransactionType | None = None
+    min_amount: Decimal | None = None
+    max_amount: Decimal | None = None
+    # [start, end), no horário de Recife
+    start: datetime | None = None
+    end: datetime | None = None
+    # Número da conta do outro lado da transferência
+    counterparty: str | None = None
+    # Texto na descrição
+    text: str | None = None
+
+    @property
+    def only_dates(self) -> bool:
+        return (
+            self.transaction_type is None
+            and self.min_amount is None
+            and self.max_amount is None
+            and self.counterparty is None
+            and not self.text
+        )
+
+
+def _text_condition(dialect: str, text: str):
+    """
+    No Oracle, busca por palavras com CONTAINS no índice Oracle Text (cada palavra
+    entre chaves para não ser lida como operador). Nos outros bancos, substring
+    sem diferenciar maiúsculas, filtrada dentro das linhas da conta.
+    """
+    words = re.findall(r"\w+", text)
+    if dialect == "oracle" and words:
+        return func.contains(Transaction.description, " AND ".join(f"{{{word}}}" for word in words)) > 0
+    return func.lower(Transaction.description).contains(text.lower(), autoescape=True)
+
+
+async def filtered_query(session: AsyncSession, account_id: int, filters: SearchFilters, *columns) -> Select | None:
+    """
+    SELECT de `columns` nos lançamentos da conta com os filtros aplicados. Cada filtro
+    encosta num índice que começa por account_id. None quando a contraparte não existe
+    (nenhuma linha pode bater).
+    """
+    query = select(*columns).where(Transaction.account_id == account_id)
+
+    if filters.transaction_type:
+        query = query.where(Transaction.transaction_type == filters.transaction_type)
+    if filters.min_amount is not None:
+        query = query.where(Transaction.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        query = query.where(Transaction.amount <= filters.max_amount)
+    if filters.start:
+        query = query.where(Transaction.data >= filters.start)
+    if filters.end:
+        query = query.where(Transaction.data < filters.end)
+    if filters.counterparty:
+        result = await session.exec(select(Account.id).where(Account.number == filters.counterparty))
+        counterparty_id = result.first()
+        if counterparty_id is None:
+            return None
+        query = query.where(Transaction.counterparty_account_id == counterparty_id)
+    if filters.text:
+        query = query.where(_text_condition(session.bind.dialect.name, filters.text))
+    return query
+
+
+async def approximate_total(
+    session: AsyncSession,
+    account_id: int,
+    filters: SearchFilters,
+    cap: int,
+) -> tuple[int, bool]:
+    """
+    Total de lançamentos que batem com os filtros, sem COUNT(*) na conta inteira.
+    Devolve (total, exato):
+
+    - só período (ou nada): soma os totais mensais de account_summary, no máximo uma
+      linha por mês. Exato sem período; com período, conta os meses das pontas inteiros;
+    - outros filtros: conta até `cap` + 1 linhas pelo índice do filtro e para. Acima
+      disso devolve (cap, False).
+    """
+    if filters.only_dates:
+        query = select(func.coalesce(func.sum(AccountSummary.transaction_count), 0)).where(
+            AccountSummary.account_id == account_id,
+            AccountSummary.period == SummaryPeriod.MONTH,
+        )
+        if filters.start:
+            query = query.where(AccountSummary.period_start >= month_start(filters.start.date()))
+        if filters.end:
+            query = query.where(AccountSummary.period_start <= month_start(filters.end.date()))
+        result = await session.exec(query)
+        return int(result.one()), filters.start is None and filters.end is None
+
+    query = await filtered_query(session, account_id, filters, Transaction.id)
+    if query is None:
+        return 0, True
+    result = await session.exec(select(func.count()).select_from(query.limit(cap + 1).subquery()))
+    count = result.one()
+    return min(count, cap), count <= cap
+
+
+async def page(
+    session: AsyncSession,
+    account_id: int,
+    filters: SearchFilters,
+    cursor: str | None,
+    limit: int,
+    count_cap: int,
+) -> dict:
+    """
+    Uma página do extrato, mais recentes primeiro, com paginação por cursor (keyset)
+    em (data, id): o banco desce direto pelo índice, sem varrer as linhas já vistas.
+    Só as colunas públicas, em tuplas, prontas para o FastJSONResponse. A primeira
+    página traz o total aproximado. Levanta ValueError se o cursor for inválido.
+    """
+    if cursor:
+        last_data, last_id = decode_cursor(cursor)
+
+    query = await filtered_query(session, account_id, filters, *PUBLIC_COLUMNS)
+    if query is None:
+        return {"items": [], "next_cursor": None, "total": 0, "total_exact": True}
+
+    query = query.order_by(Transaction.data.desc(), Transaction.id.desc()).limit(limit + 1)
+    if cursor:
+        query = query.where(or_(
+            Transaction.data < last_data,
+            and_(Transaction.data == last_data, Transaction.id < last_id),
+        ))
+
+    result = await session.exec(query)
+    transactions = result.all()
+
+    # Buscamos uma linha a mais só para saber se existe próxima página
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.data, last.id)
+
+    body = {"items": [row._asdict() for row in transactions], "next_cursor": next_cursor, "total": None, "total_exact": None}
+    if not cursor:
+        if next_cursor is None:
+            # Coube tudo numa página: a contagem é a própria página
+            body["total"], body["total_exact"] = len(transactions), True
+        else:
+            body["total"], body["total_exact"] = await approximate_total(session, account_id, filters, count_cap)
+    return body
@@ -0,0 +1,319 @@
+import asyncio
+import csv
+import json
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator
+
+from pytz import timezone
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.security import get_password_hash
+from app.models.account import Account
+from app.models.user import User
+from app.services.summaries import IN_CHUNK_SIZE
+
+# Colunas aceitas no CSV/NDJSON. A conta de cada usuário é criada pela trigger do
+# banco, como no cadastro pela API; account_number (opcional) troca o número que ela
+# deu. Sem a trigger (SQLite local), a conta é criada aqui, com o número pedido ou o
+# id do usuário com 10 dígitos, como no seed_ledger.
+REQUIRED_FIELDS = ("email", "full_name", "password")
+EMAIL_MAX_LENGTH = 255
+FULL_NAME_MAX_LENGTH = 255
+ACCOUNT_NUMBER_MAX_LENGTH = 20
+
+
+@dataclass
+class ImportRow:
+    line: int
+    email: str
+    full_name: str
+    password: str
+    account_number: str | None = None
+
+
+@dataclass
+class RowError:
+    line: int
+    email: str | None
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    created: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+
+def read_rows(path: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Lê o arquivo linha a linha, sem carregar tudo na memória. Arquivos .ndjson/.jsonl
+    têm um objeto JSON por linha; o resto é CSV com cabeçalho. Devolve
+    (número da linha, campos) e campos None quando a linha não é um JSON válido.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line, text in enumerate(file, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    raw = json.loads(text)
+                except json.JSONDecodeError:
+                    raw = None
+                yield line, raw if isinstance(raw, dict) else None
+        else:
+            reader = csv.DictReader(file)
+            for raw in reader:
+                yield reader.line_num, raw
+
+
+def validate(line: int, raw: dict | None) -> ImportRow | RowError:
+    if raw is None:
+        return RowError(line, None, "linha ilegível")
+
+    values = {name: str(raw.get(name) or "").strip() for name in (*REQUIRED_FIELDS, "account_number")}
+    # A senha vai como veio: espaços fazem parte dela
+    values["password"] = str(raw.get("password") or "")
+    email = values["email"] or None
+
+    missing = [name for name in REQUIRED_FIELDS if not values[name]]
+    if missing:
+        return RowError(line, email, f"campo(s) obrigatório(s) vazio(s): {', '.join(missing)}")
+    if "@" not in values["email"] or len(values["email"]) > EMAIL_MAX_LENGTH:
+        return RowError(line, email, "email inválido")
+    if len(values["full_name"]) > FULL_NAME_MAX_LENGTH:
+        return RowError(line, email, f"full_name com mais de {FULL_NAME_MAX_LENGTH} caracteres")
+    if len(values["account_number"]) > ACCOUNT_NUMBER_MAX_LENGTH:
+        return RowError(line, email, f"account_number com mais de {ACCOUNT_NUMBER_MAX_LENGTH} caracteres")
+
+    return ImportRow(
+        line=line,
+        email=values["email"],
+        full_name=values["full_name"],
+        password=values["password"],
+        account_number=values["account_number"] or None,
+    )
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Roda num processo do pool: um Argon2 por senha, com os parâmetros do Settings.
+    """
+    return [get_password_hash(password) for password in passwords]
+
+
+async def _existing(session: AsyncSession, column, values: list[str]) -> set[str]:
+    found: set[str] = set()
+    for i in range(0, len(values), IN_CHUNK_SIZE):
+        result = await session.exec(select(column).where(column.in_(values[i:i + IN_CHUNK_SIZE])))
+        found.update(result.all())
+    return found
+
+
+async def _drop_taken(session: AsyncSession, rows: list[ImportRow], report: ImportReport) -> list[ImportRow]:
+    """
+    Tira do lote os emails e números de conta que já existem no banco, com uma
+    consulta IN por bloco de 1000 em vez de uma por usuário.
+    """
+    emails = await _existing(session, User.email, [row.email for row in rows])
+    numbers = await _existing(session, Account.number, [row.account_number for row in rows if row.account_number])
+
+    kept = []
+    for row in rows:
+        if row.email in emails:
+            report.errors.append(RowError(row.line, row.email, "email já cadastrado"))
+        elif row.account_number in numbers:
+            report.errors.append(RowError(row.line, row.email, "account_number já existe"))
+        else:
+            kept.append(row)
+    return kept
+
+
+def _hash_in_pool(pool: Executor, workers: int, passwords: list[str]) -> asyncio.Future:
+    """
+    Divide as senhas do lote em `workers` fatias e calcula cada uma num processo.
+    """
+    loop = asyncio.get_running_loop()
+    size = max(1, -(-len(passwords) // workers))
+    futures = [
+        loop.run_in_executor(pool, hash_passwords, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ]
+    return asyncio.gather(*futures)
+
+
+async def _insert(session: AsyncSession, rows: list[ImportRow], hashes: list[str]) -> None:
+    """
+    Um executemany para os usuários. Os ids gerados voltam por email, em consultas
+    IN: INSERT ... RETURNING com a ordem dos parâmetros garantida vira um INSERT
+    por linha em alguns drivers. As contas criadas pela trigger ganham o
+    account_number pedido num executemany; usuários sem conta (banco sem a trigger)
+    ganham uma aqui. Um número repetido estoura a restrição única e o lote cai no
+    caminho linha a linha, que recusa só a linha em conflito.
+    """
+    now = datetime.now(timezone("America/Recife"))
+    await session.exec(insert(User), params=[
+        {
+            "email": row.email,
+            "full_name": row.full_name,
+            "is_active": True,
+            "is_superuser": False,
+            "hashed_password": hashed,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for row, hashed in zip(rows, hashes)
+    ])
+
+    user_ids: dict[str, int] = {}
+    for i in range(0, len(rows), IN_CHUNK_SIZE):
+        result = await session.exec(
+            select(User.email, User.id).where(User.email.in_([row.email for row in rows[i:i + IN_CHUNK_SIZE]]))
+        )
+        user_ids.update(result.all())
+
+    accounts: dict[int, int] = {}
+    ids = list(user_ids.values())
+    for i in range(0, len(ids), IN_CHUNK_SIZE):
+        result = await session.exec(
+            select(Account.user_id, Account.id).where(Account.user_id.in_(ids[i:i + IN_CHUNK_SIZE]))
+        )
+        accounts.update(result.all())
+
+    renumbered = [
+        {"a_id": accounts[user_ids[row.email]], "a_number": row.account_number}
+        for row in rows
+        if row.account_number and user_ids[row.email] in accounts
+    ]
+    if renumbered:
+        table = Account.__table__
+        await session.exec(
+            update(table).where(table.c.id == bindparam("a_id")).values(number=bindparam("a_number")),
+            params=renumbered,
+        )
+
+    missing = [row for row in rows if user_ids[row.email] not in accounts]
+    if missing:
+        await session.exec(insert(Account), params=[
+            {
+                "number": row.account_number or f"{user_ids[row.email]:010d}",
+                "balance": Decimal(0),
+                "user_id": user_ids[row.email],
+                "bucket_count": 0,
+                "created_at": now,
+            }
+            for row in missing
+        ])
+
+
+async def _insert_one_by_one(session: AsyncSession, rows: list[ImportRow], hashes: list[str], report: ImportReport) -> int:
+    """
+    Caminho lento para o lote que esbarrou numa restrição única (alguém cadastrou o
+    mesmo email pela API no meio da carga): cada linha no próprio savepoint.
+    """
+    created = 0
+    for row, hashed in zip(rows, hashes):
+        try:
+            async with session.begin_nested():
+                await _insert(session, [row], [hashed])
+            created += 1
+        except IntegrityError:
+            report.errors.append(RowError(row.line, row.email, "email ou account_number já existe"))
+    return created
+
+
+async def _write(
+    session_factory: Callable[[], AsyncSession],
+    rows: list[ImportRow],
+    hashing: asyncio.Future,
+    report: ImportReport,
+) -> None:
+    hashes = [hashed for chunk in await hashing for hashed in chunk]
+    async with session_factory() as session:
+        try:
+            await _insert(session, rows, hashes)
+            await session.commit()
+            report.created += len(rows)
+            return
+        except IntegrityError:
+            await session.rollback()
+
+        report.created += await _insert_one_by_one(session, rows, hashes, report)
+        await session.commit()
+
+
+async def import_users(
+    session_factory: Callable[[], AsyncSession],
+    lines: Iterable[tuple[int, dict | None]],
+    pool: Executor,
+    workers: int,
+    batch_size: int = 1000,
+    on_batch: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Cadastra usuários e contas em lotes de `batch_size`, um commit por lote. Linhas
+    inválidas, emails repetidos no arquivo e emails/contas que já existem no banco
+    não param a carga: vão para report.errors com o número da linha.
+
+    O Argon2 é o gargalo, então os hashes rodam no `pool` de processos e o lote
+    seguinte já é validado e mandado para o pool enquanto o anterior é gravado.
+    """
+    report = ImportReport()
+    seen_emails: set[str] = set()
+    seen_numbers: set[str] = set()
+    pending: tuple[list[ImportRow], asyncio.Future] | None = None
+
+    def batches() -> Iterator[list[ImportRow]]:
+        batch = []
+        for line, raw in lines:
+            report.read += 1
+            row = validate(line, raw)
+            if isinstance(row, RowError):
+                report.errors.append(row)
+            elif row.email in seen_emails:
+                report.errors.append(RowError(line, row.email, "email repetido no arquivo"))
+            elif row.account_number and row.account_number in seen_numbers:
+                report.errors.append(RowError(line, row.email, "account_number repetido no arquivo"))
+            else:
+                seen_emails.add(row.email)
+                if row.account_number:
+                    seen_numbers.add(row.account_number)
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    try:
+        for batch in batches():
+            async with session_factory() as session:
+                batch = await _drop_taken(session, batch, report)
+            if not batch:
+                continue
+
+            hashing = _hash_in_pool(pool, workers, [row.password for row in batch])
+            if pending:
+                await _write(session_factory, *pending, report)
+                if on_batch:
+                    on_batch(report)
+            pending = (batch, hashing)
+
+        if pending:
+            await _write(session_factory, *pending, report)
+            if on_batch:
+                on_batch(report)
+    except BaseException:
+        if pending:
+            # Não deixa o gather do lote em espera com exceção sem dono
+            pending[1].cancel()
+        raise
+
+    report.errors.sort(key=lambda error: error.line)
+    return report
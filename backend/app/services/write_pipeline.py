@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session, remember_writer
+from app.models.transaction import Transaction, TransactionType
+from app.services import ledger
+
+
+@dataclass
+class LedgerOperation:
+    account_id: int
+    transaction_type: TransactionType
+    amount: Decimal
+    description: str | None = None
+    buckets: int = 0
+    # Dono da conta: depois do commit passa a ler do primário (read-your-writes)
+    user_id: int | None = None
+
+
+class GroupCommitPipeline:
+    """
+    Fila de depósitos/saques vindos de várias requisições ao mesmo tempo. Um único
+    consumidor junta o que chegou numa janela de `window_ms` (ou até `max_ops`
+    operações) e grava tudo numa transação só: um commit, e os INSERTs do extrato
+    saem num executemany. Cada requisição recebe o próprio resultado ou erro.
+
+    Uma operação recusada (saldo insuficiente, valor inválido) não derruba o lote:
+    os UPDATEs condicionais do ledger não alteram nada quando falham. Já um erro de
+    banco no commit falha todas as operações do lote.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], window_ms: int, max_ops: int):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_ops = max_ops
+        self._pending: list[tuple[LedgerOperation, asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            # Contexto vazio: o consumidor não pode herdar o usuário nem as métricas da
+            # requisição que por acaso o iniciou
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        """
+        Grava o que ainda estiver na fila e encerra o consumidor.
+        """
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, operation: LedgerOperation) -> Transaction:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((operation, future))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            if not self._pending:
+                if self._closing:
+                    return
+                continue
+
+            # Janela de agrupamento: espera mais operações até o prazo ou até encher o lote
+            deadline = loop.time() + self.window
+            while len(self._pending) < self.max_ops and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+
+            batch = self._pending[:self.max_ops]
+            self._pending = self._pending[self.max_ops:]
+            await self._flush(batch)
+
+            if self._pending or self._closing:
+                self._wakeup.set()
+
+    async def _flush(self, batch: list[tuple[LedgerOperation, asyncio.Future]]) -> None:
+        accepted: list[tuple[LedgerOperation, Transaction, asyncio.Future]] = []
+        rejected: list[tuple[ledger.LedgerError, asyncio.Future]] = []
+
+        try:
+            async with self.session_factory() as session:
+                for operation, future in batch:
+                    try:
+                        transaction = await ledger.post_transaction(
+                            session,
+                            account_id=operation.account_id,
+                            transaction_type=operation.transaction_type,
+                            amount=operation.amount,
+                            description=operation.description,
+                            buckets=operation.buckets,
+                        )
+                    except ledger.LedgerError as e:
+                        rejected.append((e, future))
+                        continue
+                    accepted.append((operation, transaction, future))
+
+                if accepted:
+                    await session.flush()
+                    # Relê as linhas gravadas de uma vez só (valores como o banco guardou)
+                    ids = [transaction.id for _, transaction, _ in accepted]
+                    await session.exec(
+                        select(Transaction)
+                        .where(Transaction.id.in_(ids))
+                        .execution_options(populate_existing=True)
+                    )
+                    await session.commit()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for operation, transaction, future in accepted:
+            if operation.user_id is not None:
+                remember_writer(operation.user_id)
+            if not future.done():
+                future.set_result(transaction)
+        for error, future in rejected:
+            if not future.done():
+                future.set_exception(error)
+
+
+_pipeline: GroupCommitPipeline | None = None
+
+
+def get_pipeline() -> GroupCommitPipeline:
+    """
+    Pipeline do processo, criado na primeira chamada com a sessão e o Settings da aplicação.
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = GroupCommitPipeline(
+            async_session,
+            window_ms=settings.LEDGER_GROUP_COMMIT_WINDOW_MS,
+            max_ops=settings.LEDGER_GROUP_COMMIT_MAX_OPS,
+        )
+    return _pipeline
+
+
+async def shutdown() -> None:
+    if _pipeline is not None:
+        await _pipeline.stop()
@@ -0,0 +1,179 @@
+"""
+Carga e latência da API rodando em processo (httpx + ASGI) contra um banco local.
+
+Cada workload (register, login, deposit, withdraw, transfer, statement) roda
+`--ops` operações com `--concurrency` requisições simultâneas e reporta
+throughput e latência p50/p95/p99. O esquema sai do mesmo metadata do SQLModel
+que gera as migrações do Alembic (as migrações em si têm DDL específico do Oracle).
+
+    python -m benchmarks.api_load --ops 500 --concurrency 20 --save baseline.json
+    python -m benchmarks.api_load --baseline baseline.json --max-regression 0.2
+
+Com --baseline o processo sai com código 1 se algum workload piorar além do limite
+(throughput caiu ou p95 subiu mais que --max-regression).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+WORKLOADS = ("register", "login", "deposit", "withdraw", "transfer", "statement")
+LOGIN_EMAIL = "login@vertex.local"
+LOGIN_PASSWORD = "senha-benchmark"
+
+
+async def _prepare(async_session, customers: int) -> list[tuple]:
+    from app.core.security import get_password_hash
+    from app.models.user import User
+
+    created = [
+        await create_customer(async_session, i, balance=Decimal("1000000.00"))
+        for i in range(customers)
+    ]
+    async with async_session() as session:
+        session.add(User(email=LOGIN_EMAIL, full_name="Login", hashed_password=get_password_hash(LOGIN_PASSWORD)))
+        await session.commit()
+    return created
+
+
+def _operation(name: str, client, customers: list[tuple]):
+    async def register(i):
+        return await client.post("/api/v1/users/", json={
+            "email": f"novo{i}-{time.monotonic_ns()}@vertex.local",
+            "full_name": f"Novo {i}",
+            "password": "senha-benchmark",
+        })
+
+    async def login(i):
+        return await client.post("/api/v1/login", data={"username": LOGIN_EMAIL, "password": LOGIN_PASSWORD})
+
+    async def deposit(i):
+        _, _, headers = customers[i % len(customers)]
+        return await client.post("/api/v1/transactions/transaction",
+                                  json={"amount": "10.00", "transaction_type": "deposit"}, headers=headers)
+
+    async def withdraw(i):
+        _, _, headers = customers[i % len(customers)]
+        return await client.post("/api/v1/transactions/transaction",
+                                  json={"amount": "1.00", "transaction_type": "withdraw"}, headers=headers)
+
+    async def transfer(i):
+        _, _, headers = customers[i % len(customers)]
+        _, target, _ = customers[(i + 1) % len(customers)]
+        return await client.post("/api/v1/transactions/transfer",
+                                  json={"target_account_number": target.number, "amount": "1.00"}, headers=headers)
+
+    async def statement(i):
+        _, _, headers = customers[i % len(customers)]
+        return await client.get("/api/v1/transactions/", params={"limit": 50}, headers=headers)
+
+    return locals()[name]
+
+
+async def run_workload(operation, ops: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await operation(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(ops)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "ops": ops,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput": round(ops / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for name, base in baseline["results"].items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["throughput"] < base["throughput"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {current['throughput']} < baseline {base['throughput']}")
+        if current["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms > baseline {base['p95_ms']}ms")
+    return regressions
+
+
+async def main(args) -> int:
+    # Sob concorrência o SQLite serializa escritas e o log de query lenta poluiria a tabela
+    logging.getLogger("app.db.slow").setLevel(logging.ERROR)
+
+    results = {}
+    async with stand_in_app(args.url) as (client, async_session, _):
+        customers = await _prepare(async_session, args.customers)
+
+        for name in args.workloads:
+            # Login e cadastro pagam Argon2; rodam menos operações para não dominar o tempo total
+            ops = args.hash_ops if name in ("register", "login") else args.ops
+            results[name] = await run_workload(_operation(name, client, customers), ops, args.concurrency)
+            r = results[name]
+            print(f"{name:<10} {r['throughput']:>9.1f} op/s  p50 {r['p50_ms']:>8.2f}ms  "
+                  f"p95 {r['p95_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  erros {r['errors']}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "url": args.url or "sqlite (temporário)",
+            "concurrency": args.concurrency,
+            "customers": args.customers,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados salvos em {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print("REGRESSÃO em relação ao baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("Sem regressões em relação ao baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do banco (padrão: SQLite temporário)")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--ops", type=int, default=500, help="operações por workload")
+    parser.add_argument("--hash-ops", type=int, default=50, help="operações para register/login (Argon2)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--save", help="grava o resultado em JSON (baseline)")
+    parser.add_argument("--baseline", help="compara com um JSON salvo antes")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="tolerância relativa (0.2 = 20%%)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
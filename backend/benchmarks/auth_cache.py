@@ -0,0 +1,56 @@
+"""
+Compara quantas queries cada requisição autenticada faz com e sem o cache de
+autenticação (AUTH_CACHE_ENABLED). As rotas de transação usam get_current_account
+(usuário + conta num JOIN só); /users/me usa get_current_user e sai inteiro do cache.
+
+    python -m benchmarks.auth_cache --requests 200
+"""
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+from benchmarks.common import create_customer, stand_in_app
+
+
+async def run(client, counter, headers, requests: int) -> tuple[float, float]:
+    counter.reset()
+    started = time.perf_counter()
+    for i in range(requests):
+        if i % 3 == 0:
+            response = await client.get("/api/v1/users/me", headers=headers)
+        elif i % 3 == 1:
+            response = await client.get("/api/v1/transactions/", headers=headers)
+        else:
+            response = await client.post(
+                "/api/v1/transactions/transaction",
+                json={"amount": "1.00", "transaction_type": "deposit"},
+                headers=headers,
+            )
+        response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return counter.count / requests, requests / elapsed
+
+
+async def main(url: str | None, requests: int):
+    from app.api import deps
+    from app.core.config import settings
+
+    async with stand_in_app(url) as (client, async_session, counter):
+        _, _, headers = await create_customer(async_session, 0, balance=Decimal("100.00"))
+
+        for enabled in (False, True):
+            settings.AUTH_CACHE_ENABLED = enabled
+            deps.token_cache.clear()
+            deps.user_cache.clear()
+            queries, throughput = await run(client, counter, headers, requests)
+            label = "com cache" if enabled else "sem cache"
+            print(f"{label}: {queries:.2f} queries/requisição, {throughput:.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do banco (padrão: SQLite temporário)")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.requests))
@@ -0,0 +1,99 @@
+"""
+Utilitários compartilhados pelos benchmarks: sobe a API em processo, trocando o
+Oracle por um banco local (SQLite via `aiosqlite` por padrão) e contando as queries.
+"""
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Os benchmarks não falam com o Oracle; valores fictícios só para o Settings carregar
+for _name in ("SECRET_KEY", "ORACLE_USER", "ORACLE_PASSWORD", "ORACLE_SERVICE",
+              "ORACLE_WALLET_DIR", "ORACLE_WALLET_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark-" + _name.lower())
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def default_url() -> str:
+    return f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self) -> None:
+        self.count = 0
+
+
+@asynccontextmanager
+async def stand_in_app(url: str | None = None):
+    """
+    Cria as tabelas no banco local, aponta o get_session da API para ele e
+    devolve (cliente httpx, fábrica de sessões, contador de queries).
+    """
+    from app.main import app
+    from app.core import metrics
+    from app.core.db import get_session
+
+    url = url or default_url()
+    engine = create_async_engine(url, connect_args={"timeout": 30} if url.startswith("sqlite") else {})
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_session():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    counter = QueryCounter(engine)
+    metrics.instrument_engine(engine)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            yield client, async_session, counter
+        finally:
+            app.dependency_overrides.pop(get_session, None)
+            await engine.dispose()
+
+
+async def create_customer(async_session, index: int, balance=0):
+    """
+    Cria usuário + conta direto no banco e devolve (user, account, headers com o token).
+    """
+    from app.core.security import create_access_token
+    from app.models.account import Account
+    from app.models.user import User
+
+    async with async_session() as session:
+        user = User(email=f"bench{index}@vertex.local", full_name=f"Bench {index}", hashed_password="-")
+        session.add(user)
+        await session.flush()
+        account = Account(number=f"BENCH{index:06d}", balance=balance, user_id=user.id)
+        session.add(account)
+        await session.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(subject=user.id)}"}
+    return user, account, headers
@@ -0,0 +1,126 @@
+"""
+GET condicional (ETag / If-None-Match) em /users/account e /transactions/:
+
+1. o ciclo de atualização do dashboard (conta + extrato) sem e com If-None-Match:
+   queries por ciclo e latência; o 304 sai só com a query de autenticação;
+2. cada escrita do ledger muda o ETag (depósito na conta, transferência nas duas
+   pontas); filtros diferentes e contas diferentes nunca dividem ETag;
+3. conta com buckets: crédito num bucket muda o ETag e desligar os buckets não
+   faz a versão voltar para um valor já visto.
+
+    python -m benchmarks.conditional_get --rows 2000 --polls 500
+"""
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+ROUTES = ("/api/v1/users/account", "/api/v1/transactions/")
+
+
+async def poll(client, headers, tags: dict | None = None) -> tuple[list[int], dict]:
+    statuses, new_tags = [], {}
+    for route in ROUTES:
+        request_headers = dict(headers)
+        if tags is not None:
+            request_headers["If-None-Match"] = tags[route]
+        response = await client.get(route, headers=request_headers)
+        statuses.append(response.status_code)
+        new_tags[route] = response.headers["ETag"]
+        if response.status_code == 304:
+            assert response.content == b""
+    return statuses, new_tags
+
+
+async def main(rows: int, polls: int):
+    from app.models.account import Account
+    from app.services import account_buckets
+
+    async with stand_in_app() as (client, async_session, counter):
+        _, account, headers = await create_customer(async_session, 0)
+        _, other, other_headers = await create_customer(async_session, 1, balance=Decimal("100.00"))
+        for _ in range(rows):
+            (await client.post("/api/v1/transactions/transaction", headers=headers, json={
+                "amount": "1.00", "transaction_type": "deposit",
+            })).raise_for_status()
+
+        # 1. Ciclo do dashboard
+        _, tags = await poll(client, headers)
+        results = {}
+        for label, conditional in (("sem If-None-Match", False), ("com If-None-Match", True)):
+            samples = []
+            counter.reset()
+            for _ in range(polls):
+                started = time.perf_counter()
+                statuses, _ = await poll(client, headers, tags if conditional else None)
+                samples.append((time.perf_counter() - started) * 1000)
+                assert statuses == ([304, 304] if conditional else [200, 200]), statuses
+            results[label] = (counter.count / polls, percentile(samples, 50), percentile(samples, 99))
+            print(f"{label:<18} {results[label][0]:.1f} queries/ciclo  p50 {results[label][1]:6.2f}ms  "
+                  f"p99 {results[label][2]:6.2f}ms")
+        assert results["com If-None-Match"][0] == len(ROUTES)
+
+        # 2. Escritas mudam o ETag
+        (await client.post("/api/v1/transactions/transaction", headers=headers, json={
+            "amount": "1.00", "transaction_type": "deposit",
+        })).raise_for_status()
+        statuses, tags = await poll(client, headers, tags)
+        assert statuses == [200, 200], statuses
+        assert (await client.get(ROUTES[0], headers=headers)).json()["balance"] == f"{rows + 1}.00"
+
+        _, other_tags = await poll(client, other_headers)
+        assert not set(tags.values()) & set(other_tags.values())
+        (await client.post("/api/v1/transactions/transfer", headers=other_headers, json={
+            "amount": "5.00", "target_account_number": account.number,
+        })).raise_for_status()
+        assert (await poll(client, headers, tags))[0] == [200, 200]
+        assert (await poll(client, other_headers, other_tags))[0] == [200, 200]
+
+        _, tags = await poll(client, headers)
+        filtered = await client.get(ROUTES[1], headers=headers, params={"transaction_type": "transfer"})
+        assert filtered.headers["ETag"] != tags[ROUTES[1]]
+        response = await client.get(ROUTES[1], headers={**headers, "If-None-Match": filtered.headers["ETag"]})
+        assert response.status_code == 200
+        response = await client.get(ROUTES[0], headers={**other_headers, "If-None-Match": tags[ROUTES[0]]})
+        assert response.status_code == 200
+        print("depósito e transferência mudam o ETag; filtros e contas diferentes não se confundem")
+
+        # 3. Conta com buckets
+        async with async_session() as session:
+            hot = await session.get(Account, account.id)
+            await account_buckets.set_bucket_count(session, hot, 4)
+            await session.commit()
+        seen = set()
+        _, tags = await poll(client, headers)
+        seen.add(tags[ROUTES[0]])
+        for _ in range(8):
+            (await client.post("/api/v1/transactions/transaction", headers=headers, json={
+                "amount": "1.00", "transaction_type": "deposit",
+            })).raise_for_status()
+            statuses, tags = await poll(client, headers, tags)
+            assert statuses == [200, 200], statuses
+            assert tags[ROUTES[0]] not in seen
+            seen.add(tags[ROUTES[0]])
+        counter.reset()
+        assert (await poll(client, headers, tags))[0] == [304, 304]
+        print(f"conta com buckets: 304 com {counter.count / len(ROUTES):.0f} queries por rota")
+
+        async with async_session() as session:
+            hot = await session.get(Account, account.id)
+            await account_buckets.set_bucket_count(session, hot, 0)
+            await session.commit()
+        statuses, tags = await poll(client, headers, tags)
+        assert tags[ROUTES[0]] not in seen
+        print("buckets desligados: a versão não volta para um ETag já visto")
+
+    print("✅ ETags corretos e 304 sem ler o extrato")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--polls", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.polls))
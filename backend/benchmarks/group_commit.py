@@ -0,0 +1,86 @@
+"""
+Depósitos/saques concorrentes com commit por operação (caminho normal) versus o
+group commit de app/services/write_pipeline.py. Mostra throughput e latência de
+cada modo e confere se o saldo final bate com os lançamentos.
+
+    python -m benchmarks.group_commit --ops 2000 --concurrency 100 --window-ms 5 --max-ops 100
+"""
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+
+async def direct(async_session, operation):
+    from app.services import ledger
+
+    async with async_session() as session:
+        await ledger.post_transaction(
+            session, operation.account_id, operation.transaction_type, operation.amount, operation.description
+        )
+        await session.commit()
+
+
+async def run(label: str, submit, operations, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(operation):
+        async with semaphore:
+            started = time.perf_counter()
+            await submit(operation)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(op) for op in operations))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {len(operations) / elapsed:>9.1f} op/s  p50 {percentile(latencies, 50):>8.2f}ms  "
+          f"p99 {percentile(latencies, 99):>8.2f}ms")
+
+
+async def main(url: str | None, ops: int, concurrency: int, accounts: int, window_ms: int, max_ops: int):
+    from sqlmodel import func, select
+    from app.models.account import Account
+    from app.models.transaction import Transaction, TransactionType
+    from app.services.write_pipeline import GroupCommitPipeline, LedgerOperation
+
+    async with stand_in_app(url) as (_, async_session, _):
+        customers = [await create_customer(async_session, i, balance=Decimal("1000.00")) for i in range(accounts)]
+        operations = [
+            LedgerOperation(
+                account_id=customers[i % accounts][1].id,
+                transaction_type=TransactionType.DEPOSIT if i % 3 else TransactionType.WITHDRAW,
+                amount=Decimal("2.00") if i % 3 else Decimal("1.00"),
+            )
+            for i in range(ops)
+        ]
+
+        await run("commit por op", lambda op: direct(async_session, op), operations, concurrency)
+
+        pipeline = GroupCommitPipeline(async_session, window_ms=window_ms, max_ops=max_ops)
+        await run("group commit", pipeline.submit, operations, concurrency)
+        await pipeline.stop()
+
+        async with async_session() as session:
+            balance = (await session.exec(select(func.sum(Account.balance)))).one()
+            rows = (await session.exec(select(func.count(Transaction.id)))).one()
+
+        expected = Decimal("1000.00") * accounts + 2 * sum(
+            op.amount if op.transaction_type == TransactionType.DEPOSIT else -op.amount for op in operations
+        )
+        print(f"lançamentos: {rows} (esperado {2 * ops}), soma dos saldos: {balance} (esperado {expected})")
+        assert rows == 2 * ops and Decimal(str(balance)) == expected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do banco (padrão: SQLite temporário)")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--window-ms", type=int, default=5)
+    parser.add_argument("--max-ops", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.ops, args.concurrency, args.accounts, args.window_ms, args.max_ops))
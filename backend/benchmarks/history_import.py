@@ -0,0 +1,190 @@
+"""
+Carga de histórico (app/services/history_import.py) num SQLite temporário: gera um
+CSV com --rows lançamentos espalhados por --accounts contas (com algumas linhas
+ruins), derruba a carga no meio de propósito e roda de novo com o mesmo nome de
+checkpoint. Depois confere que
+
+- nenhuma linha foi gravada duas vezes nem ficou de fora;
+- Account.balance é a soma dos lançamentos e o balance_after da última linha de
+  cada conta bate com ele;
+- a soma com sinal feita no banco (balance_history.signed_column) também bate,
+  inclusive com depósitos descritos "Envio para X";
+- o pico de memória da carga não cresce com o tamanho do arquivo.
+
+Compara ainda as linhas/s com um INSERT por linha (--baseline linhas).
+
+    python -m benchmarks.history_import --rows 200000 --accounts 500 --chunk 5000
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import create_customer, default_url
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, func, insert, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class Crash(Exception):
+    pass
+
+
+def write_csv(path: str, rows: int, numbers: list[str], seed: int) -> tuple[dict[str, Decimal], int]:
+    """
+    Escreve o CSV e devolve (saldo esperado por conta, linhas ruins).
+    """
+    rng = random.Random(seed)
+    expected = {number: Decimal(0) for number in numbers}
+    bad = 0
+    start = datetime(2019, 1, 1, 8, 0)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["account_number", "transaction_type", "amount", "data", "description"])
+        for number in numbers:
+            # Saldo de abertura
+            writer.writerow([number, "deposit", "5000.00", start.isoformat(), "Saldo migrado"])
+            expected[number] += Decimal("5000.00")
+        for i in range(rows - len(numbers)):
+            number = rng.choice(numbers)
+            when = (start + timedelta(minutes=i + 1)).isoformat()
+            amount = Decimal(rng.randint(1, 5000)) / 100
+            if i % 1009 == 7:
+                writer.writerow([number, "deposit", "-3", when, "valor negativo"])
+                bad += 1
+            elif i % 1009 == 13:
+                writer.writerow(["NAO-EXISTE", "deposit", "1.00", when, ""])
+                bad += 1
+            elif i % 1009 == 19:
+                # Descrição é texto livre: um depósito continua sendo entrada
+                writer.writerow([number, "deposit", amount, when, "Envio para X"])
+                expected[number] += amount
+            elif i % 4 == 0:
+                writer.writerow([number, "withdraw", amount, when, "Saque legado"])
+                expected[number] -= amount
+            elif i % 4 == 1:
+                writer.writerow([number, "transfer", amount, when, "Envio para 999: legado"])
+                expected[number] -= amount
+            else:
+                writer.writerow([number, "deposit", amount, when, "Depósito legado"])
+                expected[number] += amount
+    return expected, bad
+
+
+async def one_by_one(async_session, path: str, accounts: dict[str, int], limit: int) -> float:
+    from app.models.transaction import Transaction, TransactionType
+    from app.services.history_import import parse
+    from app.services.user_import import read_rows
+
+    started = time.perf_counter()
+    done = 0
+    async with async_session() as session:
+        for line, raw in read_rows(path):
+            row = parse(line, raw)
+            if not hasattr(row, "account_number") or row.account_number not in accounts:
+                continue
+            await session.exec(insert(Transaction).values(
+                account_id=accounts[row.account_number],
+                transaction_type=TransactionType(row.transaction_type),
+                amount=row.amount,
+                description=row.description,
+                data=row.data,
+            ))
+            done += 1
+            if done == limit:
+                break
+        await session.rollback()
+    return done / (time.perf_counter() - started)
+
+
+async def main(rows: int, accounts: int, chunk_size: int, baseline: int, seed: int):
+    from app.models.account import Account
+    from app.models.transaction import Transaction
+    from app.services import history_import
+    from app.services.balance_history import signed_column
+    from app.services.user_import import read_rows
+
+    engine = create_async_engine(default_url(), connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    ids = {}
+    for i in range(accounts):
+        _, account, _ = await create_customer(async_session, i)
+        ids[account.number] = account.id
+
+    path = os.path.join(tempfile.mkdtemp(), "historico.csv")
+    expected, bad = write_csv(path, rows, list(ids), seed)
+    print(f"{rows} linhas ({os.path.getsize(path) / 2**20:.0f} MiB), {accounts} contas, {bad} linhas ruins")
+
+    before_rate = await one_by_one(async_session, path, ids, baseline)
+
+    # 1ª execução: cai depois de alguns blocos
+    crash_after = max(1, rows // chunk_size // 3)
+
+    def crash(report):
+        if report.loaded >= crash_after * chunk_size - bad:
+            raise Crash()
+
+    try:
+        await history_import.load(async_session, "bench", read_rows(path), chunk_size, on_chunk=crash)
+    except Crash:
+        pass
+
+    # 2ª execução: retoma do checkpoint
+    tracemalloc.start()
+    started = time.perf_counter()
+    report = await history_import.load(async_session, "bench", read_rows(path), chunk_size)
+    load_time = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    negative = await history_import.finalize(async_session, report.account_ids)
+    finalize_time = time.perf_counter() - started
+
+    async with async_session() as session:
+        total = (await session.exec(select(func.count()).select_from(Transaction))).one()
+        balances = dict((await session.exec(select(Account.number, Account.balance))).all())
+        last_after = {}
+        for account_id, balance_after in (await session.exec(
+            select(Transaction.account_id, Transaction.balance_after).order_by(Transaction.data, Transaction.id)
+        )).all():
+            last_after[account_id] = balance_after
+        net = {account_id: Decimal(total) for account_id, total in (await session.exec(
+            select(Transaction.account_id, func.sum(signed_column())).group_by(Transaction.account_id)
+        )).all()}
+    await engine.dispose()
+
+    assert total == rows - bad, f"{total} linhas gravadas, esperado {rows - bad}"
+    assert len(report.errors) <= bad
+    assert all(balances[number] == expected[number] for number in expected), "saldo divergente"
+    assert all(last_after[ids[number]] == balances[number] for number in expected), "balance_after divergente"
+    assert all(net[ids[number]] == balances[number] for number in expected), "signed_column divergente"
+
+    print(f"retomada: {report.skipped} linhas puladas, {report.loaded} gravadas em {load_time:.1f}s "
+          f"({report.loaded / load_time:.0f} linhas/s; um INSERT por linha: {before_rate:.0f} linhas/s)")
+    print(f"pico de memória da carga: {peak / 2**20:.1f} MiB")
+    print(f"recálculo de {len(report.account_ids)} contas: {finalize_time:.1f}s, "
+          f"{len(negative)} com saldo negativo")
+    print("✅ sem duplicatas, saldos e balance_after conferidos")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=5000)
+    parser.add_argument("--baseline", type=int, default=5000, help="linhas medidas no caminho um INSERT por linha")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.accounts, args.chunk, args.baseline, args.seed))
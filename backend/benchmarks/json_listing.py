@@ -0,0 +1,147 @@
+"""
+Micro-benchmark da listagem de extrato (GET /transactions/) com 100 e 1000 linhas:
+
+- antes: SELECT de objetos Transaction do ORM, validação pelo response_model
+  (TransactionPage) e JSONResponse com o json da biblioteca padrão;
+- depois: a rota atual, que seleciona só as colunas públicas em tuplas e serializa
+  os dicts com orjson (FastJSONResponse).
+
+Mede a rota inteira (consulta + serialização) e só a serialização, e confere que os
+dois caminhos geram o mesmo JSON (valores em dinheiro como "10.50").
+
+    python -m benchmarks.json_listing --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+SIZES = [100, 1000]
+
+
+async def old_listing(async_session, account_id: int, limit: int) -> tuple[bytes, list]:
+    from sqlmodel import select
+    from app.models.transaction import Transaction
+    from app.schemas.transaction import TransactionPage
+
+    async with async_session() as session:
+        result = await session.exec(
+            select(Transaction)
+            .where(Transaction.account_id == account_id)
+            .order_by(Transaction.data.desc(), Transaction.id.desc())
+            .limit(limit + 1)
+        )
+        transactions = result.all()[:limit]
+        return old_render(TransactionPage(items=transactions, next_cursor="x")), transactions
+
+
+def old_render(page) -> bytes:
+    # O que o FastAPI faz com response_model: valida, serializa em modo JSON e json.dumps
+    from app.schemas.transaction import TransactionPage
+
+    adapter = TypeAdapter(TransactionPage)
+    return JSONResponse(adapter.dump_python(adapter.validate_python(page), mode="json")).body
+
+
+async def new_listing(async_session, account, limit: int) -> bytes:
+    from app.api.v1.endpoints.transactions import get_transactions
+    from app.services.transaction_search import SearchFilters
+
+    async with async_session() as session:
+        response = await get_transactions(
+            cursor=None, limit=limit, filters=SearchFilters(), if_none_match=None,
+            account=account, session=session,
+        )
+        return response.body
+
+
+async def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label: str, before: list[float], after: list[float]) -> None:
+    b, a = percentile(before, 50), percentile(after, 50)
+    print(f"{label:<26} antes p50 {b:>8.3f}ms   depois p50 {a:>8.3f}ms   {b / a:>5.1f}x")
+
+
+async def main(url: str | None, repeat: int):
+    from sqlmodel import insert, select
+    from app.core.responses import FastJSONResponse
+    from app.models.transaction import Transaction, TransactionType
+    from app.schemas.transaction import TransactionPage
+    from app.services.statement import PUBLIC_COLUMNS
+
+    async with stand_in_app(url) as (_, async_session, _):
+        _, account, _ = await create_customer(async_session, 0, balance=Decimal("0.00"))
+
+        start = datetime(2026, 1, 1, 9, 0)
+        balance = Decimal("0.00")
+        rows = []
+        for i in range(max(SIZES) + 1):
+            amount = Decimal(i % 997 + 1) / 100 + Decimal("10")
+            balance += amount
+            rows.append({
+                "account_id": account.id,
+                "transaction_type": TransactionType.DEPOSIT,
+                "amount": amount,
+                "description": f"Depósito {i}",
+                "data": start + timedelta(minutes=i),
+                "balance_after": balance,
+            })
+        async with async_session() as session:
+            await session.exec(insert(Transaction), params=rows)
+            await session.commit()
+
+        for size in SIZES:
+            before_body, orm_rows = await old_listing(async_session, account.id, size)
+            after_body = await new_listing(async_session, account, size)
+
+            before, after = json.loads(before_body), json.loads(after_body)
+            assert before["items"] == after["items"], "os dois caminhos divergiram"
+            assert all(isinstance(item["amount"], str) for item in after["items"])
+
+            print(f"--- {size} linhas ({len(after_body) / 1024:.0f} KiB) ---")
+            report(
+                "rota (consulta + JSON)",
+                await timed(lambda: old_listing(async_session, account.id, size), repeat),
+                await timed(lambda: new_listing(async_session, account, size), repeat),
+            )
+
+            # Só serialização, com as linhas já em memória (objetos do ORM x tuplas)
+            async with async_session() as session:
+                result = await session.exec(
+                    select(*PUBLIC_COLUMNS).where(Transaction.account_id == account.id).limit(size)
+                )
+                tuples = result.all()
+
+            async def serialize_old():
+                old_render(TransactionPage(items=orm_rows, next_cursor="x"))
+
+            async def serialize_new():
+                FastJSONResponse({"items": [row._asdict() for row in tuples], "next_cursor": "x"})
+
+            report(
+                "só serialização",
+                await timed(serialize_old, repeat),
+                await timed(serialize_new, repeat),
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do banco (padrão: SQLite temporário)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.repeat))
@@ -0,0 +1,245 @@
+"""
+Atualizações em tempo real (GET /transactions/stream, SSE) com a API de verdade
+num uvicorn local (o ASGITransport do httpx junta o corpo inteiro, não serve para
+stream):
+
+1. --clients conexões SSE em --accounts contas; cada uma recebe o saldo inicial;
+2. depósitos e transferências pela API: cada conta recebe só os próprios
+   lançamentos (transferência nas duas pontas), mede a latência até o evento;
+3. com os streams abertos e parados, quantas queries vão ao banco (0) contra o
+   polling de /transactions/ + /users/account que eles substituem;
+4. consumidor lento: assinatura que não lê é derrubada quando a fila enche;
+5. reconexão com Last-Event-ID recupera os lançamentos do intervalo;
+6. conexões acima de LIVE_MAX_STREAMS_PER_ACCOUNT recebem 429;
+7. ?access_token= aceita o token de stream (POST /transactions/stream/token), não
+   o de login, e o token de stream não serve como token de login.
+
+    python -m benchmarks.live_updates --accounts 20 --clients 40 --events 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+from decimal import Decimal
+
+import httpx
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Listener:
+    """
+    Um cliente SSE: guarda os eventos (tipo, id, dados, instante de chegada).
+    """
+
+    def __init__(self, client: httpx.AsyncClient, headers: dict, last_event_id: int | None = None,
+                 params: dict | None = None):
+        self.events: list[tuple[str, int | None, dict, float]] = []
+        self.connected = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.status = None
+        headers = dict(headers)
+        if last_event_id is not None:
+            headers["Last-Event-ID"] = str(last_event_id)
+        self.task = asyncio.create_task(self._run(client, headers, params))
+
+    async def _run(self, client, headers, params):
+        try:
+            async with client.stream("GET", "/api/v1/transactions/stream", headers=headers, params=params) as response:
+                self.status = response.status_code
+                self.connected.set()
+                if response.status_code != 200:
+                    return
+                event, event_id, data = "message", None, ""
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("id: "):
+                        event_id = int(line[4:])
+                    elif line.startswith("data: "):
+                        data = line[6:]
+                    elif line == "" and data:
+                        self.events.append((event, event_id, json.loads(data), time.perf_counter()))
+                        event, event_id, data = "message", None, ""
+        except httpx.ReadError:
+            # Servidor fechou a conexão (consumidor derrubado ou desligando)
+            pass
+        finally:
+            self.connected.set()
+            self.closed.set()
+
+    def transactions(self) -> list[dict]:
+        return [data for event, _, data, _ in self.events if event == "transaction"]
+
+    async def close(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+
+async def wait_for(condition, timeout: float = 10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("evento não chegou")
+        await asyncio.sleep(0.005)
+
+
+async def main(accounts: int, clients: int, events: int, seed: int):
+    import uvicorn
+
+    from app.core import metrics
+    from app.core.config import settings
+    from app.main import app
+    from app.models.account import Account
+    from app.services import live_updates
+
+    rng = random.Random(seed)
+    async with stand_in_app() as (_, async_session, counter):
+        customers = [await create_customer(async_session, i, balance=Decimal("1000.00")) for i in range(accounts)]
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", lifespan="off"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+
+        limits = httpx.Limits(max_connections=clients + 50)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30, limits=limits) as client:
+            # 1. Conexões abertas, saldo inicial
+            listeners = [(i % accounts, Listener(client, customers[i % accounts][2])) for i in range(clients)]
+            for _, listener in listeners:
+                await wait_for(lambda: listener.events)
+            assert all(l.events[0][0] == "balance" and l.events[0][2]["balance"] == "1000.00" for _, l in listeners)
+            print(f"{clients} conexões SSE abertas em {accounts} contas, saldo inicial recebido")
+
+            # 2. Depósitos e transferências
+            expected: dict[int, list[int]] = {i: [] for i in range(accounts)}
+            latencies = []
+            for n in range(events):
+                index = rng.randrange(accounts)
+                started = time.perf_counter()
+                if n % 2:
+                    target = (index + 1 + rng.randrange(accounts - 1)) % accounts
+                    response = await client.post("/api/v1/transactions/transfer", headers=customers[index][2], json={
+                        "amount": "1.00", "target_account_number": customers[target][1].number,
+                    })
+                    response.raise_for_status()
+                    expected[index].append(response.json()["id"])
+                    expected[target].append(response.json()["id"] + 1)
+                else:
+                    response = await client.post("/api/v1/transactions/transaction", headers=customers[index][2], json={
+                        "amount": "1.00", "transaction_type": "deposit",
+                    })
+                    response.raise_for_status()
+                    expected[index].append(response.json()["id"])
+                watching = [l for i, l in listeners if i == index]
+                count = len(expected[index])
+                await wait_for(lambda: all(len(l.transactions()) >= count for l in watching))
+                latencies.extend(l.events[-1][3] - started for l in watching)
+
+            for index, listener in listeners:
+                received = listener.transactions()
+                assert [t["id"] for t in received] == expected[index], f"conta {index}: eventos errados"
+                assert all(t["account_id"] == customers[index][1].id for t in received)
+            last = listeners[0][1].transactions()[-1]
+            async with async_session() as session:
+                account = await session.get(Account, customers[listeners[0][0]][1].id)
+            assert Decimal(last["balance_after"]) == account.balance
+            print(f"{events} operações: eventos certos em todas as conexões; requisição -> evento "
+                  f"p50 {percentile(latencies, 50) * 1000:.2f}ms  p99 {percentile(latencies, 99) * 1000:.2f}ms")
+
+            # 3. Parados: nenhuma query, contra o polling que substituem
+            counter.reset()
+            await asyncio.sleep(1)
+            idle = counter.count
+            counter.reset()
+            headers = customers[0][2]
+            (await client.get("/api/v1/transactions/", headers=headers)).raise_for_status()
+            (await client.get("/api/v1/users/account", headers=headers)).raise_for_status()
+            per_poll = counter.count
+            print(f"parados por 1s: {idle} queries com {clients} streams; polling a cada 5s custaria "
+                  f"{per_poll * clients / 5:.0f} queries/s ({per_poll} por ciclo por cliente)")
+            assert idle == 0
+
+            # 4. Consumidor lento
+            dropped_before = metrics.pubsub_dropped.values.get((), 0)
+            slow = live_updates.broker.subscribe("bench:slow")
+            for i in range(settings.LIVE_QUEUE_SIZE + 1):
+                await live_updates.broker.publish(slow.channel, live_updates.frame("transaction", {}, i))
+            assert slow.dropped and await slow.get() is None
+            assert metrics.pubsub_dropped.values[()] == dropped_before + 1
+            assert live_updates.broker.subscribers("bench:slow") == 0
+            # Os streams de verdade acompanharam e continuam abertos
+            assert not any(l.closed.is_set() for _, l in listeners), "stream que acompanhava foi derrubado"
+            print(f"consumidor lento derrubado com a fila em {settings.LIVE_QUEUE_SIZE}; os outros seguem conectados")
+
+            # 5. Reconexão com Last-Event-ID
+            index, listener = listeners[0]
+            last_id = max(expected[index])
+            await listener.close()
+            missed = []
+            for _ in range(3):
+                response = await client.post("/api/v1/transactions/transaction", headers=customers[index][2], json={
+                    "amount": "2.00", "transaction_type": "deposit",
+                })
+                missed.append(response.json()["id"])
+            await asyncio.sleep(0.05)
+            resumed = Listener(client, customers[index][2], last_event_id=last_id)
+            await wait_for(lambda: len(resumed.transactions()) >= 3)
+            assert [t["id"] for t in resumed.transactions()] == missed
+            print(f"reconexão com Last-Event-ID={last_id}: {len(missed)} lançamentos recuperados")
+
+            # 6. Limite de conexões por conta
+            lonely = customers[-1][2]
+            extra = [Listener(client, lonely) for _ in range(settings.LIVE_MAX_STREAMS_PER_ACCOUNT + 1)]
+            for listener in extra:
+                await listener.connected.wait()
+            statuses = sorted(listener.status for listener in extra)
+            assert statuses.count(429) == 1 + sum(1 for i, _ in listeners if i == accounts - 1), statuses
+            print(f"conexões por conta acima de {settings.LIVE_MAX_STREAMS_PER_ACCOUNT}: 429")
+
+            for listener in [resumed, *extra, *(l for _, l in listeners[1:])]:
+                await listener.close()
+
+            # 7. Token na URL: só o de stream
+            headers = customers[0][2]
+            response = await client.post("/api/v1/transactions/stream/token", headers=headers)
+            response.raise_for_status()
+            stream_token = response.json()["access_token"]
+            by_query = Listener(client, {}, params={"access_token": stream_token})
+            await wait_for(lambda: by_query.events)
+            assert by_query.status == 200 and by_query.events[0][0] == "balance"
+            login_token = headers["Authorization"].removeprefix("Bearer ")
+            rejected = Listener(client, {}, params={"access_token": login_token})
+            await rejected.connected.wait()
+            assert rejected.status == 403
+            response = await client.get("/api/v1/users/account", headers={"Authorization": f"Bearer {stream_token}"})
+            assert response.status_code == 403
+            await by_query.close()
+            print("?access_token=: token de stream aceito, token de login recusado (403)")
+
+        server.should_exit = True
+        await serving
+
+    print("✅ eventos entregues, consumidor lento derrubado e reconexão sem perdas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=40)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.accounts, args.clients, args.events, args.seed))
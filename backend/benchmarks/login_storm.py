@@ -0,0 +1,69 @@
+"""
+Rajada de logins simultâneos enquanto outra tarefa chama GET / sem parar.
+Com o Argon2 no pool de threads (app/core/security.py) a latência dessas
+chamadas "inocentes" não deve disparar durante a rajada.
+
+    python -m benchmarks.login_storm --logins 64 --max-ping-p99-ms 250
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import percentile, stand_in_app
+
+PASSWORD = "senha-benchmark"
+
+
+async def main(url: str | None, logins: int, max_ping_p99_ms: float):
+    from app.core.config import settings
+    from app.core.security import get_password_hash
+    from app.models.user import User
+
+    # A rajada inteira cabe na fila; aqui queremos medir o event loop, não o 503
+    settings.PASSWORD_HASH_QUEUE_LIMIT = max(settings.PASSWORD_HASH_QUEUE_LIMIT, logins)
+
+    async with stand_in_app(url) as (client, async_session, _):
+        async with async_session() as session:
+            session.add(User(email="storm@vertex.local", full_name="Storm", hashed_password=get_password_hash(PASSWORD)))
+            await session.commit()
+
+        storm_running = True
+        pings: list[float] = []
+
+        async def ping():
+            while storm_running:
+                started = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                pings.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+
+        async def login():
+            response = await client.post(
+                "/api/v1/login", data={"username": "storm@vertex.local", "password": PASSWORD}
+            )
+            response.raise_for_status()
+
+        pinger = asyncio.create_task(ping())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        storm_running = False
+        await pinger
+
+    p99 = percentile(pings, 99)
+    print(f"{logins} logins em {elapsed:.2f}s ({logins / elapsed:.1f} logins/s)")
+    print(f"GET / durante a rajada: {len(pings)} chamadas, "
+          f"p50 {statistics.median(pings):.1f}ms, p99 {p99:.1f}ms")
+
+    assert len(pings) > 1, "Nenhuma chamada a GET / completou durante a rajada: event loop travado"
+    assert p99 <= max_ping_p99_ms, f"p99 de GET / acima de {max_ping_p99_ms}ms durante a rajada"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do banco (padrão: SQLite temporário)")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-ping-p99-ms", type=float, default=250)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.logins, args.max_ping_p99_ms))
@@ -0,0 +1,105 @@
+"""
+Confere o roteamento leitura/escrita com dois bancos SQLite locais: um faz o papel
+do primário e o outro é uma cópia dele tirada no início (uma "réplica" que nunca
+recebe as escritas seguintes, ou seja, atrasada para sempre).
+
+- as rotas de leitura (/users/me, /users/account, /transactions/) vão para a réplica;
+- quem acabou de gravar lê do primário por READ_YOUR_WRITES_SECONDS (--window);
+- passada a janela, volta para a réplica (e vê o saldo antigo, como esperado).
+
+    python -m benchmarks.read_replica --window 1 --reads 200
+    python -m benchmarks.read_replica --url postgresql+asyncpg://.../primario --replica-url postgresql+asyncpg://.../replica
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import QueryCounter, create_customer, stand_in_app
+
+READ_ROUTES = ["/api/v1/users/me", "/api/v1/users/account", "/api/v1/transactions/"]
+
+
+async def balance(client, headers) -> Decimal:
+    response = await client.get("/api/v1/users/account", headers=headers)
+    response.raise_for_status()
+    return Decimal(response.json()["balance"])
+
+
+async def main(url: str | None, replica_url: str | None, window: float, reads: int):
+    from app.main import app
+    from app.core import db
+
+    directory = tempfile.mkdtemp()
+    primary_path = os.path.join(directory, "primario.db")
+    url = url or f"sqlite+aiosqlite:///{primary_path}"
+
+    async with stand_in_app(url) as (client, async_session, primary_counter):
+        _, _, writer = await create_customer(async_session, 0, balance=Decimal("100.00"))
+        _, _, reader = await create_customer(async_session, 1, balance=Decimal("100.00"))
+
+        if replica_url is None:
+            # "Replicação": cópia do arquivo do primário neste instante
+            replica_path = os.path.join(directory, "replica.db")
+            shutil.copyfile(primary_path, replica_path)
+            replica_url = f"sqlite+aiosqlite:///{replica_path}"
+
+        replica_engine = create_async_engine(replica_url)
+        replica_session = sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+        replica_counter = QueryCounter(replica_engine)
+
+        async def override_replica():
+            async with replica_session() as session:
+                yield session
+
+        app.dependency_overrides[db.get_replica_session] = override_replica
+        db.recent_writers.ttl = window
+        db.recent_writers.clear()
+
+        try:
+            primary_counter.reset()
+            for i in range(reads):
+                response = await client.get(READ_ROUTES[i % len(READ_ROUTES)], headers=reader)
+                response.raise_for_status()
+            print(f"{reads} leituras: {replica_counter.count} queries na réplica, "
+                  f"{primary_counter.count} no primário")
+            assert primary_counter.count == 0
+
+            response = await client.post(
+                "/api/v1/transactions/transaction",
+                json={"amount": "25.00", "transaction_type": "deposit"},
+                headers=writer,
+            )
+            response.raise_for_status()
+
+            right_after = await balance(client, writer)
+            other_client = await balance(client, reader)
+            print(f"logo após o depósito: quem gravou vê {right_after} (primário), "
+                  f"outro cliente vê {other_client} (réplica)")
+            assert right_after == Decimal("125.00")
+
+            await asyncio.sleep(window + 0.1)
+            after_window = await balance(client, writer)
+            print(f"depois de {window}s: quem gravou vê {after_window} (réplica sem a escrita)")
+            assert after_window == Decimal("100.00")
+        finally:
+            app.dependency_overrides.pop(db.get_replica_session, None)
+            await replica_engine.dispose()
+
+    print("✅ roteamento conferido")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL async do primário (padrão: SQLite temporário)")
+    parser.add_argument("--replica-url", default=None, help="URL async da réplica (padrão: cópia do primário)")
+    parser.add_argument("--window", type=float, default=1.0, help="READ_YOUR_WRITES_SECONDS do teste")
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.replica_url, args.window, args.reads))
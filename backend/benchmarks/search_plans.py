@@ -0,0 +1,156 @@
+"""
+Busca no extrato (GET /transactions/ com filtros) num SQLite local:
+
+- para cada filtro, captura o SELECT que a rota executa e confere com
+  EXPLAIN QUERY PLAN que o SQLite usa o índice esperado (nada de varrer a tabela
+  nem de ordenar a conta inteira);
+- confere as linhas e o total de cada filtro contra um filtro feito em Python,
+  seguindo o cursor até o fim;
+- mede a latência da primeira página.
+
+    python -m benchmarks.search_plans --rows 200000 --accounts 50
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlmodel import insert, text
+
+from benchmarks.common import create_customer, percentile, stand_in_app
+
+# filtro -> índice que o plano tem que usar
+CASES = {
+    "sem filtro": ({}, "ix_transaction_account_id_data_id"),
+    "tipo": ({"transaction_type": "withdraw"}, "ix_transaction_account_id_type_data_id"),
+    "contraparte": ({"counterparty": "BENCH000001"}, "ix_transaction_account_id_counterparty_data_id"),
+    "período": ({"start": "2026-03-01T00:00:00", "end": "2026-03-08T00:00:00"}, "ix_transaction_account_id_data_id"),
+    "valor": ({"min_amount": "990.00", "max_amount": "1000.00"}, "ix_transaction_account_id_amount"),
+    "texto": ({"q": "aluguel"}, "ix_transaction_account_id_data_id"),
+    "tipo + período": (
+        {"transaction_type": "deposit", "start": "2026-02-01T00:00:00", "end": "2026-02-15T00:00:00"},
+        "ix_transaction_account_id_type_data_id",
+    ),
+}
+
+
+def matches(row: dict, filters: dict, counterparty_id: int) -> bool:
+    if "transaction_type" in filters and row["transaction_type"].value != filters["transaction_type"]:
+        return False
+    if "counterparty" in filters and row["counterparty_account_id"] != counterparty_id:
+        return False
+    if "start" in filters and row["data"] < datetime.fromisoformat(filters["start"]):
+        return False
+    if "end" in filters and row["data"] >= datetime.fromisoformat(filters["end"]):
+        return False
+    if "min_amount" in filters and row["amount"] < Decimal(filters["min_amount"]):
+        return False
+    if "max_amount" in filters and row["amount"] > Decimal(filters["max_amount"]):
+        return False
+    if "q" in filters and filters["q"] not in (row["description"] or "").lower():
+        return False
+    return True
+
+
+async def main(rows: int, accounts: int, repeat: int, seed: int):
+    from app.models.transaction import Transaction, TransactionType
+    from app.services import summaries
+
+    rng = random.Random(seed)
+    async with stand_in_app() as (client, async_session, _):
+        customers = [await create_customer(async_session, i) for i in range(accounts)]
+        owner, other = customers[0][1], customers[1][1]
+        headers = customers[0][2]
+
+        start = datetime(2026, 1, 1)
+        written = []
+        for i in range(rows):
+            account = owner if i % 4 == 0 else customers[rng.randrange(1, accounts)][1]
+            kind = rng.choice(list(TransactionType))
+            counterparty = None
+            description = rng.choice(["Mercado", "Aluguel de março", "Pix recebido", None])
+            if kind == TransactionType.TRANSFER:
+                counterparty = customers[rng.randrange(accounts)][1]
+                description = f"Envio para {counterparty.number}: {description or ''}"
+            written.append({
+                "account_id": account.id,
+                "transaction_type": kind,
+                "amount": Decimal(rng.randint(1, 100_000)) / 100,
+                "description": description,
+                "data": start + timedelta(seconds=i * 365 * 86400 // rows),
+                "counterparty_account_id": counterparty.id if counterparty else None,
+            })
+        async with async_session() as session:
+            for i in range(0, len(written), 5000):
+                await session.exec(insert(Transaction), params=written[i:i + 5000])
+            await session.exec(text("ANALYZE"))
+            await session.commit()
+        await summaries.backfill(async_session)
+
+        mine = [row for row in written if row["account_id"] == owner.id]
+        print(f"{rows} lançamentos, {len(mine)} na conta pesquisada")
+
+        engine = async_session.kw["bind"]
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT") and 'FROM "transaction"' in statement:
+                captured.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+
+        for label, (filters, index) in CASES.items():
+            expected = sorted(
+                (row for row in mine if matches(row, filters, other.id)),
+                key=lambda row: row["data"], reverse=True,
+            )
+
+            captured.clear()
+            response = await client.get("/api/v1/transactions/", params=filters, headers=headers)
+            response.raise_for_status()
+            body = response.json()
+            statement, parameters = captured[0]
+
+            async with engine.connect() as conn:
+                plan = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+            details = " | ".join(row[-1] for row in plan)
+            assert index in details, f"{label}: plano sem {index}: {details}"
+            assert "TEMP B-TREE" not in details or label == "valor", f"{label}: ordena em memória: {details}"
+
+            # Segue o cursor até o fim e compara com o filtro em Python
+            items, page = list(body["items"]), body
+            while page["next_cursor"]:
+                page = (await client.get(
+                    "/api/v1/transactions/", params={**filters, "cursor": page["next_cursor"]}, headers=headers
+                )).json()
+                items.extend(page["items"])
+            assert [Decimal(item["amount"]) for item in items] == [row["amount"] for row in expected], label
+            if body["total_exact"]:
+                assert body["total"] == len(expected), f"{label}: total {body['total']} != {len(expected)}"
+
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                (await client.get("/api/v1/transactions/", params=filters, headers=headers)).raise_for_status()
+                samples.append((time.perf_counter() - started) * 1000)
+
+            total = f"{body['total']}{'' if body['total_exact'] else '~'}"
+            print(f"{label:<16} {len(expected):>6} linhas  total {total:>7}  "
+                  f"p50 {percentile(samples, 50):>6.2f}ms  índice {index}")
+
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    print("✅ planos usam os índices e os resultados batem")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.accounts, args.repeat, args.seed))
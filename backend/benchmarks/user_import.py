@@ -0,0 +1,133 @@
+"""
+Carga em massa de usuários (app/services/user_import.py) num SQLite temporário:
+gera um CSV com --users linhas, algumas propositalmente ruins (email inválido,
+repetido no arquivo, já cadastrado, senha vazia), e compara
+
+- antes: o caminho do POST /users/ para cada linha (SELECT do email, hash, INSERT
+  e commit por usuário), só nas primeiras --baseline linhas;
+- depois: import_users com --workers processos de Argon2 e insert em lote.
+
+No fim confere que todo usuário válido ganhou uma conta e que cada linha ruim foi
+reportada com o número certo. Como o Argon2 domina, a vazão escala com os núcleos;
+a projeção para 1M usa a vazão medida.
+
+    python -m benchmarks.user_import --users 2000 --workers 8
+"""
+import argparse
+import asyncio
+import csv
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import QueryCounter, create_customer, default_url
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def write_csv(path: str, users: int) -> dict[int, str]:
+    """
+    Escreve o CSV e devolve {linha: motivo esperado} das linhas ruins.
+    """
+    bad = {}
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["email", "full_name", "password"])
+        for i in range(users):
+            line = i + 2
+            email, password = f"migrado{i}@parceiro.com", f"senha-{i}"
+            if i % 97 == 5:
+                email, bad[line] = f"migrado{i}.parceiro.com", "email inválido"
+            elif i % 97 == 11:
+                password, bad[line] = "", "campo(s) obrigatório(s) vazio(s): password"
+            elif i % 97 == 17 and i > 0:
+                email, bad[line] = f"migrado{i - 1}@parceiro.com", "email repetido no arquivo"
+            elif i == 3:
+                email, bad[line] = "bench0@vertex.local", "email já cadastrado"
+            writer.writerow([email, f"Cliente Migrado {i}", password])
+    return bad
+
+
+async def one_by_one(async_session, rows) -> None:
+    from app.core.security import get_password_hash_async
+    from app.models.user import User
+
+    for raw in rows:
+        async with async_session() as session:
+            result = await session.exec(select(User).where(User.email == raw["email"]))
+            if result.first():
+                continue
+            hashed = await get_password_hash_async(raw["password"])
+            session.add(User(email=raw["email"], full_name=raw["full_name"], hashed_password=hashed))
+            await session.commit()
+
+
+async def main(users: int, workers: int, batch_size: int, baseline: int):
+    from app.models.account import Account
+    from app.models.user import User
+    from app.services import user_import
+
+    path = os.path.join(tempfile.mkdtemp(), "clientes.csv")
+    bad = write_csv(path, users)
+
+    # Antes: um usuário por "requisição", num banco separado
+    engine = create_async_engine(default_url())
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = [row for _, row in zip(range(baseline), csv.DictReader(file))]
+    started = time.perf_counter()
+    await one_by_one(async_session, rows)
+    before_rate = len(rows) / (time.perf_counter() - started)
+    await engine.dispose()
+
+    # Depois: carga em lote
+    engine = create_async_engine(default_url(), connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await create_customer(async_session, 0)
+    counter = QueryCounter(engine)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        report = await user_import.import_users(
+            async_session, user_import.read_rows(path), pool, workers, batch_size
+        )
+    elapsed = time.perf_counter() - started
+    after_rate = report.created / elapsed
+
+    async with async_session() as session:
+        created_users = (await session.exec(select(func.count()).select_from(User))).one() - 1
+        orphans = (await session.exec(
+            select(func.count()).select_from(User).outerjoin(Account, Account.user_id == User.id)
+            .where(Account.id.is_(None))
+        )).one()
+    await engine.dispose()
+
+    reported = {error.line: error.reason for error in report.errors}
+    assert reported == bad, f"erros divergentes: {set(reported.items()) ^ set(bad.items())}"
+    assert report.created == created_users == users - len(bad)
+    assert orphans == 0, "usuário sem conta"
+
+    print(f"{users} linhas, {len(bad)} ruins, {workers} processo(s) de Argon2, lotes de {batch_size}")
+    print(f"antes  (um por vez, {len(rows)} linhas): {before_rate:>8.1f} usuários/s")
+    print(f"depois (em lote):                 {after_rate:>8.1f} usuários/s   "
+          f"{after_rate / before_rate:.1f}x, {counter.count} queries no total")
+    print(f"projeção para 1M usuários: {1_000_000 / after_rate / 60:.0f} min com {workers} processo(s)")
+    print("✅ contas criadas e erros reportados por linha")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--baseline", type=int, default=200, help="linhas medidas no caminho um por vez")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.workers, args.batch, args.baseline))
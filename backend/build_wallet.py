@@ -1,8 +1,25 @@
 import os
 import base64
+import hashlib
 import zipfile
 import io
 
+# Arquivo que guarda o sha256 do ORACLE_WALLET_B64 da última extração bem-sucedida
+CHECKSUM_MARKER = ".wallet.sha256"
+# Sem este arquivo a conexão mTLS não sobe, então ele também precisa estar lá
+REQUIRED_FILE = "cwallet.sso"
+
+def wallet_is_current(wallet_dir: str, checksum: str) -> bool:
+    """
+    True se a wallet desta mesma variável já foi extraída antes (disco persistente,
+    reinício do processo sem novo build): aí não precisa decodificar nem descompactar.
+    """
+    marker = os.path.join(wallet_dir, CHECKSUM_MARKER)
+    if not os.path.exists(os.path.join(wallet_dir, REQUIRED_FILE)) or not os.path.exists(marker):
+        return False
+    with open(marker) as f:
+        return f.read().strip() == checksum
+
 def setup_wallet():
     # 1. Pega o textão da variável de ambiente
     wallet_b64 = os.environ.get("ORACLE_WALLET_B64")
@@ -11,12 +28,17 @@ def setup_wallet():
         print("⚠️ Variável ORACLE_WALLET_B64 não encontrada. Pule se estiver local.")
         return
 
+    wallet_dir = "wallet" # Caminho relativo à raiz do backend
+    checksum = hashlib.sha256(wallet_b64.encode()).hexdigest()
+
+    if wallet_is_current(wallet_dir, checksum):
+        print(f"✅ Wallet já extraída em: {os.path.abspath(wallet_dir)} (checksum confere)")
+        return
+
     print("🔐 Decodificando Wallet segura...")
     
     # 2. Cria a pasta wallet se não existir
-    wallet_dir = "wallet" # Caminho relativo à raiz do backend
-    if not os.path.exists(wallet_dir):
-        os.makedirs(wallet_dir)
+    os.makedirs(wallet_dir, exist_ok=True)
 
     # 3. Decodifica e salva o ZIP
     try:
@@ -26,14 +48,15 @@ def setup_wallet():
         # 4. Extrai os arquivos
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
             zip_ref.extractall(wallet_dir)
+
+        # 5. Grava o marcador só depois de extrair tudo: se cair no meio, o próximo boot refaz
+        with open(os.path.join(wallet_dir, CHECKSUM_MARKER), "w") as f:
+            f.write(checksum)
             
         print(f"✅ Wallet extraída com sucesso em: {os.path.abspath(wallet_dir)}")
         
-        # Lista arquivos para confirmar (apenas debug)
-        print("Arquivos:", os.listdir(wallet_dir))
-        
     except Exception as e:
         print(f"❌ Erro ao extrair wallet: {e}")
 
 if __name__ == "__main__":
-    setup_wallet()
\ No newline at end of file
+    setup_wallet()
@@ -0,0 +1,89 @@
+"""
+Fixtures dos testes: cada teste ganha um SQLite (aiosqlite) novo com as tabelas
+criadas a partir dos modelos, no lugar do Oracle.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Os testes não falam com o Oracle; valores fictícios só para o Settings carregar
+for _name in ("SECRET_KEY", "ORACLE_USER", "ORACLE_PASSWORD", "ORACLE_SERVICE",
+              "ORACLE_WALLET_DIR", "ORACLE_WALLET_PASSWORD"):
+    os.environ.setdefault(_name, "test-" + _name.lower())
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Importa todos os modelos para o create_all
+import app.main  # noqa: F401
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def async_session(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def client(async_session):
+    """
+    Cliente httpx falando com a API em processo, com o get_session apontado para o
+    SQLite do teste.
+    """
+    from app.core.db import get_session
+    from app.main import app
+
+    async def override_session():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        try:
+            yield client
+        finally:
+            app.dependency_overrides.pop(get_session, None)
+
+
+@pytest.fixture
+def create_account(async_session):
+    """
+    Cria usuário + conta direto no banco e devolve a conta.
+    """
+    from app.models.account import Account
+    from app.models.user import User
+
+    created = 0
+
+    async def create(balance="0.00", **fields) -> Account:
+        nonlocal created
+        created += 1
+        async with async_session() as session:
+            user = User(email=f"test{created}@vertex.local", full_name=f"Test {created}", hashed_password="-")
+            session.add(user)
+            await session.flush()
+            account = Account(number=f"TEST{created:06d}", balance=balance, user_id=user.id, **fields)
+            session.add(account)
+            await session.commit()
+        return account
+
+    return create
@@ -0,0 +1,55 @@
+import asyncio
+
+import aiosqlite
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.db import TimedQueuePool, pool_stats
+
+pytestmark = pytest.mark.anyio
+
+CONNECT_SECONDS = 0.2
+HOLD_SECONDS = 0.1
+
+
+async def test_pool_separates_checkout_wait_from_connect_time(tmp_path):
+    path = tmp_path / "pool.db"
+
+    async def slow_connect():
+        # Faz o papel do handshake mTLS com o Oracle
+        await asyncio.sleep(CONNECT_SECONDS)
+        return await aiosqlite.connect(path)
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        async_creator=slow_connect,
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    try:
+        # Pool vazio: abre a conexão, sem esperar na fila
+        first = await engine.connect()
+        stats = pool_stats(engine)
+        assert stats["connects"] == 1
+        assert stats["connect_seconds_total"] >= CONNECT_SECONDS
+        assert stats["wait_seconds_total"] == 0
+
+        # Pool cheio: o segundo checkout espera a primeira conexão voltar
+        async def release():
+            await asyncio.sleep(HOLD_SECONDS)
+            await first.close()
+
+        releasing = asyncio.create_task(release())
+        second = await engine.connect()
+        await releasing
+        await second.close()
+
+        stats = pool_stats(engine)
+        assert stats["checkouts"] == 2
+        assert stats["connects"] == 1
+        assert HOLD_SECONDS <= stats["wait_seconds_max"] < CONNECT_SECONDS
+        assert stats["wait_seconds_total"] == stats["wait_seconds_max"]
+        assert stats["wait_seconds_avg"] == round(stats["wait_seconds_total"] / 2, 6)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from pytz import timezone
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import func, select, update
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.account import Account
+from app.models.idempotency import IdempotencyKey
+from app.models.transaction import Transaction, TransactionType
+from app.services import idempotency, ledger
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    idempotency.cache.clear()
+    yield
+    idempotency.cache.clear()
+
+
+async def _deposit(async_session, account: Account, key: str, request_hash: str, amount: str):
+    # Mesma sequência das rotas: lookup, lançamento, commit com a chave
+    async with async_session() as session:
+        replayed = await idempotency.lookup(session, account.user_id, key, request_hash)
+        if replayed:
+            return None, replayed
+        transaction = await ledger.post_transaction(
+            session, account_id=account.id, transaction_type=TransactionType.DEPOSIT, amount=Decimal(amount),
+        )
+        await session.flush()
+        body = {"id": transaction.id, "amount": amount}
+        replayed = await idempotency.commit(session, account.user_id, key, request_hash, "/transaction", body)
+        return body, replayed
+
+
+async def test_concurrent_commits_with_same_key_apply_once(engine, async_session, create_account):
+    # Com a instrumentação ligada, como na API
+    metrics.instrument_engine(engine)
+    account = await create_account()
+
+    results = await asyncio.gather(
+        _deposit(async_session, account, "chave-1", "hash-a", "10.00"),
+        _deposit(async_session, account, "chave-1", "hash-a", "10.00"),
+    )
+
+    winners = [body for body, replayed in results if replayed is None]
+    replays = [replayed for _, replayed in results if replayed is not None]
+    assert len(winners) == 1 and len(replays) == 1
+    assert replays[0].headers["Idempotent-Replayed"] == "true"
+    assert json.loads(replays[0].body) == winners[0]
+
+    async with async_session() as session:
+        assert (await session.get(Account, account.id)).balance == Decimal("10.00")
+        count = (await session.exec(select(func.count()).select_from(Transaction))).one()
+        assert count == 1
+
+
+async def test_concurrent_commit_with_other_body_is_refused(async_session, create_account):
+    account = await create_account()
+
+    results = await asyncio.gather(
+        _deposit(async_session, account, "chave-1", "hash-a", "10.00"),
+        _deposit(async_session, account, "chave-1", "hash-b", "20.00"),
+        return_exceptions=True,
+    )
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(errors) == 1 and errors[0].status_code == 422
+    async with async_session() as session:
+        balance = (await session.get(Account, account.id)).balance
+    assert balance in (Decimal("10.00"), Decimal("20.00"))
+
+
+async def test_other_integrity_error_is_not_reported_as_key_race(async_session, create_account):
+    account = await create_account()
+
+    async with async_session() as session:
+        # Conta com número repetido: falha no commit que não tem nada a ver com a chave
+        session.add(Account(number=account.number, user_id=account.user_id))
+        with pytest.raises(IntegrityError):
+            await idempotency.commit(session, account.user_id, "chave-1", "hash-a", "/transaction", {})
+
+
+async def test_expired_key_counts_as_new(async_session, create_account):
+    account = await create_account()
+    await _deposit(async_session, account, "chave-1", "hash-a", "10.00")
+
+    async with async_session() as session:
+        now = datetime.now(timezone("America/Recife")).replace(tzinfo=None)
+        expired = now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS + 3600)
+        await session.exec(update(IdempotencyKey).values(created_at=expired))
+        await session.commit()
+    idempotency.cache.clear()
+
+    _, replayed = await _deposit(async_session, account, "chave-1", "hash-b", "5.00")
+    assert replayed is None
+
+    assert await idempotency.purge_expired(async_session) == 0
+    async with async_session() as session:
+        assert (await session.get(Account, account.id)).balance == Decimal("15.00")
@@ -0,0 +1,86 @@
+import asyncio
+import random
+from collections import Counter
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import func, select
+
+from app.models.account import Account
+from app.models.transaction import Transaction, TransactionType
+from app.services import ledger
+
+pytestmark = pytest.mark.anyio
+
+
+async def _retry(async_session, operation) -> bool:
+    # SQLite devolve "database is locked" quando o timeout estoura; tentamos de novo
+    for _ in range(50):
+        async with async_session() as session:
+            try:
+                await operation(session)
+                await session.commit()
+                return True
+            except ledger.InsufficientFundsError:
+                await session.rollback()
+                return False
+            except OperationalError:
+                await session.rollback()
+                await asyncio.sleep(0.01)
+    raise RuntimeError("Operação não conseguiu o lock do banco")
+
+
+async def _balances(async_session) -> dict[int, Decimal]:
+    async with async_session() as session:
+        return dict((await session.exec(select(Account.id, Account.balance))).all())
+
+
+async def test_concurrent_transfers_keep_every_balance_exact(async_session, create_account):
+    # Saldo inicial cobre tudo o que cada conta pode enviar: nenhuma transferência é
+    # recusada, então o saldo final de cada conta é exatamente o calculado abaixo
+    accounts = [await create_account(balance="10000.00") for _ in range(4)]
+    rng = random.Random(7)
+    jobs = []
+    for _ in range(200):
+        source, target = rng.sample(accounts, 2)
+        jobs.append((source, target, Decimal(rng.randint(1, 5000)) / 100))
+
+    expected = {account.id: Decimal("10000.00") for account in accounts}
+    for source, target, amount in jobs:
+        expected[source.id] -= amount
+        expected[target.id] += amount
+
+    results = await asyncio.gather(*(
+        _retry(async_session, lambda session, job=job: ledger.post_transfer(session, *job))
+        for job in jobs
+    ))
+
+    assert all(results)
+    assert await _balances(async_session) == expected
+
+    async with async_session() as session:
+        counts = Counter((await session.exec(select(Transaction.account_id))).all())
+    assert counts == Counter(
+        account_id for source, target, _ in jobs for account_id in (source.id, target.id)
+    )
+
+
+async def test_concurrent_withdrawals_never_overdraw(async_session, create_account):
+    account = await create_account(balance="100.00")
+
+    results = await asyncio.gather(*(
+        _retry(async_session, lambda session: ledger.post_transaction(
+            session,
+            account_id=account.id,
+            transaction_type=TransactionType.WITHDRAW,
+            amount=Decimal("30.00"),
+        ))
+        for _ in range(10)
+    ))
+
+    # O UPDATE condicional deixa passar exatamente 3 saques de 30,00
+    assert sum(results) == 3
+    assert await _balances(async_session) == {account.id: Decimal("10.00")}
+    async with async_session() as session:
+        assert (await session.exec(select(func.count()).select_from(Transaction))).one() == 3
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core import metrics
+from app.models.account import Account
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_database_error_passes_through_instrumentation(engine, async_session, create_account):
+    metrics.instrument_engine(engine)
+    account = await create_account()
+
+    async with async_session() as session:
+        session.add(Account(id=account.id, number="OUTRA", user_id=account.user_id))
+        with pytest.raises(IntegrityError):
+            await session.commit()
+
+    # A pilha de inícios de query não ficou com sobra: a conexão segue medindo
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        assert not raw.info.get("query_started")
+    async with async_session() as session:
+        assert (await session.get(Account, account.id)).number == account.number
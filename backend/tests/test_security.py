@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from argon2 import PasswordHasher
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "senha-de-teste"
+
+
+async def _create_user(async_session, hashed_password: str) -> User:
+    async with async_session() as session:
+        user = User(email="login@vertex.local", full_name="Login", hashed_password=hashed_password)
+        session.add(user)
+        await session.commit()
+    return user
+
+
+async def _login(client, password: str = PASSWORD):
+    return await client.post("/api/v1/login", data={"username": "login@vertex.local", "password": password})
+
+
+async def test_login_storm_does_not_block_event_loop(client, async_session):
+    hashed = security.get_password_hash(PASSWORD)
+    await _create_user(async_session, hashed)
+
+    # Quanto um verify trava quem o roda; no event loop, cada login pararia tudo por isso
+    started = time.perf_counter()
+    security.verify_password(PASSWORD, hashed)
+    verify_seconds = time.perf_counter() - started
+
+    storm_running = True
+    gaps: list[float] = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while storm_running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    responses = await asyncio.gather(*(_login(client) for _ in range(16)))
+    storm_running = False
+    await ticking
+
+    assert [r.status_code for r in responses] == [200] * 16
+    assert max(gaps) < verify_seconds, f"event loop parado {max(gaps) * 1000:.1f}ms durante a rajada"
+
+
+async def test_login_rehashes_when_argon2_parameters_change(client, async_session):
+    old_hash = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1).hash(PASSWORD)
+    user = await _create_user(async_session, old_hash)
+    assert security.password_needs_rehash(old_hash)
+
+    response = await _login(client)
+    assert response.status_code == 200
+
+    async with async_session() as session:
+        new_hash = (await session.get(User, user.id)).hashed_password
+    assert new_hash != old_hash
+    assert not security.password_needs_rehash(new_hash)
+    assert security.verify_password(PASSWORD, new_hash)
+
+
+async def test_wrong_password_is_rejected(client, async_session):
+    await _create_user(async_session, security.get_password_hash(PASSWORD))
+
+    response = await _login(client, "outra-senha")
+
+    assert response.status_code == 401
+
+
+async def test_hash_queue_limit_answers_503(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_LIMIT", 1)
+    release = threading.Event()
+    busy = asyncio.create_task(security._run_in_hash_pool(release.wait, 5))
+    await asyncio.sleep(0.01)
+
+    try:
+        with pytest.raises(HTTPException) as excinfo:
+            await security.verify_password_async(PASSWORD, "-")
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers == {"Retry-After": "1"}
+    finally:
+        release.set()
+        await busy
+
+    # A fila esvaziou: volta a aceitar
+    assert await security.verify_password_async(PASSWORD, "-") is False
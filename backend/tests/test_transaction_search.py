@@ -0,0 +1,108 @@
+import base64
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.security import create_access_token
+from app.models.transaction import Transaction, TransactionType
+from app.services import transaction_search
+from app.services.transaction_search import SearchFilters
+
+pytestmark = pytest.mark.anyio
+
+SAME_TIME = datetime(2026, 3, 10, 12, 0, 0)
+
+
+async def _insert(async_session, account_id: int, stamps: list[datetime], **fields) -> list[int]:
+    async with async_session() as session:
+        rows = [
+            Transaction(
+                account_id=account_id,
+                transaction_type=fields.get("transaction_type", TransactionType.DEPOSIT),
+                amount=Decimal("1.00"),
+                data=stamp,
+            )
+            for stamp in stamps
+        ]
+        session.add_all(rows)
+        await session.commit()
+        return [row.id for row in rows]
+
+
+async def _all_pages(async_session, account_id: int, limit: int, filters=None) -> list[dict]:
+    pages, cursor = [], None
+    async with async_session() as session:
+        while True:
+            body = await transaction_search.page(session, account_id, filters or SearchFilters(), cursor, limit, 1000)
+            pages.append(body)
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return pages
+
+
+async def test_cursor_walks_rows_with_equal_timestamps(async_session, create_account):
+    account = await create_account()
+    # Sete linhas no mesmo instante, cercadas por uma mais nova e uma mais antiga: os
+    # cortes de página caem no meio do empate e só o id desempata
+    newest = await _insert(async_session, account.id, [SAME_TIME + timedelta(seconds=1)])
+    tied = await _insert(async_session, account.id, [SAME_TIME] * 7)
+    oldest = await _insert(async_session, account.id, [SAME_TIME - timedelta(seconds=1)])
+
+    pages = await _all_pages(async_session, account.id, limit=3)
+
+    assert [len(page["items"]) for page in pages] == [3, 3, 3]
+    ids = [item["id"] for page in pages for item in page["items"]]
+    assert ids == newest + sorted(tied, reverse=True) + oldest
+
+
+async def test_cursor_with_filter_and_equal_timestamps(async_session, create_account):
+    account = await create_account()
+    withdrawals = await _insert(async_session, account.id, [SAME_TIME] * 5, transaction_type=TransactionType.WITHDRAW)
+    await _insert(async_session, account.id, [SAME_TIME] * 5)
+
+    pages = await _all_pages(async_session, account.id, 2, SearchFilters(transaction_type=TransactionType.WITHDRAW))
+
+    assert [item["id"] for page in pages for item in page["items"]] == sorted(withdrawals, reverse=True)
+
+
+async def test_last_page_exactly_full_has_no_next_cursor(async_session, create_account):
+    account = await create_account()
+    await _insert(async_session, account.id, [SAME_TIME - timedelta(minutes=i) for i in range(6)])
+
+    pages = await _all_pages(async_session, account.id, limit=3)
+
+    # A linha extra da consulta diz que não há uma terceira página (nada de página vazia)
+    assert len(pages) == 2
+    assert [len(page["items"]) for page in pages] == [3, 3]
+    assert pages[0]["next_cursor"] is not None
+    assert pages[1]["next_cursor"] is None
+    # Páginas seguintes não recalculam o total
+    assert pages[1]["total"] is None
+
+
+async def test_single_page_counts_itself(async_session, create_account):
+    account = await create_account()
+    await _insert(async_session, account.id, [SAME_TIME] * 2)
+
+    pages = await _all_pages(async_session, account.id, limit=3)
+
+    assert len(pages) == 1
+    assert (pages[0]["next_cursor"], pages[0]["total"], pages[0]["total_exact"]) == (None, 2, True)
+
+
+@pytest.mark.parametrize("cursor", [
+    "lixo!",
+    base64.urlsafe_b64encode(b"nao e json").decode(),
+    base64.urlsafe_b64encode(b'{"d":"2026-03-10T12:00:00"}').decode(),
+    base64.urlsafe_b64encode(b'{"d":"ontem","i":1}').decode(),
+    base64.urlsafe_b64encode(b'{"d":"2026-03-10T12:00:00","i":"x"}').decode(),
+])
+async def test_bad_cursor_is_rejected(client, create_account, cursor):
+    account = await create_account()
+    headers = {"Authorization": f"Bearer {create_access_token(subject=account.user_id)}"}
+
+    response = await client.get("/api/v1/transactions/", params={"cursor": cursor}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Cursor inválido."}
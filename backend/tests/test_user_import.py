@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import func, select
+
+from app.models.account import Account
+from app.models.user import User
+from app.services import user_import
+
+pytestmark = pytest.mark.anyio
+
+# Como a trigger do Oracle: todo usuário novo ganha uma conta
+ACCOUNT_TRIGGER = """
+CREATE TRIGGER trg_user_account AFTER INSERT ON "user"
+BEGIN
+    INSERT INTO account (number, balance, user_id, bucket_count, version, created_at)
+    VALUES (printf('%010d', NEW.id + 5000), 0, NEW.id, 0, 0, CURRENT_TIMESTAMP);
+END
+"""
+
+
+def rows(*specs):
+    for line, (email, number) in enumerate(specs, start=2):
+        yield line, {"email": email, "full_name": email, "password": "segredo", "account_number": number}
+
+
+async def _import(async_session, lines):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        return await user_import.import_users(async_session, lines, pool, workers=2, batch_size=10)
+
+
+async def _accounts(async_session) -> dict[str, list[str]]:
+    async with async_session() as session:
+        result = await session.exec(
+            select(User.email, Account.number).join(Account, Account.user_id == User.id).order_by(Account.id)
+        )
+        accounts: dict[str, list[str]] = {}
+        for email, number in result.all():
+            accounts.setdefault(email, []).append(number)
+        return accounts
+
+
+async def test_trigger_account_is_reused_and_renumbered(engine, async_session):
+    async with engine.begin() as conn:
+        await conn.execute(text(ACCOUNT_TRIGGER))
+
+    report = await _import(async_session, rows(("a@x.com", "ACC-A"), ("b@x.com", None)))
+
+    assert report.created == 2 and not report.errors
+    async with async_session() as session:
+        user_ids = dict((await session.exec(select(User.email, User.id))).all())
+    accounts = await _accounts(async_session)
+    # Uma conta por usuário: a da trigger, com o número pedido quando veio no arquivo
+    assert accounts == {"a@x.com": ["ACC-A"], "b@x.com": [f"{user_ids['b@x.com'] + 5000:010d}"]}
+
+
+async def test_without_trigger_accounts_are_created(async_session):
+    report = await _import(async_session, rows(("a@x.com", "ACC-A"), ("b@x.com", None)))
+
+    assert report.created == 2
+    accounts = await _accounts(async_session)
+    assert accounts["a@x.com"] == ["ACC-A"] and len(accounts["b@x.com"]) == 1
+
+
+async def test_default_number_collision_rejects_only_that_row(async_session):
+    # O número explícito da 2ª linha é o padrão que a 1ª recebe (id 1)
+    report = await _import(async_session, rows(("a@x.com", None), ("b@x.com", "0000000001")))
+
+    assert report.created == 1
+    assert [(error.line, error.email) for error in report.errors] == [(3, "b@x.com")]
+    async with async_session() as session:
+        users = (await session.exec(select(func.count()).select_from(User))).one()
+    assert users == 1
+    assert await _accounts(async_session) == {"a@x.com": ["0000000001"]}
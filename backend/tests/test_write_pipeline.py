@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.account import Account
+from app.services import write_pipeline
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def pipeline(monkeypatch, async_session):
+    pipeline = write_pipeline.GroupCommitPipeline(async_session, window_ms=5, max_ops=100)
+    monkeypatch.setattr(write_pipeline, "_pipeline", pipeline)
+    monkeypatch.setattr(settings, "LEDGER_GROUP_COMMIT_ENABLED", True)
+    yield pipeline
+    await pipeline.stop()
+
+
+async def test_group_commit_releases_request_connection(client, engine, async_session, create_account, pipeline, monkeypatch):
+    account = await create_account(balance="10.00")
+    headers = {"Authorization": f"Bearer {create_access_token(subject=account.user_id)}"}
+
+    # Conexões em uso no instante em que a requisição entra na fila do lote
+    checked_out = []
+    submit = pipeline.submit
+
+    async def spy(operation):
+        checked_out.append(engine.pool.checkedout())
+        return await submit(operation)
+
+    monkeypatch.setattr(pipeline, "submit", spy)
+
+    response = await client.post(
+        "/api/v1/transactions/transaction",
+        json={"transaction_type": "deposit", "amount": "5.00"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert checked_out == [0]
+    async with async_session() as session:
+        assert (await session.get(Account, account.id)).balance == Decimal("15.00")
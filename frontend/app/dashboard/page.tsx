@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useRouter } from "next/navigation";
 import {AxiosError} from "axios";
 import api from "@/app/src/services/api"
@@ -35,6 +35,13 @@ export interface Account{
   balance: number
 }
 
+// Sem stream: consulta a cada POLL_INTERVAL_MS e tenta reabrir com espera crescente
+const POLL_INTERVAL_MS = 15000;
+const RECONNECT_BASE_MS = 2000;
+const RECONNECT_MAX_MS = 60000;
+// Conta com saldo dividido: junta os lançamentos seguidos numa única consulta do saldo
+const BALANCE_REFETCH_DELAY_MS = 1000;
+
 export default function Dashboard() {
   const router = useRouter();
   const [user, setUser] = useState<User | null>(null);
@@ -52,6 +59,10 @@ export default function Dashboard() {
   const [msgError, setMsgError] = useState("");
   const [msgSuccess, setMsgSuccess] = useState("");
 
+  // Só com o stream confirmado aberto as ações deixam saldo e extrato por conta dele
+  const streamOpen = useRef(false);
+  const balanceRefetch = useRef<ReturnType<typeof setTimeout> | null>(null);
+
   const fetchData = async () => {
     const token = localStorage.getItem("token");
     if (!token) { router.push("/login"); return; }
@@ -66,12 +77,31 @@ export default function Dashboard() {
 
         setUser(userRes.data);
         setAccount(accRes.data);
-        setTransactions(transRes.data);
+        setTransactions(transRes.data.items);
     } catch (error) {
         console.error("Erro ao atualizar dados", error);
     }
   };
 
+  const fetchAccount = async () => {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+    try {
+        const accRes = await api.get("/api/v1/users/account", { headers: { Authorization: `Bearer ${token}` } });
+        setAccount(accRes.data);
+    } catch (error) {
+        console.error("Erro ao atualizar saldo", error);
+    }
+  };
+
+  const scheduleBalanceRefetch = () => {
+    if (balanceRefetch.current) return;
+    balanceRefetch.current = setTimeout(() => {
+      balanceRefetch.current = null;
+      fetchAccount();
+    }, BALANCE_REFETCH_DELAY_MS);
+  };
+
   // Função de Logout
   const handleLogout = () => {
     localStorage.removeItem("token");
@@ -86,6 +116,110 @@ export default function Dashboard() {
     init();
   }, []);
 
+  // Tempo real: o backend empurra o saldo e cada lançamento novo (SSE), sem refazer
+  // as consultas. O stream abre com um token curto só dele (a URL cai em logs de
+  // acesso). Se cair (token vencido, limite de conexões, rede), volta a consultar de
+  // tempos em tempos e reabre com um token novo.
+  useEffect(() => {
+    let source: EventSource | null = null;
+    let reconnect: ReturnType<typeof setTimeout> | null = null;
+    let polling: ReturnType<typeof setInterval> | null = null;
+    let failures = 0;
+    let stopped = false;
+
+    const startPolling = () => {
+      if (!polling) polling = setInterval(fetchData, POLL_INTERVAL_MS);
+    };
+
+    const stopPolling = () => {
+      if (polling) { clearInterval(polling); polling = null; }
+    };
+
+    const fail = () => {
+      streamOpen.current = false;
+      startPolling();
+      failures += 1;
+      if (!stopped) {
+        reconnect = setTimeout(connect, Math.min(RECONNECT_MAX_MS, RECONNECT_BASE_MS * 2 ** (failures - 1)));
+      }
+    };
+
+    const connect = async () => {
+      const token = localStorage.getItem("token");
+      if (!token) return;
+
+      let streamToken: string;
+      try {
+        const res = await api.post("/api/v1/transactions/stream/token", null, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        streamToken = res.data.access_token;
+      } catch (err) {
+        const error = err as AxiosError;
+        // Login vencido: não adianta insistir
+        if (error.response?.status === 401 || error.response?.status === 403) {
+          stopPolling();
+          router.push("/login");
+          return;
+        }
+        fail();
+        return;
+      }
+      if (stopped) return;
+
+      const url = `${api.defaults.baseURL}/api/v1/transactions/stream?access_token=${encodeURIComponent(streamToken)}`;
+      source = new EventSource(url);
+
+      source.onopen = () => {
+        streamOpen.current = true;
+        stopPolling();
+        // Um EventSource novo não manda Last-Event-ID: recarrega o que passou na queda
+        if (failures > 0) fetchData();
+        failures = 0;
+      };
+
+      // O EventSource reconectaria com o mesmo token (já vencido) ou desistiria de vez
+      // num 401/429; fechamos e seguimos pelo caminho acima
+      source.onerror = () => {
+        source?.close();
+        source = null;
+        fail();
+      };
+
+      source.addEventListener("balance", (event) => {
+        const { balance } = JSON.parse((event as MessageEvent).data);
+        setAccount((prev) => (prev ? { ...prev, balance } : prev));
+      });
+
+      source.addEventListener("transaction", (event) => {
+        const transaction = JSON.parse((event as MessageEvent).data);
+        setTransactions((prev) =>
+          prev.some((t) => t.id === transaction.id) ? prev : [transaction, ...prev]
+        );
+        if (transaction.balance_after !== null) {
+          setAccount((prev) => (prev ? { ...prev, balance: transaction.balance_after } : prev));
+        } else {
+          // Conta com saldo dividido: o lançamento não traz o saldo da conta
+          scheduleBalanceRefetch();
+        }
+      });
+
+      // Ficou tempo demais desconectado: recarrega tudo
+      source.addEventListener("reset", () => { fetchData(); });
+    };
+
+    connect();
+
+    return () => {
+      stopped = true;
+      streamOpen.current = false;
+      source?.close();
+      stopPolling();
+      if (reconnect) clearTimeout(reconnect);
+      if (balanceRefetch.current) { clearTimeout(balanceRefetch.current); balanceRefetch.current = null; }
+    };
+  }, []);
+
   // --- FUNÇÃO DE DEPÓSITO ---
   const handleDeposit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -99,9 +233,11 @@ export default function Dashboard() {
             description: "Depósito via App"
         }, { headers: { Authorization: `Bearer ${token}` } });
 
+        // Saldo e extrato chegam pelo stream; sem ele, recarrega
+        if (!streamOpen.current) await fetchData();
+
         setMsgSuccess("Depósito realizado com sucesso!");
         setAmount(""); // Limpa input
-        await fetchData(); // Atualiza saldo na tela
         setTimeout(() => { setIsDepositOpen(false); setMsgSuccess(""); }, 1500); // Fecha modal
 
     } catch (err) {
@@ -126,9 +262,10 @@ export default function Dashboard() {
             description: description
         }, { headers: { Authorization: `Bearer ${token}` } });
 
+        if (!streamOpen.current) await fetchData();
+
         setMsgSuccess("Transferência enviada!");
         setAmount(""); setTransferTarget(""); setDescription("");
-        await fetchData();
         setTimeout(() => { setIsTransferOpen(false); setMsgSuccess(""); }, 1500);
 
     } catch (err) {